@@ -1,12 +1,13 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from maturin_import_hook import project_importer, rust_file_importer
 from maturin_import_hook._logging import logger, reset_logger
+from maturin_import_hook._prebuild import PrebuildResult, prebuild
 from maturin_import_hook.settings import MaturinSettings
 
-__all__ = ["install", "uninstall", "reset_logger"]
+__all__ = ["install", "uninstall", "reset_logger", "prebuild", "PrebuildResult"]
 
 
 def install(
@@ -21,6 +22,13 @@ def install(
     show_warnings: bool = True,
     file_searcher: Optional[project_importer.ProjectFileSearcher] = None,
     enable_automatic_installation: bool = False,
+    enable_content_hashing: bool = False,
+    enable_file_watcher: bool = False,
+    enable_dep_info_tracking: bool = False,
+    enable_background_rebuild: bool = False,
+    enable_background_prebuild: bool = False,
+    max_prebuild_jobs: int = 2,
+    build_status_store: Literal["json", "sqlite"] = "json",
 ) -> None:
     """Install import hooks for automatically rebuilding and importing maturin projects or .rs files.
 
@@ -35,7 +43,7 @@ def install(
             `sys.exec_prefix / 'maturin_build_cache'` or
             `$HOME/.cache/maturin_build_cache/<interpreter_hash>` in order of preference
         force_rebuild: whether to always rebuild and skip checking whether anything has changed
-        lock_timeout_seconds: a lock is required to prevent projects from being built concurrently.
+        lock_timeout_seconds: a lock is required to prevent the same project from being built concurrently.
             If the lock is not released before this timeout is reached the import hook stops waiting and aborts.
             A value of None means that the import hook will wait for the lock indefinitely.
         show_warnings: whether to show compilation warnings
@@ -43,6 +51,24 @@ def install(
             a project has changed and needs to be rebuilt
         enable_automatic_install: whether to install detected packages using the import hook even if they
             are not already installed into the virtual environment or are installed in non-editable mode.
+        enable_content_hashing: record a hash of each source file when building so that files which are modified
+            without changing their contents (eg by `touch` or by switching git branches and back) do not trigger
+            a rebuild. Files are only hashed if their size and mtime do not already show that they are unchanged
+        enable_file_watcher: watch the source directories of projects for changes (using inotify, Linux only) so that
+            checking whether a project that has not changed is up to date does not require searching for source files.
+            Intended for long running processes that import or reload repeatedly
+        enable_dep_info_tracking: after each build, record the source files listed in the dep-info file written by
+            cargo so that checking whether a project is up to date only has to check those files (and the manifests)
+            instead of searching the project for source files. Falls back to searching if the dep-info is unavailable
+        enable_background_rebuild: if an installed project is out of date, import the stale installation immediately
+            and rebuild the project in a background thread. The new build is used after the package is reloaded or
+            the interpreter is restarted
+        enable_background_prebuild: check every project that can be found from `sys.path` (and rebuild any that are
+            out of date) in a background thread so that the work is done or in progress by the time they are imported
+        max_prebuild_jobs: the maximum number of projects to check or build at the same time when prebuilding
+        build_status_store: where to record the status of each build. "json" writes a file per project to the build
+            cache and "sqlite" uses a single SQLite database in WAL mode, which scales better to many projects and
+            concurrent processes
 
     """
     if os.environ.get("MATURIN_IMPORT_HOOK_ENABLED") == "0":
@@ -57,6 +83,9 @@ def install(
             force_rebuild=force_rebuild,
             lock_timeout_seconds=lock_timeout_seconds,
             show_warnings=show_warnings,
+            enable_content_hashing=enable_content_hashing,
+            enable_dep_info_tracking=enable_dep_info_tracking,
+            build_status_store=build_status_store,
         )
     if enable_project_importer:
         project_importer.install(
@@ -68,6 +97,13 @@ def install(
             show_warnings=show_warnings,
             file_searcher=file_searcher,
             enable_automatic_installation=enable_automatic_installation,
+            enable_content_hashing=enable_content_hashing,
+            enable_file_watcher=enable_file_watcher,
+            enable_dep_info_tracking=enable_dep_info_tracking,
+            enable_background_rebuild=enable_background_rebuild,
+            enable_background_prebuild=enable_background_prebuild,
+            max_prebuild_jobs=max_prebuild_jobs,
+            build_status_store=build_status_store,
         )
 
 
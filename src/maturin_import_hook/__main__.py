@@ -1,15 +1,20 @@
 import argparse
+import dataclasses
 import importlib.metadata
 import json
 import platform
-import shutil
+import shlex
 import site
 import subprocess
+import sys
+import time
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 from maturin_import_hook import project_importer, rust_file_importer
-from maturin_import_hook._building import get_default_build_dir
+from maturin_import_hook._building import BuildCache, get_default_build_dir, summarize_build_history
+from maturin_import_hook._prebuild import prebuild
+from maturin_import_hook._resolve_project import ProjectResolver
 from maturin_import_hook._site import (
     get_sitecustomize_path,
     get_usercustomize_path,
@@ -17,6 +22,8 @@ from maturin_import_hook._site import (
     insert_automatic_installation,
     remove_automatic_installation,
 )
+from maturin_import_hook.project_importer import _ProjectIndex
+from maturin_import_hook.settings import MaturinSettings
 
 
 def _action_version(format_name: str) -> None:
@@ -62,6 +69,7 @@ def _action_cache_info(format_name: str) -> None:
             "path": str(build_dir),
             "exists": build_dir.exists(),
             "size": cache_size_str,
+            "build_statuses": len(BuildCache(build_dir, lock_timeout_seconds=None).get_all_build_statuses()),
         },
         format_name,
     )
@@ -72,16 +80,110 @@ def _action_cache_clear(interactive: bool) -> None:
     if build_dir.exists():
         print(f"clearing '{build_dir}'")
         print(f"This will free {_dir_size_mib(build_dir)}")
-        print("please ensure no processes are currently writing to the build cache before continuing")
         if interactive and not _ask_yes_no("are you sure you want to continue"):
             print("not clearing")
             return
-        shutil.rmtree(build_dir)
+        print("waiting for any builds that are in progress to finish")
+        BuildCache(build_dir, lock_timeout_seconds=None).clear()
         print("done.")
     else:
         print(f"the cache '{build_dir}' does not exist")
 
 
+def _action_cache_index(format_name: str, *, rebuild: bool) -> None:
+    index = _ProjectIndex.for_build_dir(get_default_build_dir(), ProjectResolver())
+    candidates = index.rebuild(sys.path) if rebuild else index.get_all_candidates(sys.path)
+
+    if format_name == "text":
+        print(f"path: {index.index_path}")
+        print(f"projects: {len(candidates)}")
+        for package_name, package_candidates in sorted(candidates.items()):
+            for candidate in package_candidates:
+                if candidate.is_editable is None:
+                    found_by = f"found above {candidate.search_path}"
+                else:
+                    editable = "editable" if candidate.is_editable else "non-editable"
+                    found_by = f"linked by {editable} dist-info in {candidate.search_path}"
+                print(f"  {package_name}: {candidate.project_dir} ({found_by})")
+    elif format_name == "json":
+        data = {
+            "path": str(index.index_path),
+            "projects": {
+                package_name: [
+                    {
+                        "project_dir": str(candidate.project_dir),
+                        "search_path": str(candidate.search_path),
+                        "is_editable": candidate.is_editable,
+                    }
+                    for candidate in package_candidates
+                ]
+                for package_name, package_candidates in sorted(candidates.items())
+            },
+        }
+        print(json.dumps(data))
+    else:
+        raise ValueError(format_name)
+
+
+def _action_cache_stats(format_name: str, *, days: Optional[float]) -> None:
+    build_dir = get_default_build_dir()
+    since = time.time() - days * 24 * 60 * 60 if days is not None else None
+    stats = summarize_build_history(BuildCache(build_dir, lock_timeout_seconds=None).get_history(since))
+
+    if format_name == "text":
+        print(f"imports checked: {stats['checks']}")
+        print(f"total freshness check time: {stats['total_freshness_check_seconds']:.1f}s")
+        print(f"builds: {stats['builds']}")
+        print(f"total build time: {stats['total_build_seconds']:.1f}s")
+        print("rebuild reasons:")
+        for reason, count in stats["reasons"].items():
+            print(f"  {count:>5}  {reason}")
+        print("projects (by total build time):")
+        for project in stats["projects"]:
+            print(
+                f"  {project['name']}: {project['checks']} checks, {project['builds']} builds "
+                f"({project['failures']} failed), "
+                f"total {project['total_build_seconds']:.1f}s, "
+                f"p50 {project['p50_build_seconds']:.1f}s, p95 {project['p95_build_seconds']:.1f}s, "
+                f"p50 freshness check {project['p50_freshness_check_seconds'] * 1000:.1f}ms"
+            )
+            print(f"    path: {project['source_path']}")
+            for reason, count in project["reasons"].items():
+                print(f"    {count:>5}  {reason}")
+    elif format_name == "json":
+        print(json.dumps(stats))
+    else:
+        raise ValueError(format_name)
+
+
+def _action_build(
+    targets: List[str], *, build_all: bool, jobs: int, force: bool, args: Optional[str], format_name: str
+) -> None:
+    if not targets and not build_all:
+        print("no targets given. Pass package names, project directories or .rs files, or use --all")
+        sys.exit(2)
+    try:
+        settings = MaturinSettings.from_args(shlex.split(args)) if args is not None else None
+    except ValueError as e:
+        print(f"invalid maturin arguments {args!r}: {e}")
+        sys.exit(2)
+    results = prebuild(None if build_all else targets, max_jobs=jobs, settings=settings, force_rebuild=force)
+
+    if format_name == "text":
+        for result in results:
+            status = ("built" if result.rebuilt else "up to date") if result.success else f"failed: {result.error}"
+            print(f"{result.target}: {status} ({result.duration_seconds:.3f}s)")
+        num_failed = sum(1 for result in results if not result.success)
+        print(f"{len(results) - num_failed} succeeded, {num_failed} failed")
+    elif format_name == "json":
+        print(json.dumps([dataclasses.asdict(result) for result in results]))
+    else:
+        raise ValueError(format_name)
+
+    if not all(result.success for result in results):
+        sys.exit(1)
+
+
 def _action_site_info(format_name: str) -> None:
     sitecustomize_path = get_sitecustomize_path()
     usercustomize_path = get_usercustomize_path()
@@ -178,6 +280,45 @@ def _main() -> None:
     )
     cache_clear = cache_sub_actions.add_parser("clear", help="delete the import hook cache")
     cache_clear.add_argument("-y", "--yes", action="store_true", help="do not prompt for confirmation")
+    cache_index = cache_sub_actions.add_parser(
+        "index", help="print the maturin projects that the project importer has discovered from sys.path"
+    )
+    cache_index.add_argument(
+        "-f", "--format", choices=["text", "json"], default="text", help="the format to output the data in"
+    )
+    cache_index.add_argument(
+        "--rebuild", action="store_true", help="discard the existing index and discover all projects again"
+    )
+
+    cache_stats = cache_sub_actions.add_parser(
+        "stats", help="print statistics about the builds triggered by the import hook and why they were required"
+    )
+    cache_stats.add_argument(
+        "-f", "--format", choices=["text", "json"], default="text", help="the format to output the data in"
+    )
+    cache_stats.add_argument("--days", type=float, help="only include builds from the last N days")
+
+    build_action = subparsers.add_parser(
+        "build",
+        help="check (and rebuild if necessary) maturin projects and .rs files concurrently without importing them",
+    )
+    build_action.add_argument(
+        "targets", nargs="*", help="package names, maturin project directories or paths to .rs files"
+    )
+    build_action.add_argument(
+        "--all", action="store_true", help="build every maturin project that can be found from sys.path"
+    )
+    build_action.add_argument(
+        "-j", "--jobs", type=int, default=2, help="the maximum number of targets to build at the same time"
+    )
+    build_action.add_argument("--force", action="store_true", help="rebuild even if the targets are already up to date")
+    build_action.add_argument(
+        "--args",
+        help="The arguments to pass to `maturin`. See `maturin develop --help` or `maturin build --help`",
+    )
+    build_action.add_argument(
+        "-f", "--format", choices=["text", "json"], default="text", help="the format to output the data in"
+    )
 
     site_action = subparsers.add_parser(
         "site",
@@ -260,9 +401,23 @@ def _main() -> None:
             _action_cache_info(args.format)
         elif args.sub_action == "clear":
             _action_cache_clear(interactive=not args.yes)
+        elif args.sub_action == "index":
+            _action_cache_index(args.format, rebuild=args.rebuild)
+        elif args.sub_action == "stats":
+            _action_cache_stats(args.format, days=args.days)
         else:
             cache_action.print_help()
 
+    elif args.action == "build":
+        _action_build(
+            args.targets,
+            build_all=args.all,
+            jobs=args.jobs,
+            force=args.force,
+            args=args.args,
+            format_name=args.format,
+        )
+
     elif args.action == "site":
         if args.sub_action == "info":
             _action_site_info(args.format)
@@ -1,25 +1,43 @@
 import hashlib
+import importlib.machinery
 import json
 import logging
 import os
 import platform
 import re
 import shutil
+import sqlite3
 import subprocess
 import sys
+import threading
+import time
 import zipfile
-from contextlib import contextmanager
-from dataclasses import dataclass
+from abc import ABC, abstractmethod
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
 from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Generator, Iterable, List, Literal, Optional, Tuple, Union
 
 import filelock
 
+from maturin_import_hook._common import write_file_atomically
+from maturin_import_hook._file_snapshot import FileSnapshot
 from maturin_import_hook._logging import logger
 from maturin_import_hook.error import ImportHookError, MaturinError
 from maturin_import_hook.settings import MaturinSettings
 
+# the number of most recently modified source files to check before searching for every source file
+_NUM_RECENT_SOURCE_FILES = 16
+# the name of the database used by the sqlite build status store (in the build dir)
+_SQLITE_DB_NAME = "build_status.sqlite3"
+# build history entries older than this are removed when new entries are recorded
+_BUILD_HISTORY_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+# the maximum number of build history entries kept by each build status store (the most recent are kept)
+_BUILD_HISTORY_MAX_ENTRIES = 10_000
+# the JSON build history file is only trimmed once it grows beyond this size so that appending stays cheap
+_JSON_BUILD_HISTORY_TRIM_BYTES = 4 * 1024 * 1024
+
 
 @dataclass
 class BuildStatus:
@@ -32,6 +50,11 @@ class BuildStatus:
     source_path: Path
     maturin_args: List[str]
     maturin_output: str
+    # whether the source snapshot stored with the build lists the files from the cargo dep-info file of the build,
+    # in which case only those files have to be checked rather than searching for source files
+    source_paths_from_dep_info: bool = False
+    # the hash of the cargo manifest embedded in a `.rs` file (if any)
+    embedded_manifest_hash: Optional[str] = None
 
     def to_json(self) -> Dict[str, Any]:
         return {
@@ -39,6 +62,8 @@ class BuildStatus:
             "source_path": str(self.source_path),
             "maturin_args": self.maturin_args,
             "maturin_output": self.maturin_output,
+            "source_paths_from_dep_info": self.source_paths_from_dep_info,
+            "embedded_manifest_hash": self.embedded_manifest_hash,
         }
 
     @staticmethod
@@ -49,49 +74,598 @@ class BuildStatus:
                 source_path=Path(json_data["source_path"]),
                 maturin_args=json_data["maturin_args"],
                 maturin_output=json_data["maturin_output"],
+                source_paths_from_dep_info=json_data.get("source_paths_from_dep_info", False),
+                embedded_manifest_hash=json_data.get("embedded_manifest_hash"),
             )
         except KeyError:
             logger.debug("failed to parse BuildStatus from %s", json_data)
             return None
 
 
-class LockedBuildCache:
+# the reason recorded in the build history when an import found the package or module to be up to date
+UP_TO_DATE_REASON = "up to date"
+
+
+@dataclass
+class BuildHistoryEntry:
+    """A record of an import checked by the import hook and the build that it triggered (if any), used for
+    statistics."""
+
+    timestamp: float
+    source_path: Path
+    # the package name or module path that was imported
+    name: str
+    # why a rebuild was required, or `UP_TO_DATE_REASON` if no build was required
+    reason: str
+    freshness_check_seconds: float
+    build_seconds: float
+    maturin_args: List[str]
+    success: bool
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "source_path": str(self.source_path),
+            "name": self.name,
+            "reason": self.reason,
+            "freshness_check_seconds": self.freshness_check_seconds,
+            "build_seconds": self.build_seconds,
+            "maturin_args": self.maturin_args,
+            "success": self.success,
+        }
+
+    @staticmethod
+    def from_json(json_data: Dict[Any, Any]) -> Optional["BuildHistoryEntry"]:
+        try:
+            return BuildHistoryEntry(
+                timestamp=json_data["timestamp"],
+                source_path=Path(json_data["source_path"]),
+                name=json_data["name"],
+                reason=json_data["reason"],
+                freshness_check_seconds=json_data["freshness_check_seconds"],
+                build_seconds=json_data["build_seconds"],
+                maturin_args=json_data["maturin_args"],
+                success=json_data["success"],
+            )
+        except KeyError:
+            logger.debug("failed to parse BuildHistoryEntry from %s", json_data)
+            return None
+
+
+def summarize_build_history(entries: List[BuildHistoryEntry]) -> Dict[str, Any]:
+    """Aggregate build history into per-project build and freshness check time percentiles and a histogram of
+    rebuild reasons"""
+    by_source: Dict[Path, List[BuildHistoryEntry]] = {}
+    for entry in entries:
+        by_source.setdefault(entry.source_path, []).append(entry)
+
+    projects = []
+    for source_path, source_entries in by_source.items():
+        builds = [entry for entry in source_entries if entry.reason != UP_TO_DATE_REASON]
+        build_seconds = sorted(entry.build_seconds for entry in builds)
+        check_seconds = sorted(entry.freshness_check_seconds for entry in source_entries)
+        projects.append({
+            "name": source_entries[-1].name,
+            "source_path": str(source_path),
+            "checks": len(source_entries),
+            "builds": len(builds),
+            "failures": sum(not entry.success for entry in builds),
+            "total_build_seconds": sum(build_seconds),
+            "p50_build_seconds": _percentile(build_seconds, 0.5),
+            "p95_build_seconds": _percentile(build_seconds, 0.95),
+            "total_freshness_check_seconds": sum(check_seconds),
+            "p50_freshness_check_seconds": _percentile(check_seconds, 0.5),
+            "reasons": _count_reasons(builds),
+        })
+    projects.sort(key=itemgetter("total_build_seconds"), reverse=True)
+    builds = [entry for entry in entries if entry.reason != UP_TO_DATE_REASON]
+    return {
+        "checks": len(entries),
+        "builds": len(builds),
+        "total_build_seconds": sum(entry.build_seconds for entry in builds),
+        "total_freshness_check_seconds": sum(entry.freshness_check_seconds for entry in entries),
+        "reasons": _count_reasons(builds),
+        "projects": projects,
+    }
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, int(len(sorted_values) * fraction + 0.5) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _count_reasons(entries: List[BuildHistoryEntry]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for entry in entries:
+        reason = _normalize_reason(entry.reason)
+        counts[reason] = counts.get(reason, 0) + 1
+    return dict(sorted(counts.items(), key=itemgetter(1), reverse=True))
+
+
+def _normalize_reason(reason: str) -> str:
+    """remove the details (eg paths and counts) from a rebuild reason so that similar reasons are grouped together"""
+    reason = reason.split(": ", 1)[0]
+    return re.sub(r"\d+", "N", reason)
+
+
+class _BuildStatusStore(ABC):
+    """Where build statuses and source snapshots are stored. Reading must be safe without holding any lock."""
+
+    @abstractmethod
+    def get_build_status(self, source_path: Path) -> Optional[BuildStatus]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_source_snapshot(self, source_path: Path) -> Optional[FileSnapshot]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def store_build_status(self, build_status: BuildStatus, source_snapshot: Optional[FileSnapshot]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all_build_statuses(self) -> List[BuildStatus]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_history_entry(self, entry: BuildHistoryEntry) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_history(self, since: Optional[float] = None) -> List[BuildHistoryEntry]:
+        """Get the history entries (oldest first), optionally only those recorded after the given timestamp"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def trim_history(self, max_age_seconds: float, max_entries: int) -> None:
+        """Remove the history entries older than `max_age_seconds` and all but the `max_entries` most recent entries"""
+        raise NotImplementedError
+
+
+class _JsonBuildStatusStore(_BuildStatusStore):
+    """A JSON file (and snapshot file) per source path. Files are written atomically so they can be read at any time."""
+
     def __init__(self, build_dir: Path) -> None:
-        self._build_dir = build_dir
+        self._status_dir = build_dir / "build_status"
+        self._history_path = build_dir / "build_history.jsonl"
 
     def _build_status_path(self, source_path: Path) -> Path:
-        path_hash = hashlib.sha1(bytes(source_path)).hexdigest()
-        build_status_dir = self._build_dir / "build_status"
-        build_status_dir.mkdir(parents=True, exist_ok=True)
-        return build_status_dir / f"{path_hash}.json"
+        return self._status_dir / f"{_source_path_hash(source_path)}.json"
 
-    def store_build_status(self, build_status: BuildStatus) -> None:
-        with self._build_status_path(build_status.source_path).open("w") as f:
-            json.dump(build_status.to_json(), f, indent="  ")
+    def _source_snapshot_path(self, source_path: Path) -> Path:
+        return self._status_dir / f"{_source_path_hash(source_path)}.snapshot"
 
     def get_build_status(self, source_path: Path) -> Optional[BuildStatus]:
         try:
-            with self._build_status_path(source_path).open("r") as f:
-                return BuildStatus.from_json(json.load(f))
+            data = self._build_status_path(source_path).read_bytes()
         except FileNotFoundError:
             return None
+        return BuildStatus.from_json(json.loads(data))
+
+    def get_source_snapshot(self, source_path: Path) -> Optional[FileSnapshot]:
+        try:
+            data = self._source_snapshot_path(source_path).read_bytes()
+        except FileNotFoundError:
+            return None
+        return FileSnapshot.from_bytes(data)
+
+    def store_build_status(self, build_status: BuildStatus, source_snapshot: Optional[FileSnapshot]) -> None:
+        snapshot_path = self._source_snapshot_path(build_status.source_path)
+        if source_snapshot is None:
+            snapshot_path.unlink(missing_ok=True)
+        else:
+            write_file_atomically(snapshot_path, source_snapshot.to_bytes())
+        write_file_atomically(
+            self._build_status_path(build_status.source_path), json.dumps(build_status.to_json(), indent="  ")
+        )
+
+    def get_all_build_statuses(self) -> List[BuildStatus]:
+        if not self._status_dir.is_dir():
+            return []
+        statuses = []
+        for path in sorted(self._status_dir.glob("*.json")):
+            try:
+                status = BuildStatus.from_json(json.loads(path.read_bytes()))
+            except (OSError, ValueError) as e:
+                logger.debug("failed to read build status %s: %r", path, e)
+                continue
+            if status is not None:
+                statuses.append(status)
+        return statuses
+
+    def add_history_entry(self, entry: BuildHistoryEntry) -> None:
+        try:
+            self._history_path.parent.mkdir(parents=True, exist_ok=True)
+            # each entry is appended with a single write so that entries from concurrent processes are not interleaved
+            with self._history_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry.to_json()) + "\n")
+                f.flush()
+                history_size = os.fstat(f.fileno()).st_size
+            if history_size > _JSON_BUILD_HISTORY_TRIM_BYTES:
+                self.trim_history(_BUILD_HISTORY_MAX_AGE_SECONDS, _BUILD_HISTORY_MAX_ENTRIES)
+        except OSError as e:
+            logger.error('failed to record build history in "%s": %s', self._history_path, e)
+
+    def get_history(self, since: Optional[float] = None) -> List[BuildHistoryEntry]:
+        try:
+            lines = self._history_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entry = BuildHistoryEntry.from_json(json.loads(line))
+            except ValueError:
+                # possibly a partially written line
+                continue
+            if entry is not None and (since is None or entry.timestamp >= since):
+                entries.append(entry)
+        return entries
+
+    def trim_history(self, max_age_seconds: float, max_entries: int) -> None:
+        try:
+            lines = self._history_path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        cutoff = time.time() - max_age_seconds
+        kept = []
+        for line in lines:
+            try:
+                entry = BuildHistoryEntry.from_json(json.loads(line))
+            except ValueError:
+                continue
+            if entry is not None and entry.timestamp >= cutoff:
+                kept.append(line)
+        kept = kept[-max_entries:] if max_entries > 0 else []
+        # entries appended by other processes between reading and replacing the file are lost, which is acceptable
+        # for statistics
+        write_file_atomically(self._history_path, "".join(line + "\n" for line in kept))
+
+
+class _SqliteBuildStatusStore(_BuildStatusStore):
+    """A single SQLite database in WAL mode, so readers are not blocked while another process is writing.
+
+    Connections are opened per thread (and per process) because sqlite connections cannot be shared between them.
+    """
+
+    # stored in `PRAGMA user_version`
+    _SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._local = threading.local()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        cached: Optional[Tuple[int, sqlite3.Connection]] = getattr(self._local, "connection", None)
+        if cached is not None and cached[0] == os.getpid():
+            return cached[1]
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        # transactions are managed explicitly. Each statement is a transaction on its own unless stated otherwise
+        connection = sqlite3.connect(self._db_path, timeout=60, isolation_level=None)
+        # with WAL, commits are still atomic and durable across application crashes (but not power loss)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # the schema is only created once (by whichever process opens the database first) so that opening the
+        # database to read a build status does not have to wait for the write lock
+        (schema_version,) = connection.execute("PRAGMA user_version").fetchone()
+        if schema_version < self._SCHEMA_VERSION:
+            self._create_schema(connection)
+        self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        # the journal mode is stored in the database file so only has to be set once
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("BEGIN IMMEDIATE")
+        # committed, or rolled back on error, when the block exits
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS build_status ("
+                "source_path TEXT PRIMARY KEY NOT NULL, "
+                "status TEXT NOT NULL, "
+                "source_snapshot BLOB, "
+                "stored_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS build_history ("
+                "id INTEGER PRIMARY KEY, "
+                "timestamp REAL NOT NULL, "
+                "source_path TEXT NOT NULL, "
+                "entry TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS build_history_timestamp ON build_history (timestamp)")
+            connection.execute("CREATE INDEX IF NOT EXISTS build_history_source_path ON build_history (source_path)")
+            connection.execute(f"PRAGMA user_version = {self._SCHEMA_VERSION}")
+
+    def get_build_status(self, source_path: Path) -> Optional[BuildStatus]:
+        row = self._query_one("SELECT status FROM build_status WHERE source_path = ?", str(source_path))
+        return None if row is None else BuildStatus.from_json(json.loads(row[0]))
+
+    def get_source_snapshot(self, source_path: Path) -> Optional[FileSnapshot]:
+        row = self._query_one("SELECT source_snapshot FROM build_status WHERE source_path = ?", str(source_path))
+        return None if row is None or row[0] is None else FileSnapshot.from_bytes(row[0])
+
+    def store_build_status(self, build_status: BuildStatus, source_snapshot: Optional[FileSnapshot]) -> None:
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO build_status VALUES (?, ?, ?, ?)",
+                (
+                    str(build_status.source_path),
+                    json.dumps(build_status.to_json()),
+                    None if source_snapshot is None else source_snapshot.to_bytes(),
+                    time.time(),
+                ),
+            )
+        except sqlite3.Error as e:
+            msg = f'failed to store build status in "{self._db_path}": {e}'
+            raise ImportHookError(msg) from None
+
+    def get_all_build_statuses(self) -> List[BuildStatus]:
+        try:
+            rows = self._connect().execute("SELECT status FROM build_status ORDER BY source_path").fetchall()
+        except sqlite3.Error as e:
+            logger.error('failed to read build statuses from "%s": %s', self._db_path, e)
+            return []
+        statuses = [BuildStatus.from_json(json.loads(status)) for (status,) in rows]
+        return [status for status in statuses if status is not None]
+
+    def add_history_entry(self, entry: BuildHistoryEntry) -> None:
+        try:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            # committed, or rolled back on error, when the block exits
+            with connection:
+                connection.execute(
+                    "INSERT INTO build_history (timestamp, source_path, entry) VALUES (?, ?, ?)",
+                    (entry.timestamp, str(entry.source_path), json.dumps(entry.to_json())),
+                )
+                # both deletions use an index so trimming on every insert is cheap
+                self._trim_history(connection, _BUILD_HISTORY_MAX_AGE_SECONDS, _BUILD_HISTORY_MAX_ENTRIES)
+        except sqlite3.Error as e:
+            logger.error('failed to record build history in "%s": %s', self._db_path, e)
+
+    def get_history(self, since: Optional[float] = None) -> List[BuildHistoryEntry]:
+        try:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT entry FROM build_history WHERE timestamp >= ? ORDER BY timestamp",
+                    (since if since is not None else float("-inf"),),
+                )
+                .fetchall()
+            )
+        except sqlite3.Error as e:
+            logger.error('failed to read build history from "%s": %s', self._db_path, e)
+            return []
+        entries = [BuildHistoryEntry.from_json(json.loads(entry)) for (entry,) in rows]
+        return [entry for entry in entries if entry is not None]
+
+    def trim_history(self, max_age_seconds: float, max_entries: int) -> None:
+        try:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            with connection:
+                self._trim_history(connection, max_age_seconds, max_entries)
+        except sqlite3.Error as e:
+            logger.error('failed to trim build history in "%s": %s', self._db_path, e)
+
+    @staticmethod
+    def _trim_history(connection: sqlite3.Connection, max_age_seconds: float, max_entries: int) -> None:
+        connection.execute("DELETE FROM build_history WHERE timestamp < ?", (time.time() - max_age_seconds,))
+        # ids increase with each insert so the entries with the lowest ids are the oldest
+        connection.execute(
+            "DELETE FROM build_history WHERE id <= (SELECT id FROM build_history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (max(max_entries, 0),),
+        )
+
+    def clear(self) -> None:
+        # the database is emptied rather than deleted because other processes may have it open
+        connection = self._connect()
+        connection.execute("DELETE FROM build_status")
+        connection.execute("DELETE FROM build_history")
+
+    def _query_one(self, query: str, *args: object) -> Optional[Tuple[Any, ...]]:
+        try:
+            row: Optional[Tuple[Any, ...]] = self._connect().execute(query, args).fetchone()
+        except sqlite3.Error as e:
+            logger.error('failed to read build status from "%s": %s', self._db_path, e)
+            return None
+        return row
+
+
+class ReadOnlyBuildCache:
+    """A view of the build cache that can be used without holding the lock.
+
+    Build statuses are stored atomically so they can be read while another process holds the lock.
+    """
+
+    def __init__(self, build_dir: Path, store: _BuildStatusStore) -> None:
+        self._build_dir = build_dir
+        self._store = store
+
+    def get_build_status(self, source_path: Path) -> Optional[BuildStatus]:
+        return self._store.get_build_status(source_path)
+
+    def get_source_snapshot(self, source_path: Path) -> Optional[FileSnapshot]:
+        """Load the snapshot of the source files taken when the last build status was stored"""
+        return self._store.get_source_snapshot(source_path)
 
     def tmp_project_dir(self, project_path: Path, module_name: str) -> Path:
-        path_hash = hashlib.sha1(bytes(project_path)).hexdigest()
-        return self._build_dir / "project" / f"{module_name}_{path_hash}"
+        return self._build_dir / "project" / f"{module_name}_{_source_path_hash(project_path)}"
+
+    def shared_lockfile_path(self, dependencies_hash: str) -> Path:
+        """The lockfile most recently resolved for a generated project with the given dependencies"""
+        return self._build_dir / "lockfiles" / f"{dependencies_hash}.lock"
+
+    def record_up_to_date(
+        self, source_path: Path, name: str, freshness_check_seconds: float, maturin_args: List[str]
+    ) -> None:
+        """record a history entry for an import that did not require a build. The history is append-only so does not
+        require the lock"""
+        self._store.add_history_entry(
+            BuildHistoryEntry(
+                timestamp=time.time(),
+                source_path=source_path,
+                name=name,
+                reason=UP_TO_DATE_REASON,
+                freshness_check_seconds=freshness_check_seconds,
+                build_seconds=0.0,
+                maturin_args=maturin_args,
+                success=True,
+            )
+        )
+
+    @property
+    def shared_target_dir(self) -> Path:
+        """The cargo target dir shared by the projects generated for `.rs` files so that dependencies are only
+        compiled once"""
+        return self._build_dir / "target"
+
+
+class LockedBuildCache(ReadOnlyBuildCache):
+    def store_build_status(self, build_status: BuildStatus, source_snapshot: Optional[FileSnapshot] = None) -> None:
+        self._store.store_build_status(build_status, source_snapshot)
+
+    @contextmanager
+    def record_build(
+        self,
+        source_path: Path,
+        name: str,
+        reason: Optional[str],
+        freshness_check_seconds: float,
+        maturin_args: List[str],
+    ) -> Generator[None, None, None]:
+        """record a history entry for the build performed inside the context manager (whether it succeeds or not)"""
+        timestamp = time.time()
+        start = time.perf_counter()
+        success = False
+        try:
+            yield
+            success = True
+        finally:
+            entry = BuildHistoryEntry(
+                timestamp=timestamp,
+                source_path=source_path,
+                name=name,
+                reason=reason or "unknown",
+                freshness_check_seconds=freshness_check_seconds,
+                build_seconds=time.perf_counter() - start,
+                maturin_args=maturin_args,
+                success=success,
+            )
+            self._store.add_history_entry(entry)
 
 
 class BuildCache:
-    def __init__(self, build_dir: Optional[Path], lock_timeout_seconds: Optional[float]) -> None:
+    def __init__(
+        self,
+        build_dir: Optional[Path],
+        lock_timeout_seconds: Optional[float],
+        build_status_store: Literal["json", "sqlite"] = "json",
+    ) -> None:
         self._build_dir = build_dir if build_dir is not None else get_default_build_dir()
-        self._lock = filelock.FileLock(
-            self._build_dir / "lock", timeout=-1 if lock_timeout_seconds is None else lock_timeout_seconds
-        )
+        self._lock_timeout = -1 if lock_timeout_seconds is None else lock_timeout_seconds
+        # only used for maintenance of the whole cache. Builds use a separate lock for each project
+        self._lock = filelock.FileLock(self._build_dir / "lock", timeout=self._lock_timeout)
+        self._store: _BuildStatusStore
+        if build_status_store == "json":
+            self._store = _JsonBuildStatusStore(self._build_dir)
+        elif build_status_store == "sqlite":
+            self._store = _SqliteBuildStatusStore(self._build_dir / _SQLITE_DB_NAME)
+        else:
+            msg = f"unknown build status store: {build_status_store}"
+            raise ValueError(msg)
+
+    @property
+    def build_dir(self) -> Path:
+        return self._build_dir
+
+    def read_only(self) -> ReadOnlyBuildCache:
+        """Access the cache without taking the lock, eg to check whether a previous build is still fresh."""
+        return ReadOnlyBuildCache(self._build_dir, self._store)
 
     @contextmanager
-    def lock(self) -> Generator[LockedBuildCache, None, None]:
-        with _acquire_lock(self._lock):
-            yield LockedBuildCache(self._build_dir)
+    def lock(self, source_path: Path) -> Generator[LockedBuildCache, None, None]:
+        """Lock the cache for building the project or rust file at the given path.
+
+        Different projects have separate locks so they can be built concurrently.
+        """
+        lock = filelock.FileLock(self._project_lock_path(source_path), timeout=self._lock_timeout)
+        with _acquire_lock(lock):
+            yield LockedBuildCache(self._build_dir, self._store)
+
+    @contextmanager
+    def lock_shared_target_dir(self) -> Generator[None, None, None]:
+        """Lock the shared cargo target dir for building a `.rs` file.
+
+        cargo serializes builds in a target dir anyway, but the artifacts of crates with the same library name (eg
+        `a/module.rs` and `b/module.rs`) are written to the same location, so they must not be read while another
+        crate is being built. Must be acquired after (and released before) the lock of the project being built.
+        """
+        with _acquire_lock(filelock.FileLock(self._shared_target_lock_path, timeout=self._lock_timeout)):
+            yield
+
+    @contextmanager
+    def lock_all(self) -> Generator[None, None, None]:
+        """Lock the whole cache for maintenance, waiting for any builds that are currently in progress to finish."""
+        with _acquire_lock(self._lock), ExitStack() as stack:
+            locks_dir = self._build_dir / "locks"
+            project_lock_paths = sorted(locks_dir.glob("*.lock")) if locks_dir.is_dir() else []
+            for lock_path in project_lock_paths:
+                stack.enter_context(_acquire_lock(filelock.FileLock(lock_path, timeout=self._lock_timeout)))
+            # acquired last to match the order used when building
+            stack.enter_context(
+                _acquire_lock(filelock.FileLock(self._shared_target_lock_path, timeout=self._lock_timeout))
+            )
+            yield
+
+    def get_all_build_statuses(self) -> List[BuildStatus]:
+        """Get the build statuses from every store in the cache (processes sharing a cache may use different stores)"""
+        statuses = _JsonBuildStatusStore(self._build_dir).get_all_build_statuses()
+        db_path = self._build_dir / _SQLITE_DB_NAME
+        if db_path.exists():
+            statuses.extend(_SqliteBuildStatusStore(db_path).get_all_build_statuses())
+        return statuses
+
+    def get_history(self, since: Optional[float] = None) -> List[BuildHistoryEntry]:
+        """Get the build history from every store in the cache (oldest first)"""
+        entries = _JsonBuildStatusStore(self._build_dir).get_history(since)
+        db_path = self._build_dir / _SQLITE_DB_NAME
+        if db_path.exists():
+            entries.extend(_SqliteBuildStatusStore(db_path).get_history(since))
+        return sorted(entries, key=lambda entry: entry.timestamp)
+
+    def clear(self) -> None:
+        """Remove everything from the cache apart from the lock files, which may be in use by other processes."""
+        with self.lock_all():
+            for path in self._build_dir.iterdir():
+                if path.name in ("lock", "locks") or path.name.startswith(_SQLITE_DB_NAME):
+                    continue
+                if path.is_dir() and not path.is_symlink():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+            db_path = self._build_dir / _SQLITE_DB_NAME
+            if db_path.exists():
+                _SqliteBuildStatusStore(db_path).clear()
+
+    @property
+    def _shared_target_lock_path(self) -> Path:
+        # not matched by the pattern used for project locks in `lock_all()` because it must be acquired separately
+        return self._build_dir / "locks" / "shared_target_dir.lck"
+
+    def _project_lock_path(self, source_path: Path) -> Path:
+        return self._build_dir / "locks" / f"{_source_path_hash(source_path)}.lock"
+
+
+def _source_path_hash(source_path: Path) -> str:
+    return hashlib.sha1(bytes(source_path)).hexdigest()
 
 
 @contextmanager
@@ -198,6 +772,12 @@ def find_maturin(lower_version: Tuple[int, int, int], upper_version: Tuple[int,
         raise MaturinError(msg)
 
 
+def find_cargo() -> Optional[Path]:
+    """find the cargo binary, preferring the one that invoked this process (if any)"""
+    cargo_path = os.environ.get("CARGO") or shutil.which("cargo")
+    return Path(cargo_path) if cargo_path is not None else None
+
+
 def get_maturin_version(maturin_path: Path) -> Tuple[int, int, int]:
     success, output = run_maturin(maturin_path, ["--version"])
     if not success:
@@ -232,18 +812,128 @@ def run_maturin(maturin_path: Path, args: List[str]) -> Tuple[bool, str]:
 
 
 def build_unpacked_wheel(maturin_path: Path, manifest_path: Path, output_dir: Path, settings: MaturinSettings) -> str:
+    """Build a wheel and extract it into `output_dir`, which is updated in place.
+
+    Extracted files are renamed into place instead of being overwritten, so processes that have the previous version
+    of an extension module loaded are not affected. Files that are not part of the new wheel are removed.
+    """
     if output_dir.exists():
-        shutil.rmtree(output_dir)
+        for old_wheel_path in output_dir.glob("*.whl"):
+            old_wheel_path.unlink()
     output = build_wheel(maturin_path, manifest_path, output_dir, settings)
     wheel_path = _find_single_file(output_dir, ".whl")
     if wheel_path is None:
         msg = "failed to generate wheel"
         raise MaturinError(msg)
+    extracted_paths = {wheel_path}
     with zipfile.ZipFile(wheel_path, "r") as f:
-        f.extractall(output_dir)
+        for member in f.infolist():
+            member_path = output_dir / member.filename
+            if not member_path.resolve().is_relative_to(output_dir.resolve()):
+                msg = f'wheel contains a path outside of the output directory: "{member.filename}"'
+                raise MaturinError(msg)
+            if member.is_dir():
+                member_path.mkdir(parents=True, exist_ok=True)
+            else:
+                write_file_atomically(member_path, f.read(member))
+                extracted_paths.add(member_path)
+    for path in list(output_dir.rglob("*")):
+        if path.is_file() and path not in extracted_paths:
+            path.unlink()
     return output
 
 
+def build_extension_module(
+    manifest_path: Path, output_dir: Path, module_name: str, settings: MaturinSettings
+) -> Optional[str]:
+    """Build the library of a pyo3 crate with cargo and place it in `output_dir` with the same layout as an unpacked
+    wheel (`<output_dir>/<module_name>/<module_name><extension suffix>`) without packaging and unpacking a wheel.
+
+    The extension module is renamed into place so that processes that have the previous version loaded are not
+    affected. Any other files in `output_dir` (eg from a previous wheel build) are removed.
+
+    Returns:
+        the cargo output, or None if the module cannot be built this way (eg because settings that only maturin
+        supports are used) and `build_unpacked_wheel()` should be used instead
+    """
+    if settings.zig or settings.strip or settings.auditwheel is not None:
+        return None
+    if settings.target is not None:
+        # the extension suffix and the location of the artifact would have to be determined for the target platform
+        return None
+    os_name = platform.system()
+    if os_name not in ("Linux", "Darwin", "Windows"):
+        return None
+    cargo_path = find_cargo()
+    if cargo_path is None:
+        return None
+
+    # the remaining settings map directly onto cargo flags
+    args = settings.to_args("build")
+    if os_name == "Darwin":
+        # symbols from libpython are resolved when the module is loaded (maturin adds these flags as well)
+        if "--" not in args:
+            args.append("--")
+        args.extend(["-C", "link-arg=-undefined", "-C", "link-arg=dynamic_lookup"])
+    command = [
+        str(cargo_path),
+        "rustc",
+        "--lib",
+        "--manifest-path",
+        str(manifest_path),
+        "--message-format",
+        "json-render-diagnostics",
+        *args,
+    ]
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("running command: %s", subprocess.list2cmdline(command))
+    # pyo3 reads the configuration of the interpreter to build for from PYO3_PYTHON
+    env = {**os.environ, "PYO3_PYTHON": sys.executable}
+    result = subprocess.run(command, capture_output=True, env=env, check=False)
+    output = result.stderr.decode()
+    if result.returncode != 0:
+        logger.error(f'command "{subprocess.list2cmdline(command)}" returned non-zero exit status: {result.returncode}')
+        logger.error("cargo output:\n%s", output)
+        msg = "Failed to build extension module with cargo"
+        raise MaturinError(msg)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("cargo output (has warnings: %r):\n%s", maturin_output_has_warnings(output), output.rstrip("\n"))
+
+    artifact_path = find_cdylib_artifact(result.stdout.decode(), manifest_path)
+    if artifact_path is None:
+        logger.info("could not find the library built by cargo for %s", manifest_path)
+        return None
+    extension_path = output_dir / module_name / f"{module_name}{importlib.machinery.EXTENSION_SUFFIXES[0]}"
+    # the same permissions that cargo (and unpacking a wheel) gives the library
+    write_file_atomically(extension_path, artifact_path.read_bytes(), mode=0o755)
+    for path in list(output_dir.rglob("*")):
+        if path.is_file() and path != extension_path:
+            path.unlink()
+    return output
+
+
+def find_cdylib_artifact(cargo_messages: str, manifest_path: Path) -> Optional[Path]:
+    """find the dynamic library built from the given crate in the output of `cargo --message-format json`"""
+    manifest_path = manifest_path.resolve()
+    for line in cargo_messages.splitlines():
+        if not line.startswith("{"):
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if (
+            message.get("reason") != "compiler-artifact"
+            or "cdylib" not in message["target"]["kind"]
+            or Path(message["manifest_path"]).resolve() != manifest_path
+        ):
+            continue
+        for filename in message["filenames"]:
+            if Path(filename).suffix in (".so", ".dylib", ".dll"):
+                return Path(filename)
+    return None
+
+
 def _find_single_file(dir_path: Path, extension: Optional[str]) -> Optional[Path]:
     if dir_path.exists():
         candidate_files = [p for p in dir_path.iterdir() if extension is None or p.suffix == extension]
@@ -262,12 +952,16 @@ class Freshness:
     reason: str
     oldest_installed_path: Optional[Path]
     newest_source_path: Optional[Path]
+    # the source files that were added, removed or modified since the last build (if known)
+    changed_source_paths: List[Path] = field(default_factory=list)
 
 
 def get_installation_freshness(
     source_paths: Iterable[Path],
     installed_paths: Iterable[Path],
     build_status: BuildStatus,
+    *,
+    stop_early: bool = False,
 ) -> Freshness:
     """
     determine whether an installed package or extension module is 'fresh', meaning that it is newer than any of the
@@ -277,9 +971,115 @@ def get_installation_freshness(
         source_paths: an iterable of *file* paths that should trigger a rebuild if any are newer than any installed path
         installed_paths: an iterable of *file* paths that should trigger a rebuild if any are older than any source path
         build_status: the metadata of the last build, to compare with the installed paths
+        stop_early: stop iterating over `source_paths` as soon as a source file that is not older than the installation
+            is found. In this case `newest_source_path` of the result is the first such file rather than the newest
     """
     debug_enabled = logger.isEnabledFor(logging.DEBUG)
 
+    installation = _get_installation_mtime(installed_paths, build_status)
+    if isinstance(installation, Freshness):
+        return installation
+    oldest_installed_path, installation_mtime = installation
+
+    newest_source_path = None
+    source_mtime = 0.0
+    try:
+        for path in source_paths:
+            mtime = path.stat().st_mtime
+            if newest_source_path is None or mtime > source_mtime:
+                newest_source_path, source_mtime = path, mtime
+                if stop_early and source_mtime >= installation_mtime:
+                    break
+    except OSError as e:
+        # fatal because a build is unlikely to succeed anyway,
+        # but this could also be turned into a non-fatal log message
+        msg = f"error reading source file mtimes: {e!r} ({e.filename})"
+        raise ImportHookError(msg) from None
+    if newest_source_path is None:
+        msg = "no source files found"
+        raise ImportHookError(msg)
+
+    if debug_enabled:
+        logger.debug("newest source file: %s (at %f)", newest_source_path, source_mtime)
+
+    return _compare_mtimes(oldest_installed_path, installation_mtime, newest_source_path, source_mtime)
+
+
+def get_snapshot_freshness(
+    build_snapshot: FileSnapshot,
+    current_snapshot: FileSnapshot,
+    installed_paths: Iterable[Path],
+    build_status: BuildStatus,
+) -> Freshness:
+    """
+    determine whether an installed package or extension module is 'fresh' by comparing the current state of the source
+    files with a snapshot taken when it was built. Unlike `get_installation_freshness`, this detects every added,
+    removed or modified file (even if the mtime of a file moves backwards) and reports which files changed.
+
+    Args:
+        build_snapshot: the snapshot of the source files stored with the build status
+        current_snapshot: a snapshot of the source files taken now
+        installed_paths: an iterable of *file* paths that should trigger a rebuild if any are older than any source path
+        build_status: the metadata of the last build, to compare with the installed paths
+    """
+    installation = _get_installation_mtime(installed_paths, build_status)
+    if isinstance(installation, Freshness):
+        return installation
+    oldest_installed_path, installation_mtime = installation
+
+    newest_source = current_snapshot.newest_file()
+    if newest_source is None:
+        msg = "no source files found"
+        raise ImportHookError(msg)
+    newest_source_path, source_mtime_ns = newest_source
+
+    changed_paths = build_snapshot.changed_paths(current_snapshot)
+    if changed_paths:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("changed source files: %s", ", ".join(str(p) for p in changed_paths))
+        return Freshness(
+            False,
+            f"{len(changed_paths)} source file(s) changed since the last build",
+            oldest_installed_path,
+            newest_source_path,
+            changed_paths,
+        )
+
+    if build_snapshot.content_hashes is not None:
+        # files modified during the build are recorded as racy and always considered changed, so the mtimes do
+        # not need to be compared. Comparing them would trigger a rebuild after a file is touched
+        return Freshness(True, "", oldest_installed_path, newest_source_path)
+
+    # the snapshot is taken after the build, so a file modified during the build with a mtime older than the
+    # installation would be recorded as unchanged. This check is the same as the one used without a snapshot
+    return _compare_mtimes(oldest_installed_path, installation_mtime, newest_source_path, source_mtime_ns / 1e9)
+
+
+def get_recent_source_changes(build_snapshot: FileSnapshot) -> Optional[Freshness]:
+    """
+    a cheap check for whether any of the most recently modified source files in the snapshot from the last build
+    have changed. These are the files that are most likely to be edited again, so after an edit a rebuild can usually
+    be decided on without searching for every source file.
+
+    Returns:
+        the (stale) freshness if a change was found, otherwise None, in which case a full check is still required
+    """
+    changed_path = build_snapshot.find_changed_file(_NUM_RECENT_SOURCE_FILES)
+    if changed_path is None:
+        return None
+    return Freshness(
+        False, f"source file changed since the last build: {changed_path}", None, changed_path, [changed_path]
+    )
+
+
+def _get_installation_mtime(
+    installed_paths: Iterable[Path], build_status: BuildStatus
+) -> Union[Freshness, Tuple[Path, float]]:
+    """Find the oldest installed file and check that it matches the build status.
+
+    Returns:
+        either a `Freshness` if the installation is not fresh, or the oldest installed path and its mtime
+    """
     try:
         oldest_installed_path, installation_mtime = min(
             ((path, path.stat().st_mtime) for path in installed_paths), key=itemgetter(1)
@@ -292,28 +1092,18 @@ def get_installation_freshness(
         logger.error("error reading installed file mtimes: %r (%s)", e, e.filename)
         return Freshness(False, "failed to read installed files", None, None)
 
-    if debug_enabled:
+    if logger.isEnabledFor(logging.DEBUG):
         logger.debug("oldest installed file: %s (at %f)", oldest_installed_path, installation_mtime)
 
     if abs(build_status.build_mtime - installation_mtime) > 5e-3:
         return Freshness(False, "installation mtime does not match build status mtime", oldest_installed_path, None)
 
-    try:
-        newest_source_path, source_mtime = max(
-            ((path, path.stat().st_mtime) for path in source_paths), key=itemgetter(1)
-        )
-    except ValueError:
-        msg = "no source files found"
-        raise ImportHookError(msg) from None
-    except OSError as e:
-        # fatal because a build is unlikely to succeed anyway,
-        # but this could also be turned into a non-fatal log message
-        msg = f"error reading source file mtimes: {e!r} ({e.filename})"
-        raise ImportHookError(msg) from None
+    return oldest_installed_path, installation_mtime
 
-    if debug_enabled:
-        logger.debug("newest source file: %s (at %f)", newest_source_path, source_mtime)
 
+def _compare_mtimes(
+    oldest_installed_path: Path, installation_mtime: float, newest_source_path: Path, source_mtime: float
+) -> Freshness:
     if installation_mtime == source_mtime:
         # writes made in quick succession often result in exactly identical mtimes because the resolution of the mtime
         # timer is not always very high (eg 3ms on a sample Linux machine in tmpfs and ext4). Some filesystems only have
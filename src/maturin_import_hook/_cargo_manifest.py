@@ -0,0 +1,149 @@
+import copy
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from maturin_import_hook.error import ImportHookError
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    import tomli as tomllib
+
+# cargo-script style frontmatter at the start of the file (after an optional shebang)
+_FRONTMATTER_PATTERN = re.compile(
+    r"\A(?P<prefix>#![^\[\n][^\n]*\n)?(?P<frontmatter>(?:[ \t]*\n)*(?P<fence>-{3,})[ \t]*(?:cargo)?[ \t]*\n"
+    r"(?P<manifest>.*?)^(?P=fence)[ \t]*(?:\n|\Z))",
+    re.DOTALL | re.MULTILINE,
+)
+# a code block with the `cargo` info string in the inner doc comment of the file
+_DOC_BLOCK_PATTERN = re.compile(
+    r"^[ \t]*//![ \t]?```cargo[ \t]*\n(?P<manifest>(?:[ \t]*//!(?![ \t]?```)[^\n]*\n)*)[ \t]*//![ \t]?```",
+    re.MULTILINE,
+)
+_DOC_PREFIX_PATTERN = re.compile(r"^[ \t]*//! ?", re.MULTILINE)
+
+# the parts of the manifest that determine which dependencies are resolved
+_DEPENDENCY_KEYS = ("dependencies", "build-dependencies", "target", "patch", "replace")
+
+
+def find_embedded_manifest(source: str) -> Optional[str]:
+    """Find a cargo manifest embedded in a `.rs` file, either as frontmatter or as a doc comment code block:
+
+        ---cargo
+        [dependencies]
+        rayon = "1"
+        ---
+
+        //! ```cargo
+        //! [dependencies]
+        //! rayon = "1"
+        //! ```
+
+    Returns:
+        the contents of the manifest (TOML) or None if the file does not contain one
+    """
+    match = _FRONTMATTER_PATTERN.match(source)
+    if match is not None:
+        return match.group("manifest")
+    match = _DOC_BLOCK_PATTERN.search(source)
+    if match is not None:
+        return _DOC_PREFIX_PATTERN.sub("", match.group("manifest"))
+    return None
+
+
+def get_embedded_manifest_hash(source: str) -> Optional[str]:
+    manifest = find_embedded_manifest(source)
+    return hashlib.sha1(manifest.encode()).hexdigest() if manifest is not None else None
+
+
+def remove_frontmatter(source: str) -> str:
+    """Replace the frontmatter (which rustc does not accept) with blank lines so that line numbers are unchanged"""
+    match = _FRONTMATTER_PATTERN.match(source)
+    if match is None:
+        return source
+    return "{}{}{}".format(
+        match.group("prefix") or "", "\n" * match.group("frontmatter").count("\n"), source[match.end() :]
+    )
+
+
+def parse_embedded_manifest(source: str) -> Dict[str, Any]:
+    """Parse the manifest embedded in a `.rs` file (empty if there is none)"""
+    manifest = find_embedded_manifest(source)
+    if manifest is None:
+        return {}
+    try:
+        data: Dict[str, Any] = tomllib.loads(manifest)
+    except tomllib.TOMLDecodeError as e:
+        msg = f"failed to parse the embedded cargo manifest: {e}"
+        raise ImportHookError(msg) from None
+    return data
+
+
+def load_manifest(path: Path) -> Dict[str, Any]:
+    try:
+        with path.open("rb") as f:
+            data: Dict[str, Any] = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        msg = f'failed to parse "{path}": {e}'
+        raise ImportHookError(msg) from None
+    return data
+
+
+def merge_manifests(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """merge tables recursively, preferring the values from `overrides`"""
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_manifests(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def get_dependencies_hash(manifest: Dict[str, Any]) -> str:
+    """A hash of the dependencies of a manifest. Crates with the same hash resolve the same dependency versions"""
+    dependencies = {key: manifest[key] for key in _DEPENDENCY_KEYS if key in manifest}
+    return hashlib.sha1(json.dumps(dependencies, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def to_toml(manifest: Dict[str, Any]) -> str:
+    """Write a manifest as TOML.
+
+    Top level tables are written as sections and nested tables as inline tables.
+    """
+    lines: List[str] = []
+    tables: List[Tuple[str, Dict[str, Any]]] = []
+    for key, value in manifest.items():
+        if isinstance(value, dict):
+            tables.append((key, value))
+        else:
+            lines.append(f"{_toml_key(key)} = {_toml_value(value)}")
+    for key, table in tables:
+        if lines:
+            lines.append("")
+        lines.append(f"[{_toml_key(key)}]")
+        lines.extend(f"{_toml_key(k)} = {_toml_value(v)}" for k, v in table.items())
+    return "\n".join(lines) + "\n"
+
+
+def _toml_key(key: str) -> str:
+    return key if re.fullmatch(r"[A-Za-z0-9_-]+", key) else json.dumps(key)
+
+
+def _toml_value(value: object) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        # JSON string escapes are a subset of the escapes allowed in TOML basic strings
+        return json.dumps(value)
+    if isinstance(value, list):
+        return "[{}]".format(", ".join(_toml_value(v) for v in value))
+    if isinstance(value, dict):
+        return "{{ {} }}".format(", ".join(f"{_toml_key(k)} = {_toml_value(v)}" for k, v in value.items()))
+    msg = f"unsupported value in cargo manifest: {value!r}"
+    raise ImportHookError(msg)
@@ -1,11 +1,18 @@
 import atexit
+import os
 import shutil
+import sys
 import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import FrozenSet, Optional, Union
 
 from maturin_import_hook._logging import logger
 
+if sys.version_info >= (3, 10):
+    _STDLIB_MODULE_NAMES: FrozenSet[str] = frozenset(sys.stdlib_module_names) | frozenset(sys.builtin_module_names)
+else:
+    _STDLIB_MODULE_NAMES = frozenset(sys.builtin_module_names)
+
 
 class LazySessionTemporaryDirectory:
     """A temporary directory that is created on first use and usually removed when the program exits (not guaranteed)"""
@@ -33,3 +40,53 @@ class LazySessionTemporaryDirectory:
             self._tmp_path = Path(tempfile.mkdtemp(prefix=f"{self._prefix}_"))
             atexit.register(self._cleanup)
         return self._tmp_path
+
+
+def write_file_atomically(path: Path, contents: Union[str, bytes], mode: Optional[int] = None) -> None:
+    """Write to a temporary file then rename it into place.
+
+    Concurrent readers see either the old or the new contents in full (never a partially written file).
+
+    Args:
+        mode: the permissions to give the file. Otherwise the file is only accessible by the current user
+            (like all temporary files created with `mkstemp`)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path_str = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    tmp_path = Path(tmp_path_str)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(contents.encode() if isinstance(contents, str) else contents)
+        if mode is not None:
+            tmp_path.chmod(mode)
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_file_if_changed(path: Path, contents: Union[str, bytes]) -> bool:
+    """Atomically write the file unless it already has the given contents.
+
+    Leaving unchanged files untouched preserves their mtime so that tools such as cargo do not consider them modified.
+
+    Returns:
+        whether the file was written
+    """
+    data = contents.encode() if isinstance(contents, str) else contents
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    write_file_atomically(path, data)
+    return True
+
+
+def is_stdlib_module(fullname: str) -> bool:
+    """Whether the given module belongs to the standard library (including builtin and frozen modules).
+
+    The import hooks are inserted at the start of `sys.meta_path` so they see every import. Filtering out these modules
+    avoids searching the filesystem for modules that could never be provided by a maturin project or .rs file.
+    """
+    return fullname.partition(".")[0] in _STDLIB_MODULE_NAMES
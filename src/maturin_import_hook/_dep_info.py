@@ -0,0 +1,123 @@
+import json
+import re
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from maturin_import_hook._building import find_cargo
+from maturin_import_hook._logging import logger
+from maturin_import_hook.settings import MaturinSettings
+
+# cargo profile name => the name of the directory in the target dir that the artifacts are written to
+_PROFILE_DIR_NAMES = {"dev": "debug", "test": "debug", "bench": "release"}
+
+
+def get_dep_info_source_paths(manifest_path: Path, settings: MaturinSettings) -> Optional[List[Path]]:
+    """Get the files that the last build of the library in the given crate was derived from.
+
+    cargo writes a dep-info (`.d`) file next to each artifact listing every source file that went into it (including
+    local path dependencies, files included with `include_str!` etc. and files declared by build scripts with
+    `cargo:rerun-if-changed`). The manifests and lock file of the workspace are added because cargo does not list them.
+
+    Returns:
+        the source paths, or None if the dep-info file could not be found or read
+    """
+    metadata = _get_cargo_metadata(manifest_path, settings)
+    if metadata is None:
+        return None
+    dep_info_path = get_dep_info_path(metadata, manifest_path, settings)
+    if dep_info_path is None:
+        logger.debug("could not find the dep-info file for %s", manifest_path)
+        return None
+    try:
+        source_paths = parse_dep_info(dep_info_path.read_text())
+    except OSError as e:
+        logger.debug("failed to read dep-info file %s: %r", dep_info_path, e)
+        return None
+    if source_paths is None:
+        logger.debug("failed to parse dep-info file %s", dep_info_path)
+        return None
+    workspace_root = Path(metadata["workspace_root"])
+    extra_paths = [workspace_root / "Cargo.toml", workspace_root / "Cargo.lock", manifest_path]
+    extra_paths.extend(Path(package["manifest_path"]) for package in metadata["packages"])
+    return list(dict.fromkeys([*source_paths, *extra_paths]))
+
+
+def get_dep_info_path(metadata: Dict[str, Any], manifest_path: Path, settings: MaturinSettings) -> Optional[Path]:
+    """find the dep-info file of the library built from the given crate using the output of `cargo metadata`"""
+    manifest_path = manifest_path.resolve()
+    package = next(
+        (p for p in metadata["packages"] if Path(p["manifest_path"]).resolve() == manifest_path),
+        None,
+    )
+    if package is None:
+        return None
+    lib_name = next(
+        (t["name"] for t in package["targets"] if "cdylib" in t["crate_types"]),
+        None,
+    )
+    if lib_name is None:
+        return None
+    lib_name = lib_name.replace("-", "_")
+
+    target_dir = Path(settings.target_dir) if settings.target_dir is not None else Path(metadata["target_directory"])
+    if settings.target is not None:
+        target_dir /= settings.target
+    profile = settings.profile if settings.profile is not None else ("release" if settings.release else "dev")
+    profile_dir = target_dir / _PROFILE_DIR_NAMES.get(profile, profile)
+
+    # the name of the dep-info file matches the name of the library, which has a `lib` prefix on most platforms
+    candidates = [profile_dir / f"lib{lib_name}.d", profile_dir / f"{lib_name}.d"]
+    existing = [candidate for candidate in candidates if candidate.is_file()]
+    return max(existing, key=lambda p: p.stat().st_mtime_ns) if existing else None
+
+
+def parse_dep_info(contents: str) -> Optional[List[Path]]:
+    """Parse the dependencies of the first rule of a makefile style dep-info file.
+
+    Returns:
+        the dependencies, or None if there is no rule or the paths are relative (eg when `build.dep-info-basedir` is
+        set) since the directory they are relative to is not known
+    """
+    # lines ending with a backslash are continued on the next line
+    lines = re.sub(r"\\\r?\n", " ", contents).splitlines()
+    for line in lines:
+        if not line.strip() or line.startswith("#"):
+            continue
+        # the separator is the first colon that is followed by whitespace or the end of the line, which allows for
+        # colons in windows paths (eg `C:\path\lib.dll: C:\path\lib.rs`)
+        match = re.search(r"(?<!\\):(?:\s|$)", line)
+        if match is None:
+            return None
+        dependencies = line[match.end() :].strip()
+        paths = [Path(_unescape(p)) for p in re.split(r"(?<!\\)\s+", dependencies) if p]
+        if not all(path.is_absolute() for path in paths):
+            return None
+        return paths
+    return None
+
+
+def _unescape(path: str) -> str:
+    return re.sub(r"\\([ #])", r"\1", path)
+
+
+def _get_cargo_metadata(manifest_path: Path, settings: MaturinSettings) -> Optional[Dict[str, Any]]:
+    cargo_path = find_cargo()
+    if cargo_path is None:
+        logger.debug("cargo not found")
+        return None
+    command = [str(cargo_path), "metadata", "--no-deps", "--format-version", "1", "--manifest-path", str(manifest_path)]
+    # avoid accessing the network when building offline (eg with a vendored or local registry)
+    command.extend(
+        flag for flag, enabled in (("--offline", settings.offline), ("--frozen", settings.frozen)) if enabled
+    )
+    result = subprocess.run(command, capture_output=True, check=False)
+    if result.returncode != 0:
+        logger.debug("cargo metadata failed: %s", result.stderr.decode(errors="replace"))
+        return None
+    try:
+        metadata: Dict[str, Any] = json.loads(result.stdout)
+    except ValueError as e:
+        logger.debug("failed to parse cargo metadata: %r", e)
+        return None
+    return metadata
@@ -0,0 +1,541 @@
+import contextlib
+import hashlib
+import heapq
+import os
+import struct
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from maturin_import_hook._gitignore import GitignoreRules
+from maturin_import_hook._logging import logger
+
+_MAGIC = b"MIHS"
+_VERSION = 1
+# magic, version, flags, number of files, number of directories, creation time
+_HEADER = struct.Struct("<4sHHIIq")
+_FLAG_HAS_CONTENT_HASHES = 1
+
+_HASH_SIZE = 16
+# recorded in place of the content hash for files that were modified while the snapshot was being taken. These files
+# are always considered changed because the recorded state may not match what was built
+_RACY_HASH = bytes(_HASH_SIZE)
+
+# the listing of a directory with this flag was not used because the directory contains an exclusion marker
+_DIR_FLAG_EXCLUDED = 1
+# entries can be added to a directory without changing its mtime if the mtime resolution of the filesystem is coarse
+# (up to 2 seconds on FAT). Listings of directories modified this close to when the snapshot was taken are not reused
+_RACY_MTIME_NS = 2_000_000_000
+
+
+class FileSnapshot:
+    """The state of a set of files at a point in time, used to determine exactly which files have changed.
+
+    Along with the files, the directories that were listed to find the files can be recorded. If the mtime of a
+    directory has not changed then no entries have been added, removed or renamed in that directory, so the
+    previous listing can be reused instead of listing the directory again.
+
+    The data is array-backed so that large source trees can be stored and loaded cheaply.
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        mtimes_ns: "array[int]",
+        sizes: "array[int]",
+        inodes: "array[int]",
+        dir_paths: List[str],
+        dir_mtimes_ns: "array[int]",
+        dir_flags: "array[int]",
+        created_ns: int,
+        scan_key: str,
+    ) -> None:
+        self.paths = paths
+        self.mtimes_ns = mtimes_ns
+        self.sizes = sizes
+        self.inodes = inodes
+        self.dir_paths = dir_paths
+        self.dir_mtimes_ns = dir_mtimes_ns
+        self.dir_flags = dir_flags
+        self.created_ns = created_ns
+        # identifies the arguments used to scan for files. Listings are only reused if the arguments match
+        self.scan_key = scan_key
+        # the blake2b hashes of the file contents (concatenated) if content hashing is enabled
+        self.content_hashes: Optional[bytes] = None
+        # directory => (mtime, flags, paths of files in the directory, names of subdirectories)
+        self._dir_listings: Optional[Dict[str, Tuple[int, int, List[str], List[str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FileSnapshot):
+            return NotImplemented
+        return (
+            self.paths == other.paths
+            and self.mtimes_ns == other.mtimes_ns
+            and self.sizes == other.sizes
+            and self.inodes == other.inodes
+            and self.dir_paths == other.dir_paths
+            and self.dir_mtimes_ns == other.dir_mtimes_ns
+            and self.dir_flags == other.dir_flags
+            and self.created_ns == other.created_ns
+            and self.scan_key == other.scan_key
+            and self.content_hashes == other.content_hashes
+        )
+
+    @staticmethod
+    def from_paths(paths: Iterable[Path]) -> "FileSnapshot":
+        """Take a snapshot of the given files. Files that do not exist are not included."""
+        builder = _FileSnapshotBuilder()
+        for path in paths:
+            path_str = str(path)
+            try:
+                stat = os.stat(path_str)  # noqa: PTH116
+            except FileNotFoundError:
+                continue
+            builder.add_file(path_str, stat)
+        return builder.finish("")
+
+    @staticmethod
+    def scan(
+        root_paths: Iterable[Path],
+        excluded_paths: Set[Path],
+        excluded_dir_names: Set[str],
+        excluded_dir_markers: Set[str],
+        excluded_file_extensions: Set[str],
+        previous: Optional["FileSnapshot"] = None,
+        num_threads: int = 1,
+        ignore_rules: Optional[GitignoreRules] = None,
+    ) -> "FileSnapshot":
+        """Take a snapshot of the files in the given directories (recursively).
+
+        Args:
+            root_paths: the directories to search
+            excluded_paths: files and directories to skip
+            excluded_dir_names: do not recurse into directories with these names (case sensitive)
+            excluded_dir_markers: do not recurse into directories that contain an entry with this name (case sensitive)
+            excluded_file_extensions: skip files with these extensions (case insensitive, including the leading `.`)
+            previous: a previous snapshot taken with the same arguments. The listings of directories which have not
+                changed since the previous snapshot are reused
+            num_threads: the number of threads to scan directories with. Scanning in parallel is faster on slow
+                (eg network) filesystems where most of the time is spent waiting for `stat` calls
+            ignore_rules: if given, skip files and directories that are ignored by these rules (eg `.gitignore` files)
+        """
+        root_paths = list(root_paths)
+        scan_key = repr((
+            [str(p) for p in root_paths],
+            sorted(str(p) for p in excluded_paths),
+            sorted(excluded_dir_names),
+            sorted(excluded_dir_markers),
+            sorted(excluded_file_extensions),
+            None if ignore_rules is None else ignore_rules.get_key(str(p) for p in root_paths),
+        ))
+        if previous is not None and previous.scan_key != scan_key:
+            previous = None
+        builder = _FileSnapshotBuilder()
+        excluded_path_strs = {str(p) for p in excluded_paths}
+        scanner = _DirScanner(
+            excluded_path_strs,
+            excluded_dir_names,
+            excluded_dir_markers,
+            excluded_file_extensions,
+            previous,
+            ignore_rules,
+        )
+        with contextlib.ExitStack() as stack:
+            executor = stack.enter_context(ThreadPoolExecutor(num_threads)) if num_threads > 1 else None
+            for root_path in root_paths:
+                if root_path.name in excluded_dir_names or str(root_path) in excluded_path_strs:
+                    continue
+                if not root_path.exists():
+                    raise FileNotFoundError(root_path)
+                if executor is None:
+                    scanner.scan_serial(builder, str(root_path))
+                else:
+                    scanner.scan_parallel(builder, str(root_path), executor)
+        return builder.finish(scan_key)
+
+    def newest_file(self) -> Optional[Tuple[Path, int]]:
+        """The most recently modified file and its mtime (in nanoseconds)"""
+        if not self.paths:
+            return None
+        index = max(range(len(self.mtimes_ns)), key=self.mtimes_ns.__getitem__)
+        return Path(self.paths[index]), self.mtimes_ns[index]
+
+    def compute_content_hashes(self, modified_after_ns: int) -> None:
+        """Record the hashes of the file contents so that files which are modified without changing their content
+        (eg by `touch` or switching git branches and back) are not considered changed.
+
+        Args:
+            modified_after_ns: files modified at or after this time (eg since a build started) are marked as racy
+                and will always be considered changed. Whole second mtimes (from file systems with coarse mtime
+                resolution) are given a margin since the file may have been modified later in the same interval
+        """
+        hashes = []
+        for path, mtime_ns in zip(self.paths, self.mtimes_ns):
+            if _is_racy(mtime_ns, modified_after_ns):
+                hashes.append(_RACY_HASH)
+                continue
+            try:
+                hashes.append(_hash_file(path))
+            except FileNotFoundError:
+                hashes.append(_RACY_HASH)
+        self.content_hashes = b"".join(hashes)
+
+    def changed_paths(self, current: "FileSnapshot") -> List[Path]:
+        """Compare with a more recent snapshot and return the files that have been added, removed or modified.
+
+        If this snapshot has content hashes, files where only the mtime or inode differ are hashed and only
+        considered changed if the content differs.
+        """
+        racy_indices = self._racy_indices()
+        if (
+            not racy_indices
+            and self.paths == current.paths
+            and self.mtimes_ns == current.mtimes_ns
+            and self.sizes == current.sizes
+            and self.inodes == current.inodes
+        ):
+            return []
+        previous_indices = {path: i for i, path in enumerate(self.paths)}
+        changed = []
+        for current_index, path in enumerate(current.paths):
+            previous_index = previous_indices.pop(path, None)
+            if (
+                previous_index is None
+                or previous_index in racy_indices
+                or (
+                    (
+                        self.mtimes_ns[previous_index] != current.mtimes_ns[current_index]
+                        or self.sizes[previous_index] != current.sizes[current_index]
+                        or self.inodes[previous_index] != current.inodes[current_index]
+                    )
+                    and not self._has_same_content(previous_index, path, current.sizes[current_index])
+                )
+            ):
+                changed.append(path)
+        changed.extend(previous_indices)
+        return sorted(Path(p) for p in changed)
+
+    def find_changed_file(self, max_files: int) -> Optional[Path]:
+        """Check whether any of the most recently modified files have been modified or removed since the snapshot was
+        taken. Files that were added are not detected.
+
+        Args:
+            max_files: the maximum number of files to check
+        """
+        racy_indices = self._racy_indices()
+        if racy_indices:
+            return Path(self.paths[min(racy_indices)])
+        for index in heapq.nlargest(max_files, range(len(self.paths)), key=self.mtimes_ns.__getitem__):
+            path = self.paths[index]
+            try:
+                stat = os.stat(path)  # noqa: PTH116
+            except FileNotFoundError:
+                return Path(path)
+            if (
+                self.mtimes_ns[index] != stat.st_mtime_ns
+                or self.sizes[index] != stat.st_size
+                or self.inodes[index] != stat.st_ino
+            ) and not self._has_same_content(index, path, stat.st_size):
+                return Path(path)
+        return None
+
+    def _racy_indices(self) -> Set[int]:
+        if self.content_hashes is None:
+            return set()
+        return {
+            i
+            for i in range(len(self.paths))
+            if self.content_hashes[i * _HASH_SIZE : (i + 1) * _HASH_SIZE] == _RACY_HASH
+        }
+
+    def _has_same_content(self, index: int, current_path: str, current_size: int) -> bool:
+        if self.content_hashes is None or self.sizes[index] != current_size:
+            return False
+        try:
+            current_hash = _hash_file(current_path)
+        except FileNotFoundError:
+            return False
+        return self.content_hashes[index * _HASH_SIZE : (index + 1) * _HASH_SIZE] == current_hash
+
+    def to_bytes(self) -> bytes:
+        all_paths = "\0".join([self.scan_key, *self.paths, *self.dir_paths])
+        flags = 0 if self.content_hashes is None else _FLAG_HAS_CONTENT_HASHES
+        return b"".join((
+            _HEADER.pack(_MAGIC, _VERSION, flags, len(self.paths), len(self.dir_paths), self.created_ns),
+            self.mtimes_ns.tobytes(),
+            self.sizes.tobytes(),
+            self.inodes.tobytes(),
+            self.dir_mtimes_ns.tobytes(),
+            self.dir_flags.tobytes(),
+            b"" if self.content_hashes is None else self.content_hashes,
+            os.fsencode(all_paths),
+        ))
+
+    @staticmethod
+    def from_bytes(data: bytes) -> Optional["FileSnapshot"]:
+        try:
+            magic, version, flags, num_files, num_dirs, created_ns = _HEADER.unpack_from(data)
+            if magic != _MAGIC or version != _VERSION:
+                logger.debug("unsupported file snapshot format")
+                return None
+            offset = _HEADER.size
+            mtimes_ns, offset = _read_array("q", data, offset, num_files)
+            sizes, offset = _read_array("q", data, offset, num_files)
+            inodes, offset = _read_array("Q", data, offset, num_files)
+            dir_mtimes_ns, offset = _read_array("q", data, offset, num_dirs)
+            dir_flags, offset = _read_array("B", data, offset, num_dirs)
+            content_hashes = None
+            if flags & _FLAG_HAS_CONTENT_HASHES:
+                content_hashes = data[offset : offset + num_files * _HASH_SIZE]
+                offset += num_files * _HASH_SIZE
+            scan_key, *all_paths = os.fsdecode(data[offset:]).split("\0")
+        except (struct.error, ValueError) as e:
+            logger.debug("failed to load file snapshot: %r", e)
+            return None
+        if len(all_paths) != num_files + num_dirs:
+            logger.debug("failed to load file snapshot: unexpected number of paths")
+            return None
+        snapshot = FileSnapshot(
+            all_paths[:num_files],
+            mtimes_ns,
+            sizes,
+            inodes,
+            all_paths[num_files:],
+            dir_mtimes_ns,
+            dir_flags,
+            created_ns,
+            scan_key,
+        )
+        snapshot.content_hashes = content_hashes
+        return snapshot
+
+    def get_unchanged_dir_listing(self, dir_path: str, mtime_ns: int) -> Optional[Tuple[int, List[str], List[str]]]:
+        """Obtain the listing of the given directory if it has not changed since the snapshot was taken.
+
+        Returns:
+            the flags of the directory, the paths of the files in the directory and the names of the subdirectories
+        """
+        if self._dir_listings is None:
+            self._dir_listings = {}
+            for i, path in enumerate(self.dir_paths):
+                self._dir_listings[path] = (self.dir_mtimes_ns[i], self.dir_flags[i], [], [])
+            for path in self.paths:
+                parent, _, _ = path.rpartition(os.sep)
+                listing = self._dir_listings.get(parent)
+                if listing is not None:
+                    listing[2].append(path)
+            for path in self.dir_paths:
+                parent, _, name = path.rpartition(os.sep)
+                listing = self._dir_listings.get(parent)
+                if listing is not None:
+                    listing[3].append(name)
+        listing = self._dir_listings.get(dir_path)
+        if listing is None or listing[0] != mtime_ns or _is_racy(mtime_ns, self.created_ns):
+            return None
+        return listing[1], listing[2], listing[3]
+
+
+class _FileSnapshotBuilder:
+    def __init__(self) -> None:
+        self._created_ns = time.time_ns()
+        self._paths: List[str] = []
+        self._mtimes_ns = array("q")
+        self._sizes = array("q")
+        self._inodes = array("Q")
+        self._dir_paths: List[str] = []
+        self._dir_mtimes_ns = array("q")
+        self._dir_flags = array("B")
+
+    def add_file(self, path: str, stat: os.stat_result) -> None:
+        self.add_file_values(path, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def add_file_values(self, path: str, mtime_ns: int, size: int, inode: int) -> None:
+        self._paths.append(path)
+        self._mtimes_ns.append(mtime_ns)
+        self._sizes.append(size)
+        self._inodes.append(inode)
+
+    def add_dir(self, path: str, mtime_ns: int, flags: int) -> None:
+        self._dir_paths.append(path)
+        self._dir_mtimes_ns.append(mtime_ns)
+        self._dir_flags.append(flags)
+
+    def finish(self, scan_key: str) -> FileSnapshot:
+        return FileSnapshot(
+            self._paths,
+            self._mtimes_ns,
+            self._sizes,
+            self._inodes,
+            self._dir_paths,
+            self._dir_mtimes_ns,
+            self._dir_flags,
+            self._created_ns,
+            scan_key,
+        )
+
+
+@dataclass
+class _DirScan:
+    path: str
+    mtime_ns: int
+    flags: int
+    # (path, mtime_ns, size, inode) for each file in the directory
+    files: List[Tuple[str, int, int, int]]
+    # the paths of the subdirectories to scan
+    child_paths: List[str]
+
+
+class _DirScanner:
+    def __init__(
+        self,
+        excluded_paths: Set[str],
+        excluded_dir_names: Set[str],
+        excluded_dir_markers: Set[str],
+        excluded_file_extensions: Set[str],
+        previous: Optional[FileSnapshot],
+        ignore_rules: Optional[GitignoreRules],
+    ) -> None:
+        self._excluded_paths = excluded_paths
+        self._excluded_dir_names = excluded_dir_names
+        self._excluded_dir_markers = excluded_dir_markers
+        self._excluded_file_extensions = excluded_file_extensions
+        self._previous = previous
+        self._ignore_rules = ignore_rules
+        if previous is not None:
+            # build the listings up front so that they are not built concurrently by multiple threads
+            previous.get_unchanged_dir_listing("", 0)
+
+    def scan_serial(self, builder: _FileSnapshotBuilder, root_path: str) -> None:
+        to_search = [root_path]
+        while to_search:
+            dir_scan = self.scan_dir(to_search.pop())
+            if dir_scan is not None:
+                _add_dir_scan(builder, dir_scan)
+                # search in reverse so that the directories are visited in sorted order
+                to_search.extend(reversed(dir_scan.child_paths))
+
+    def scan_parallel(self, builder: _FileSnapshotBuilder, root_path: str, executor: ThreadPoolExecutor) -> None:
+        """scan directories concurrently (stat calls release the GIL) then add them to the builder in the same order
+        as `scan_serial` so that the resulting snapshots are identical.
+        """
+        dir_scans: Dict[str, _DirScan] = {}
+        pending = {executor.submit(self.scan_dir, root_path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_scan = future.result()
+                if dir_scan is not None:
+                    dir_scans[dir_scan.path] = dir_scan
+                    pending.update(executor.submit(self.scan_dir, child) for child in dir_scan.child_paths)
+
+        to_add = [root_path]
+        while to_add:
+            dir_scan = dir_scans.get(to_add.pop())
+            if dir_scan is not None:
+                _add_dir_scan(builder, dir_scan)
+                to_add.extend(reversed(dir_scan.child_paths))
+
+    def scan_dir(self, dir_path: str) -> Optional[_DirScan]:
+        try:
+            dir_mtime_ns = os.stat(dir_path).st_mtime_ns  # noqa: PTH116
+        except OSError as e:
+            _log_skipped(dir_path, e)
+            return None
+
+        files = []
+        listing = None if self._previous is None else self._previous.get_unchanged_dir_listing(dir_path, dir_mtime_ns)
+        if listing is not None:
+            flags, file_paths, dir_names = listing
+            for file_path in file_paths:
+                if file_path in self._excluded_paths:
+                    continue
+                try:
+                    stat = os.stat(file_path)  # noqa: PTH116
+                except OSError as e:
+                    _log_skipped(file_path, e)
+                    continue
+                files.append((file_path, stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        else:
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                _log_skipped(dir_path, e)
+                return None
+            if any(entry.name in self._excluded_dir_markers for entry in entries):
+                return _DirScan(dir_path, dir_mtime_ns, _DIR_FLAG_EXCLUDED, [], [])
+            flags = 0
+            dir_names = []
+            matcher = None if self._ignore_rules is None else self._ignore_rules.get_matcher(dir_path)
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in self._excluded_dir_names and (
+                        matcher is None or not matcher.is_ignored(entry.name, is_dir=True)
+                    ):
+                        dir_names.append(entry.name)
+                elif entry.is_symlink() and entry.is_dir():
+                    # symlinks to directories are not followed (consistent with `os.walk`)
+                    continue
+                elif os.path.splitext(entry.name)[1].lower() not in self._excluded_file_extensions and (  # noqa: PTH122
+                    matcher is None or not matcher.is_ignored(entry.name, is_dir=False)
+                ):
+                    file_path = entry.path
+                    if file_path in self._excluded_paths:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError as e:
+                        _log_skipped(file_path, e)
+                        continue
+                    files.append((file_path, stat.st_mtime_ns, stat.st_size, stat.st_ino))
+
+        child_paths = []
+        for dir_name in dir_names:
+            child_path = os.path.join(dir_path, dir_name)  # noqa: PTH118
+            if child_path not in self._excluded_paths:
+                child_paths.append(child_path)
+        return _DirScan(dir_path, dir_mtime_ns, flags, files, child_paths)
+
+
+def _add_dir_scan(builder: _FileSnapshotBuilder, dir_scan: _DirScan) -> None:
+    builder.add_dir(dir_scan.path, dir_scan.mtime_ns, dir_scan.flags)
+    for file_values in dir_scan.files:
+        builder.add_file_values(*file_values)
+
+
+def _log_skipped(path: str, e: OSError) -> None:
+    # consistent with `os.walk`, entries that cannot be read are skipped
+    if not isinstance(e, FileNotFoundError):
+        logger.debug("skipping %s while scanning for source files: %r", path, e)
+
+
+def _is_racy(mtime_ns: int, modified_after_ns: int) -> bool:
+    if mtime_ns >= modified_after_ns:
+        return True
+    # a file system that only stores whole seconds (or two seconds for FAT) may give a file modified after
+    # `modified_after_ns` an mtime that is slightly earlier
+    return mtime_ns % 1_000_000_000 == 0 and mtime_ns >= modified_after_ns - _RACY_MTIME_NS
+
+
+def _hash_file(path: str) -> bytes:
+    file_hash = hashlib.blake2b(digest_size=_HASH_SIZE)
+    with open(path, "rb") as f:  # noqa: PTH123
+        while chunk := f.read(1024 * 1024):
+            file_hash.update(chunk)
+    return file_hash.digest()
+
+
+def _read_array(typecode: str, data: bytes, offset: int, length: int) -> Tuple["array[int]", int]:
+    values = array(typecode)
+    end = offset + values.itemsize * length
+    if end > len(data):
+        msg = "unexpected end of data"
+        raise ValueError(msg)
+    values.frombytes(data[offset:end])
+    return values, end
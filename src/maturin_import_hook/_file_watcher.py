@@ -0,0 +1,241 @@
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from maturin_import_hook._logging import logger
+
+# from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+)
+# wd, mask, cookie, length of the name that follows
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _WatchedProject:
+    def __init__(self) -> None:
+        # directory path => watch descriptor
+        self.dirs: Dict[str, int] = {}
+        # whether an event has been received since watching started
+        self.dirty = False
+        # whether the project was up to date when watching started and nothing has changed since
+        self.clean = False
+
+
+class _WatchState:
+    """the state shared with the thread that reads events"""
+
+    def __init__(self, libc: ctypes.CDLL, inotify_fd: int) -> None:
+        self.libc = libc
+        self.inotify_fd = inotify_fd
+        self.lock = threading.Lock()
+        self.projects: Dict[str, _WatchedProject] = {}
+        # watch descriptor => the keys of the projects that contain the directory
+        self.watch_keys: Dict[int, Set[str]] = {}
+
+    def read_pending_events(self) -> None:
+        """must be called with the lock held so that events are always handled before the state is read"""
+        while True:
+            try:
+                data = os.read(self.inotify_fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            self._handle_events(data)
+
+    def _handle_events(self, data: bytes) -> None:
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size + name_length
+            if mask & _IN_Q_OVERFLOW:
+                logger.debug("file watcher event queue overflowed. Marking all projects as changed")
+                for project in self.projects.values():
+                    project.dirty = True
+                    project.clean = False
+                continue
+            keys = self.watch_keys.get(wd, set())
+            for key in keys:
+                project = self.projects[key]
+                project.dirty = True
+                project.clean = False
+            if mask & _IN_MOVE_SELF and wd in self.watch_keys:
+                # the watch would follow the directory to its new path. The kernel sends IN_IGNORED once removed
+                self.libc.inotify_rm_watch(self.inotify_fd, wd)
+            if mask & (_IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF):
+                # the directory was removed (or moved) so the watch no longer applies
+                self.watch_keys.pop(wd, None)
+                for key in keys:
+                    dirs = self.projects[key].dirs
+                    for dir_path in [p for p, dir_wd in dirs.items() if dir_wd == wd]:
+                        del dirs[dir_path]
+
+    def unwatch_dirs(self, key: str, dir_paths: Iterable[str]) -> None:
+        """stop watching the given directories for the project. Watches not used by other projects are removed"""
+        project = self.projects[key]
+        for dir_path in list(dir_paths):
+            wd = project.dirs.pop(dir_path)
+            keys = self.watch_keys.get(wd)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.watch_keys[wd]
+                self.libc.inotify_rm_watch(self.inotify_fd, wd)
+
+
+class FileWatcher:
+    """Watch the source directories of projects for changes using inotify (Linux only).
+
+    A project is 'clean' if it was found to be up to date after watching started and no files in the watched
+    directories have changed since. Anything that cannot be watched reliably is reported as not clean, so that the
+    caller falls back to searching for changes.
+    """
+
+    def __init__(self, libc: ctypes.CDLL, inotify_fd: int) -> None:
+        self._libc = libc
+        self._inotify_fd = inotify_fd
+        self._state = _WatchState(libc, inotify_fd)
+        self._wake_read_fd, self._wake_write_fd = os.pipe()
+        self._thread = threading.Thread(
+            target=_read_events,
+            args=(self._wake_read_fd, self._state),
+            name="maturin_import_hook_file_watcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    @staticmethod
+    def create() -> Optional["FileWatcher"]:
+        """Create a file watcher, or return None if file watching is not supported on this platform."""
+        if not sys.platform.startswith("linux"):
+            logger.debug("file watching is only supported on Linux")
+            return None
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_init1.restype = ctypes.c_int
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_add_watch.restype = ctypes.c_int
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            libc.inotify_rm_watch.restype = ctypes.c_int
+        except (OSError, AttributeError) as e:
+            logger.debug("inotify is not available: %r", e)
+            return None
+        inotify_fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if inotify_fd < 0:
+            logger.debug("failed to initialise inotify: %s", os.strerror(ctypes.get_errno()))
+            return None
+        return FileWatcher(libc, inotify_fd)
+
+    def __del__(self) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._wake_write_fd != -1:
+            os.write(self._wake_write_fd, b"\0")
+            self._thread.join()
+            os.close(self._wake_write_fd)
+            os.close(self._wake_read_fd)
+            os.close(self._inotify_fd)
+            self._wake_write_fd = -1
+
+    def watch(self, key: str, dir_paths: Iterable[str]) -> bool:
+        """Start watching the given directories for changes to the project identified by `key`.
+
+        The project is not clean until `mark_clean()` is called. Directories of the project that are not given are no
+        longer watched.
+
+        Returns:
+            whether all of the directories are being watched
+        """
+        dir_paths = list(dir_paths)
+        with self._state.lock:
+            self._state.read_pending_events()
+            project = self._state.projects.setdefault(key, _WatchedProject())
+            project.dirty = False
+            project.clean = False
+            dir_path_set = set(dir_paths)
+            self._state.unwatch_dirs(key, [p for p in project.dirs if p not in dir_path_set])
+            for dir_path in dir_paths:
+                if dir_path in project.dirs:
+                    continue
+                wd = self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(dir_path), _WATCH_MASK)
+                if wd < 0:
+                    error_code = ctypes.get_errno()
+                    if error_code == errno.ENOSPC:
+                        logger.debug("inotify watches exhausted. Not watching %s", key)
+                    elif error_code != errno.ENOENT:
+                        logger.debug("failed to watch %s: %s", dir_path, os.strerror(error_code))
+                    # the project cannot be clean so there is no point watching the other directories
+                    self._unwatch(key)
+                    return False
+                project.dirs[dir_path] = wd
+                self._state.watch_keys.setdefault(wd, set()).add(key)
+        return True
+
+    def unwatch(self, key: str) -> None:
+        """Stop watching the directories of the project identified by `key` (eg when it is no longer tracked)"""
+        with self._state.lock:
+            self._state.read_pending_events()
+            self._unwatch(key)
+
+    def _unwatch(self, key: str) -> None:
+        project = self._state.projects.get(key)
+        if project is not None:
+            self._state.unwatch_dirs(key, project.dirs)
+            del self._state.projects[key]
+
+    def mark_clean(self, key: str, dir_paths: Iterable[str]) -> None:
+        """Record that the project was up to date with the given directories.
+
+        Ignored if anything has changed since `watch()` was called or if any of the directories are not being watched.
+        """
+        with self._state.lock:
+            self._state.read_pending_events()
+            project = self._state.projects.get(key)
+            if project is not None and not project.dirty:
+                project.clean = all(dir_path in project.dirs for dir_path in dir_paths)
+
+    def is_clean(self, key: str) -> bool:
+        with self._state.lock:
+            self._state.read_pending_events()
+            project = self._state.projects.get(key)
+            return project is not None and project.clean
+
+
+def _read_events(wake_fd: int, state: _WatchState) -> None:
+    # events are read in the background so that the kernel event queue does not overflow between checks
+    poll = select.poll()
+    poll.register(state.inotify_fd, select.POLLIN)
+    poll.register(wake_fd, select.POLLIN)
+    while True:
+        ready_fds = [fd for fd, _ in poll.poll()]
+        if wake_fd in ready_fds:
+            return
+        with state.lock:
+            state.read_pending_events()
@@ -0,0 +1,238 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from maturin_import_hook._logging import logger
+
+# ignore files that are read from every directory, in order of increasing precedence
+_IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+
+
+class _Pattern:
+    def __init__(self, regex: "re.Pattern[str]", negate: bool, dir_only: bool, name_only: bool) -> None:
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        # patterns without a separator match the name of an entry at any depth, so only the name has to be matched
+        self.name_only = name_only
+
+
+class _IgnoreFile:
+    """the patterns from a single ignore file, which match paths relative to the directory containing the file"""
+
+    def __init__(self, patterns: List[_Pattern]) -> None:
+        self.patterns = patterns
+        # most paths do not match any pattern, which can be checked with a single regex
+        self.any_name_regex = _combine(p.regex for p in patterns if p.name_only)
+        self.any_path_regex = _combine(p.regex for p in patterns if not p.name_only)
+
+    @staticmethod
+    def load(path: str) -> Optional["_IgnoreFile"]:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:  # noqa: PTH123
+                lines = f.read().splitlines()
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            return None
+        except OSError as e:
+            logger.debug("failed to read ignore file %s: %r", path, e)
+            return None
+        patterns = [pattern for pattern in map(_parse_line, lines) if pattern is not None]
+        return _IgnoreFile(patterns) if patterns else None
+
+    def match(self, prefix: str, name: str, is_dir: bool) -> Optional[bool]:
+        """whether the path `prefix + name` is ignored (True), explicitly not ignored (False) or not mentioned (None)"""
+        relative_path = None
+        if self.any_name_regex is None or self.any_name_regex.fullmatch(name) is None:
+            if self.any_path_regex is None:
+                return None
+            relative_path = prefix + name
+            if self.any_path_regex.fullmatch(relative_path) is None:
+                return None
+        for pattern in reversed(self.patterns):
+            if pattern.dir_only and not is_dir:
+                continue
+            if pattern.name_only:
+                if pattern.regex.fullmatch(name) is not None:
+                    return not pattern.negate
+            else:
+                if relative_path is None:
+                    relative_path = prefix + name
+                if pattern.regex.fullmatch(relative_path) is not None:
+                    return not pattern.negate
+        return None
+
+
+class DirectoryMatcher:
+    """determines which entries of a single directory are ignored"""
+
+    def __init__(self, ignore_files: List[Tuple[_IgnoreFile, str]]) -> None:
+        # (ignore file, path of this directory relative to the ignore file with a trailing `/` if not empty),
+        # in order of increasing precedence
+        self._ignore_files = ignore_files
+
+    def is_ignored(self, name: str, is_dir: bool) -> bool:
+        for ignore_file, prefix in reversed(self._ignore_files):
+            result = ignore_file.match(prefix, name, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def child(self, name: str, own_ignore_files: List[_IgnoreFile]) -> "DirectoryMatcher":
+        ignore_files = [(ignore_file, f"{prefix}{name}/") for ignore_file, prefix in self._ignore_files]
+        ignore_files.extend((ignore_file, "") for ignore_file in own_ignore_files)
+        return DirectoryMatcher(ignore_files)
+
+
+class GitignoreRules:
+    """Rules loaded from `.gitignore`, `.ignore` and `.git/info/exclude` files.
+
+    Matchers are created and cached per directory, so an instance should only be used for a single search because
+    changes to the ignore files are not detected.
+    """
+
+    def __init__(self) -> None:
+        self._matchers: Dict[str, DirectoryMatcher] = {}
+
+    def get_key(self, root_paths: Iterable[str]) -> str:
+        """identifies the state of the ignore files outside of the given directories that apply to them.
+
+        The ignore files inside the directories are not included because they are found when searching.
+        """
+        state = []
+        for root_path in root_paths:
+            for ignore_file_path in _get_ancestor_ignore_file_paths(root_path):
+                try:
+                    mtime_ns = os.stat(ignore_file_path).st_mtime_ns  # noqa: PTH116
+                except OSError:
+                    continue
+                state.append((ignore_file_path, mtime_ns))
+        return repr(state)
+
+    def get_matcher(self, dir_path: str) -> DirectoryMatcher:
+        """get the matcher for the entries of the given directory. Safe to call from multiple threads."""
+        matcher = self._matchers.get(dir_path)
+        if matcher is not None:
+            return matcher
+        own_ignore_files = _load_ignore_files(_get_own_ignore_file_paths(dir_path))
+        parent, name = os.path.split(dir_path)
+        if _is_repository_root(dir_path):
+            exclude_files = _load_ignore_files([os.path.join(dir_path, ".git", "info", "exclude")])  # noqa: PTH118
+            matcher = DirectoryMatcher([(f, "") for f in exclude_files + own_ignore_files])
+        elif name and (parent in self._matchers or _get_repository_root(parent) is not None):
+            # ignore files in parent directories (up to the root of the repository) also apply
+            matcher = self.get_matcher(parent).child(name, own_ignore_files)
+        else:
+            matcher = DirectoryMatcher([(f, "") for f in own_ignore_files])
+        self._matchers[dir_path] = matcher
+        return matcher
+
+
+def _get_own_ignore_file_paths(dir_path: str) -> List[str]:
+    return [os.path.join(dir_path, name) for name in _IGNORE_FILE_NAMES]  # noqa: PTH118
+
+
+def _get_ancestor_ignore_file_paths(dir_path: str) -> List[str]:
+    """the paths of the ignore files in the parent directories of `dir_path` that apply to it"""
+    repository_root = _get_repository_root(dir_path)
+    if repository_root is None or repository_root == dir_path:
+        return []
+    paths = [os.path.join(repository_root, ".git", "info", "exclude")]  # noqa: PTH118
+    ancestor = os.path.dirname(dir_path)  # noqa: PTH120
+    ancestors = []
+    while True:
+        ancestors.append(ancestor)
+        if ancestor == repository_root:
+            break
+        ancestor = os.path.dirname(ancestor)  # noqa: PTH120
+    for ancestor in reversed(ancestors):
+        paths.extend(_get_own_ignore_file_paths(ancestor))
+    return paths
+
+
+def _load_ignore_files(paths: Iterable[str]) -> List[_IgnoreFile]:
+    return [ignore_file for ignore_file in map(_IgnoreFile.load, paths) if ignore_file is not None]
+
+
+def _is_repository_root(dir_path: str) -> bool:
+    return os.path.lexists(os.path.join(dir_path, ".git"))  # noqa: PTH118
+
+
+def _get_repository_root(dir_path: str) -> Optional[str]:
+    while True:
+        if _is_repository_root(dir_path):
+            return dir_path
+        parent = os.path.dirname(dir_path)  # noqa: PTH120
+        if parent == dir_path:
+            return None
+        dir_path = parent
+
+
+def _parse_line(line: str) -> Optional[_Pattern]:
+    """convert a line of an ignore file to a regex matching paths relative to the directory of the ignore file.
+
+    see https://git-scm.com/docs/gitignore#_pattern_format
+    """
+    if not line or line.startswith("#"):
+        return None
+    # trailing spaces are ignored unless escaped
+    line = re.sub(r"(?<!\\) +$", "", line)
+    negate = line.startswith("!")
+    # a leading backslash escapes `!` and `#`
+    if negate or line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # patterns containing a separator (other than a trailing one) are relative to the directory of the ignore file
+    # otherwise they match at any depth
+    name_only = "/" not in line
+    segments = line.lstrip("/").split("/")
+    regex = ""
+    for i, segment in enumerate(segments):
+        is_last = i == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if is_last else "(?:.*/)?"
+        else:
+            regex += _translate_segment(segment) + ("" if is_last else "/")
+    try:
+        return _Pattern(re.compile(regex, re.DOTALL), negate, dir_only, name_only)
+    except re.error:
+        logger.debug("failed to parse ignore pattern: %r", line)
+        return None
+
+
+def _combine(regexes: Iterable["re.Pattern[str]"]) -> Optional["re.Pattern[str]"]:
+    patterns = [f"(?:{regex.pattern})" for regex in regexes]
+    return re.compile("|".join(patterns), re.DOTALL) if patterns else None
+
+
+def _translate_segment(segment: str) -> str:
+    """translate a glob that does not contain a separator to a regex"""
+    regex = []
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        i += 1
+        if c == "*":
+            regex.append("[^/]*")
+        elif c == "?":
+            regex.append("[^/]")
+        elif c == "\\" and i < len(segment):
+            regex.append(re.escape(segment[i]))
+            i += 1
+        elif c == "[":
+            end = segment.find("]", i + 1 if segment[i : i + 1] in ("!", "^") else i)
+            if end == -1:
+                regex.append(re.escape(c))
+                continue
+            contents = segment[i:end]
+            i = end + 1
+            if contents.startswith(("!", "^")):
+                contents = "^" + contents[1:].replace("\\", "\\\\")
+            else:
+                contents = contents.replace("\\", "\\\\")
+            regex.append(f"[{contents}]")
+        else:
+            regex.append(re.escape(c))
+    return "".join(regex)
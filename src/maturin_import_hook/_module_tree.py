@@ -0,0 +1,146 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from maturin_import_hook._logging import logger
+
+# comments, string literals and character literals are matched so that their contents are not mistaken for code
+_LITERAL_PATTERN = re.compile(
+    r"""
+    (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*)
+    | (?P<raw_string>b?r(?P<hashes>\#*)"(?P<raw_value>.*?)"(?P=hashes))
+    | (?P<string>b?"(?P<value>(?:\\.|[^"\\])*)")
+    | (?P<char>b?'(?:\\.|[^'\\\n])')
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_STRING_PLACEHOLDER = "__maturin_import_hook_string_{}__"
+
+_ITEM_PATTERN = re.compile(
+    r"""
+    (?P<mod>
+        (?P<attributes>(?:\#\[[^\]]*\]\s*)*)
+        (?:\bpub\s*(?:\([^)]*\))?\s*)?
+        \bmod\s+(?:r\#)?(?P<name>[A-Za-z_][A-Za-z0-9_]*)\s*(?P<kind>[;{])
+    )
+    | (?P<include>\binclude(?:_str|_bytes)?\s*!\s*[(\[{]\s*__maturin_import_hook_string_(?P<include_index>\d+)__)
+    | (?P<open>\{)
+    | (?P<close>\})
+    """,
+    re.VERBOSE,
+)
+_PATH_ATTRIBUTE_PATTERN = re.compile(r"#\[\s*path\s*=\s*__maturin_import_hook_string_(\d+)__\s*\]")
+
+
+def find_module_tree(root_path: Path) -> List[Path]:
+    """Find the files that make up the crate with the given root file (eg `src/lib.rs`).
+
+    `mod` declarations are followed using the same rules as rustc (including `#[path]` attributes and declarations
+    inside inline modules) along with `include!`, `include_str!` and `include_bytes!` with literal paths. The search is
+    best effort: declarations generated by macros are not found and declarations disabled with `#[cfg]` are followed
+    anyway. Files that do not exist are omitted.
+
+    Returns:
+        the existing files of the crate, starting with `root_path`
+    """
+    found: Dict[Path, None] = {root_path: None}
+    # (file, whether the file is a 'mod-rs' file whose submodules are found relative to its directory)
+    pending: List[Tuple[Path, bool]] = [(root_path, True)]
+    while pending:
+        file_path, is_mod_rs = pending.pop()
+        try:
+            source = file_path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.debug("failed to read %s: %r", file_path, e)
+            continue
+        for path, path_is_mod_rs in _find_dependencies(file_path, is_mod_rs, source):
+            if path not in found and path.is_file():
+                found[path] = None
+                if path_is_mod_rs is not None:
+                    pending.append((path, path_is_mod_rs))
+    return list(found)
+
+
+def _find_dependencies(file_path: Path, is_mod_rs: bool, source: str) -> List[Tuple[Path, Optional[bool]]]:
+    """Find the files referenced by a source file.
+
+    Returns:
+        (path, whether the file is a mod-rs file or None if it is not a module) for each referenced file
+    """
+    code, strings = _remove_literals(source)
+    directory = file_path.parent
+    # submodules of a non-mod-rs file `a/b.rs` are found in `a/b/`
+    module_dir = directory if is_mod_rs else directory / file_path.stem
+    dependencies: List[Tuple[Path, Optional[bool]]] = []
+    depth = 0
+    # (directory component, brace depth) of the inline modules enclosing the current position
+    inline_modules: List[Tuple[str, int]] = []
+    for match in _ITEM_PATTERN.finditer(code):
+        if match.group("open") is not None:
+            depth += 1
+        elif match.group("close") is not None:
+            if inline_modules and inline_modules[-1][1] == depth:
+                inline_modules.pop()
+            depth = max(depth - 1, 0)
+        elif match.group("include") is not None:
+            include_path = Path(os.path.normpath(directory / strings[int(match.group("include_index"))]))
+            dependencies.append((include_path, None))
+        else:
+            path_match = _PATH_ATTRIBUTE_PATTERN.search(match.group("attributes"))
+            path_attribute = strings[int(path_match.group(1))] if path_match is not None else None
+            if match.group("kind") == "{":
+                depth += 1
+                inline_modules.append((path_attribute or match.group("name"), depth))
+                continue
+            parent_dir = module_dir.joinpath(*(component for component, _ in inline_modules))
+            if path_attribute is not None:
+                # outside of inline modules the path is relative to the directory of the current file
+                base_dir = parent_dir if inline_modules else directory
+                dependencies.append((Path(os.path.normpath(base_dir / path_attribute)), True))
+            else:
+                name = match.group("name")
+                dependencies.append((parent_dir / f"{name}.rs", False))
+                dependencies.append((parent_dir / name / "mod.rs", True))
+    return dependencies
+
+
+def _remove_literals(source: str) -> Tuple[str, List[str]]:
+    """Remove comments and replace string literals with placeholders.
+
+    Returns:
+        the code and the values of the string literals (indexed by the number in each placeholder)
+    """
+    strings: List[str] = []
+    parts: List[str] = []
+    position = 0
+    while True:
+        match = _LITERAL_PATTERN.search(source, position)
+        if match is None:
+            parts.append(source[position:])
+            break
+        parts.append(source[position : match.start()])
+        position = match.end()
+        if match.group("block_comment") is not None:
+            position = _find_block_comment_end(source, match.end())
+            parts.append(" ")
+        elif match.group("raw_string") is not None:
+            parts.append(_STRING_PLACEHOLDER.format(len(strings)))
+            strings.append(match.group("raw_value"))
+        elif match.group("string") is not None:
+            parts.append(_STRING_PLACEHOLDER.format(len(strings)))
+            strings.append(re.sub(r"\\(.)", r"\1", match.group("value")))
+        else:
+            parts.append(" ")
+    return "".join(parts), strings
+
+
+def _find_block_comment_end(source: str, start: int) -> int:
+    """block comments can be nested"""
+    depth = 1
+    for match in re.compile(r"/\*|\*/").finditer(source, start):
+        depth += 1 if match.group() == "/*" else -1
+        if depth == 0:
+            return match.end()
+    return len(source)
@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Literal, Optional, Sequence, Union
+
+from maturin_import_hook._building import get_default_build_dir
+from maturin_import_hook._logging import logger
+from maturin_import_hook._resolve_project import ProjectResolver, is_maybe_maturin_project
+from maturin_import_hook.error import ImportHookError
+from maturin_import_hook.project_importer import MaturinProjectImporter, _ProjectIndex
+from maturin_import_hook.rust_file_importer import MaturinRustFileImporter
+from maturin_import_hook.settings import MaturinSettings
+
+
+@dataclass
+class PrebuildResult:
+    """The outcome of prebuilding a single package, project or `.rs` file"""
+
+    target: str
+    success: bool
+    # whether a build was required (False if the target was already up to date)
+    rebuilt: bool
+    duration_seconds: float
+    error: Optional[str] = None
+
+
+def prebuild(
+    targets: Optional[Sequence[Union[str, Path]]] = None,
+    *,
+    max_jobs: int = 2,
+    settings: Optional[MaturinSettings] = None,
+    build_dir: Optional[Path] = None,
+    force_rebuild: bool = False,
+    lock_timeout_seconds: Optional[float] = 120,
+    show_warnings: bool = True,
+    enable_automatic_installation: bool = False,
+    build_status_store: Literal["json", "sqlite"] = "json",
+) -> List[PrebuildResult]:
+    """Check (and rebuild if necessary) many maturin projects and `.rs` files concurrently without importing them.
+
+    Args:
+        targets: package names, maturin project directories or paths to `.rs` files.
+            Defaults to every maturin project that can be found from `sys.path` and would be rebuilt when imported
+        max_jobs: the maximum number of targets to check or build at the same time
+        settings: settings corresponding to flags passed to maturin.
+        build_dir: where to put the compiled artifacts (see `maturin_import_hook.install()`)
+        force_rebuild: whether to always rebuild and skip checking whether anything has changed
+        lock_timeout_seconds: how long to wait for another process building the same target
+        show_warnings: whether to show compilation warnings
+        enable_automatic_installation: whether to install projects that are not already installed in editable mode
+        build_status_store: where to record the status of each build (see `maturin_import_hook.install()`)
+
+    Returns:
+        a result for each target, in the order the targets were given
+    """
+    project_importer = MaturinProjectImporter(
+        settings=settings,
+        build_dir=build_dir,
+        lock_timeout_seconds=lock_timeout_seconds,
+        enable_reloading=False,
+        enable_automatic_installation=enable_automatic_installation,
+        force_rebuild=force_rebuild,
+        show_warnings=show_warnings,
+        build_status_store=build_status_store,
+    )
+    rust_file_importer = MaturinRustFileImporter(
+        settings=settings,
+        build_dir=build_dir,
+        lock_timeout_seconds=lock_timeout_seconds,
+        enable_reloading=False,
+        force_rebuild=force_rebuild,
+        show_warnings=show_warnings,
+        build_status_store=build_status_store,
+    )
+    if targets is None:
+        index = _ProjectIndex.for_build_dir(
+            build_dir if build_dir is not None else get_default_build_dir(), ProjectResolver()
+        )
+        # packages that are only installed normally (not in editable mode) are not rebuilt unless automatic
+        # installation is enabled
+        targets = sorted(
+            package_name
+            for package_name, candidates in index.get_all_candidates(sys.path).items()
+            if any(candidate.is_editable is not False or enable_automatic_installation for candidate in candidates)
+        )
+    resolver = ProjectResolver()
+
+    def prebuild_target(target: Union[str, Path]) -> PrebuildResult:
+        start = time.perf_counter()
+        try:
+            rebuilt = _prebuild_target(target, project_importer, rust_file_importer, resolver)
+        except ImportHookError as e:
+            duration = time.perf_counter() - start
+            logger.error('failed to build "%s" after %.3fs: %s', target, duration, e)
+            return PrebuildResult(str(target), False, False, duration, str(e))
+        except Exception as e:  # noqa: BLE001
+            # unexpected errors (eg a missing path dependency or maturin) should not prevent the other targets
+            # from being reported
+            duration = time.perf_counter() - start
+            logger.exception('failed to build "%s" after %.3fs', target, duration)
+            return PrebuildResult(str(target), False, False, duration, repr(e))
+        duration = time.perf_counter() - start
+        logger.info('%s "%s" in %.3fs', "built" if rebuilt else "checked", target, duration)
+        return PrebuildResult(str(target), True, rebuilt, duration)
+
+    with ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="maturin_import_hook_prebuild") as executor:
+        return list(executor.map(prebuild_target, targets))
+
+
+def _prebuild_target(
+    target: Union[str, Path],
+    project_importer: MaturinProjectImporter,
+    rust_file_importer: MaturinRustFileImporter,
+    resolver: ProjectResolver,
+) -> bool:
+    path = Path(target)
+    if path.suffix == ".rs":
+        if not path.is_file():
+            msg = f'rust file "{path}" does not exist'
+            raise ImportHookError(msg)
+        return rust_file_importer.prebuild(path.absolute())
+    # a directory in the working directory may have the same name as a package (eg the python source of the project)
+    is_path = isinstance(target, Path) or "/" in target or os.sep in target
+    if is_path or is_maybe_maturin_project(path):
+        project_dir = path.resolve()
+        resolved = resolver.resolve(project_dir)
+        if resolved is None:
+            msg = f'"{path}" is not a maturin project'
+            raise ImportHookError(msg)
+        return project_importer.prebuild(resolved.package_name, project_dir)
+    return project_importer.prebuild(str(target))
@@ -1,4 +1,5 @@
 import contextlib
+import functools
 import importlib
 import importlib.abc
 import importlib.machinery
@@ -6,30 +7,39 @@ import itertools
 import json
 import logging
 import os
+import re
 import site
 import sys
 import tempfile
+import threading
 import time
 import urllib.parse
 import urllib.request
 from abc import ABC, abstractmethod
-from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from importlib.machinery import ExtensionFileLoader, ModuleSpec, PathFinder
 from pathlib import Path
 from types import ModuleType
-from typing import ClassVar, Iterator, List, Optional, Sequence, Set, Tuple, Union
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Literal, Optional, Sequence, Set, Tuple, Union
 
 from maturin_import_hook._building import (
     BuildCache,
     BuildStatus,
-    LockedBuildCache,
+    ReadOnlyBuildCache,
     develop_build_project,
     find_maturin,
     get_installation_freshness,
     get_installation_mtime,
+    get_recent_source_changes,
+    get_snapshot_freshness,
     maturin_output_has_warnings,
 )
-from maturin_import_hook._common import LazySessionTemporaryDirectory
+from maturin_import_hook._common import LazySessionTemporaryDirectory, is_stdlib_module, write_file_atomically
+from maturin_import_hook._dep_info import get_dep_info_source_paths
+from maturin_import_hook._file_snapshot import FileSnapshot
+from maturin_import_hook._file_watcher import FileWatcher
+from maturin_import_hook._gitignore import GitignoreRules
 from maturin_import_hook._logging import logger
 from maturin_import_hook._resolve_project import (
     MaturinProject,
@@ -39,13 +49,18 @@ from maturin_import_hook._resolve_project import (
 from maturin_import_hook.error import ImportHookError
 from maturin_import_hook.settings import MaturinSettings
 
+# the search path directories are checked for changes (eg a newly installed package) at most this often
+_SEARCH_PATH_RECHECK_SECONDS = 1.0
+
 __all__ = [
     "MaturinProjectImporter",
+    "BackgroundBuild",
     "install",
     "uninstall",
     "IMPORTER",
     "ProjectFileSearcher",
     "DefaultProjectFileSearcher",
+    "GitignoreProjectFileSearcher",
 ]
 
 
@@ -65,6 +80,70 @@ class ProjectFileSearcher(ABC):
         """find the files corresponding to the installed files of the given project"""
         raise NotImplementedError
 
+    def get_source_snapshot(
+        self,
+        project_dir: Path,
+        all_path_dependencies: List[Path],
+        installed_package_root: Path,
+        previous_snapshot: Optional[FileSnapshot],
+    ) -> FileSnapshot:
+        """take a snapshot of the source files of the given project. The snapshot taken after the last build
+        (if any) is provided so that implementations can avoid searching directories that have not changed.
+        """
+        return FileSnapshot.from_paths(
+            self.get_source_paths(project_dir, all_path_dependencies, installed_package_root)
+        )
+
+
+class BackgroundBuild:
+    """The status of a build started in the background by `MaturinProjectImporter(enable_background_rebuild=True)`"""
+
+    def __init__(self, package_name: str, project_dir: Path, build: Callable[[], object]) -> None:
+        self.package_name = package_name
+        self.project_dir = project_dir
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        # the exception raised by the build if it failed
+        self.error: Optional[Exception] = None
+        self._finished = threading.Event()
+        # not a daemon thread so that the interpreter does not exit while the build cache is being written to
+        self._thread = threading.Thread(
+            target=self._run, args=(build,), name=f"maturin_import_hook_build_{package_name}"
+        )
+        self._thread.start()
+
+    @property
+    def is_running(self) -> bool:
+        return not self._finished.is_set()
+
+    @property
+    def succeeded(self) -> bool:
+        return self._finished.is_set() and self.error is None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the build to finish.
+
+        Returns:
+            whether the build has finished
+        """
+        return self._finished.wait(timeout)
+
+    def _run(self, build: Callable[[], object]) -> None:
+        try:
+            build()
+        except Exception as e:  # noqa: BLE001
+            self.error = e
+            logger.error('background build of "%s" failed: %s', self.package_name, e)
+        else:
+            logger.info(
+                'background build of "%s" finished in %.3fs. Reload the package or restart to use the new build',
+                self.package_name,
+                time.time() - self.start_time,
+            )
+        finally:
+            self.end_time = time.time()
+            self._finished.set()
+
 
 class MaturinProjectImporter(importlib.abc.MetaPathFinder):
     """An import hook for automatically rebuilding editable installed maturin projects."""
@@ -80,17 +159,39 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
         enable_automatic_installation: bool = False,
         force_rebuild: bool = False,
         show_warnings: bool = True,
+        enable_content_hashing: bool = False,
+        enable_file_watcher: bool = False,
+        enable_dep_info_tracking: bool = False,
+        enable_background_rebuild: bool = False,
+        build_status_store: Literal["json", "sqlite"] = "json",
     ) -> None:
         self._resolver = ProjectResolver()
         self._settings = settings
         self._file_searcher = file_searcher if file_searcher is not None else DefaultProjectFileSearcher()
-        self._build_cache = BuildCache(build_dir, lock_timeout_seconds)
+        self._build_cache = BuildCache(build_dir, lock_timeout_seconds, build_status_store)
         self._enable_reloading = enable_reloading
         self._enable_automatic_installation = enable_automatic_installation
         self._force_rebuild = force_rebuild
         self._show_warnings = show_warnings
+        self._enable_content_hashing = enable_content_hashing
+        self._file_watcher = FileWatcher.create() if enable_file_watcher else None
+        self._enable_dep_info_tracking = enable_dep_info_tracking
+        self._enable_background_rebuild = enable_background_rebuild
+        self._background_builds_lock = threading.Lock()
+        self._background_builds: Dict[str, BackgroundBuild] = {}
+        self._prebuilds_lock = threading.Lock()
+        # package name => the prebuild of the package that has not been waited on yet
+        self._prebuilds: Dict[str, Future[Tuple[Optional[ModuleSpec], bool]]] = {}
         self._maturin_path: Optional[Path] = None
         self._reload_tmp_path = LazySessionTemporaryDirectory(prefix=type(self).__name__)
+        # package name => the search path fingerprint at the time the package was not found
+        self._not_found_cache: Dict[str, _SearchPathFingerprint] = {}
+        # (sys.path, current directory if it is searched) => (when the fingerprint was computed, the fingerprint of
+        # the search paths)
+        self._search_path_fingerprint: Optional[
+            Tuple[Tuple[Tuple[str, ...], Optional[str]], float, _SearchPathFingerprint]
+        ] = None
+        self._project_index = _ProjectIndex.for_build_dir(self._build_cache.build_dir, self._resolver)
 
     def get_settings(self, module_path: str, source_path: Path) -> MaturinSettings:
         """This method can be overridden in subclasses to customize settings for specific projects."""
@@ -106,7 +207,10 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
         """called by `importlib.invalidate_caches()`"""
         logger.info("clearing cache")
         self._resolver.clear_cache()
-        _find_maturin_project_above.cache_clear()
+        self._not_found_cache.clear()
+        self._search_path_fingerprint = None
+        self._project_index.clear()
+        _DIST_INFO_INDEXES.clear()
 
     def find_spec(
         self,
@@ -118,6 +222,8 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
         if not is_top_level_import:
             return None
         assert "." not in fullname
+        if is_stdlib_module(fullname):
+            return None
         package_name = fullname
 
         already_loaded = package_name in sys.modules
@@ -126,6 +232,10 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
             logger.debug('package "%s" is already loaded and enable_reloading=False', package_name)
             return None
 
+        search_path_fingerprint = self._get_search_path_fingerprint()
+        if self._not_found_cache.get(package_name) == search_path_fingerprint:
+            return None
+
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 '%s searching for "%s"%s', type(self).__name__, package_name, " (reload)" if already_loaded else ""
@@ -133,34 +243,13 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
 
         start = time.perf_counter()
 
-        # sys.path includes site-packages and search roots for editable installed packages
-        search_paths = [Path(p) for p in sys.path]
-
-        spec = None
-        rebuilt = False
-        for search_path in search_paths:
-            project_dir, is_editable = _load_dist_info(search_path, package_name)
-            if project_dir is not None:
-                logger.debug('found project linked by dist-info: "%s"', project_dir)
-                if not is_editable and not self._enable_automatic_installation:
-                    logger.debug(
-                        "package not installed in editable-mode and enable_automatic_installation=False. not rebuilding"
-                    )
-                else:
-                    spec, rebuilt = self._rebuild_project(package_name, project_dir)
-                    if spec is not None:
-                        break
-
-            project_dir = _find_maturin_project_above(search_path)
-            if project_dir is not None:
-                logger.debug(
-                    'found project above the search path: "%s" ("%s")',
-                    project_dir,
-                    search_path,
-                )
-                spec, rebuilt = self._rebuild_project(package_name, project_dir)
-                if spec is not None:
-                    break
+        prebuild_result = self._wait_for_prebuild(package_name)
+        if prebuild_result is not None and prebuild_result[0] is not None:
+            spec, rebuilt = prebuild_result
+        else:
+            # sys.path includes site-packages and search roots for editable installed packages
+            candidates = self._project_index.get_candidates(package_name, search_path_fingerprint)
+            spec, rebuilt = self._rebuild_first_candidate(package_name, candidates)
 
         if spec is not None:
             if already_loaded and self._enable_reloading:
@@ -171,10 +260,128 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
                 logger.info('rebuilt and loaded package "%s" in %.3fs', package_name, duration)
             else:
                 logger.debug('loaded package "%s" in %.3fs', package_name, duration)
-        elif logger.isEnabledFor(logging.DEBUG):
-            logger.debug('%s did not find "%s"', type(self).__name__, package_name)
+        else:
+            self._not_found_cache[package_name] = search_path_fingerprint
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug('%s did not find "%s"', type(self).__name__, package_name)
         return spec
 
+    def _get_search_path_fingerprint(self) -> "_SearchPathFingerprint":
+        """The fingerprint is recomputed when `sys.path` changes, when `invalidate_caches()` is called or at most every
+        `_SEARCH_PATH_RECHECK_SECONDS` (so that packages installed while running are found) rather than calling `stat`
+        on every search path on every import.
+        """
+        search_paths = tuple(sys.path)
+        # the empty string refers to the current working directory
+        key = (search_paths, os.getcwd() if "" in search_paths else None)  # noqa: PTH109
+        now = time.monotonic()
+        cached = self._search_path_fingerprint
+        if cached is None or cached[0] != key or now - cached[1] >= _SEARCH_PATH_RECHECK_SECONDS:
+            cached = self._search_path_fingerprint = (key, now, _get_search_path_fingerprint(search_paths))
+        return cached[2]
+
+    def _rebuild_first_candidate(
+        self, package_name: str, candidates: List["_ProjectCandidate"]
+    ) -> Tuple[Optional[ModuleSpec], bool]:
+        for candidate in candidates:
+            if candidate.is_editable is not None:
+                logger.debug('found project linked by dist-info: "%s"', candidate.project_dir)
+                if not candidate.is_editable and not self._enable_automatic_installation:
+                    logger.debug(
+                        "package not installed in editable-mode and enable_automatic_installation=False. not rebuilding"
+                    )
+                    continue
+            else:
+                logger.debug(
+                    'found project above the search path: "%s" ("%s")',
+                    candidate.project_dir,
+                    candidate.search_path,
+                )
+            spec, rebuilt = self._rebuild_project(package_name, candidate.project_dir)
+            if spec is not None:
+                return spec, rebuilt
+        return None, False
+
+    def prebuild(self, package_name: str, project_dir: Optional[Path] = None) -> bool:
+        """Check whether the given package is up to date and rebuild it if necessary, without importing it.
+
+        Args:
+            package_name: the name of the top level package
+            project_dir: the maturin project that provides the package. Found from `sys.path` if not given
+
+        Returns:
+            whether the package was rebuilt
+        """
+        if project_dir is not None:
+            spec, rebuilt = self._rebuild_project(package_name, project_dir)
+        else:
+            candidates = self._project_index.get_candidates(package_name, self._get_search_path_fingerprint())
+            spec, rebuilt = self._rebuild_first_candidate(package_name, candidates)
+        if spec is None:
+            msg = f'could not find a maturin project for package "{package_name}"'
+            raise ImportHookError(msg)
+        return rebuilt
+
+    def start_background_prebuild(self, max_jobs: int = 2) -> None:
+        """Check (and rebuild if necessary) every project that can be found from `sys.path` in a background thread.
+
+        Up to `max_jobs` projects are checked or built at the same time. Importing a package that is being prebuilt
+        waits for the prebuild to finish instead of checking the project again.
+        """
+        thread = threading.Thread(
+            target=self._prebuild_all,
+            args=(max_jobs,),
+            name="maturin_import_hook_prebuild",
+            daemon=True,
+        )
+        thread.start()
+
+    def _prebuild_all(self, max_jobs: int) -> None:
+        start = time.perf_counter()
+        all_candidates = self._project_index.get_all_candidates(sys.path)
+        executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="maturin_import_hook_prebuild")
+        with self._prebuilds_lock:
+            for package_name, candidates in all_candidates.items():
+                # packages that were imported before the prebuild started have already been checked
+                if package_name not in sys.modules and package_name not in self._prebuilds:
+                    self._prebuilds[package_name] = executor.submit(self._prebuild_package, package_name, candidates)
+            logger.debug("prebuilding %d packages", len(self._prebuilds))
+        executor.shutdown(wait=True)
+        logger.info("finished prebuilding packages in %.3fs", time.perf_counter() - start)
+
+    def _prebuild_package(
+        self, package_name: str, candidates: List["_ProjectCandidate"]
+    ) -> Tuple[Optional[ModuleSpec], bool]:
+        start = time.perf_counter()
+        try:
+            spec, rebuilt = self._rebuild_first_candidate(package_name, candidates)
+        except Exception as e:  # noqa: BLE001
+            logger.error('failed to prebuild package "%s": %s', package_name, e)
+            return None, False
+        if spec is not None:
+            logger.info(
+                '%s package "%s" in %.3fs',
+                "prebuilt" if rebuilt else "checked",
+                package_name,
+                time.perf_counter() - start,
+            )
+        return spec, rebuilt
+
+    def _wait_for_prebuild(self, package_name: str) -> Optional[Tuple[Optional[ModuleSpec], bool]]:
+        """Wait for the prebuild of the given package if it is in progress.
+
+        Returns:
+            the result of the prebuild if it was waited on. A prebuild that finished before the import started may
+            be outdated, so the package is checked again in that case
+        """
+        with self._prebuilds_lock:
+            prebuild = self._prebuilds.pop(package_name, None)
+        if prebuild is None or prebuild.done():
+            return None
+        logger.info('waiting for package "%s" to be prebuilt', package_name)
+        # failures are logged by the prebuild and the package is checked again when it is imported
+        return prebuild.result()
+
     def _handle_reload(self, package_name: str, spec: ModuleSpec) -> ModuleSpec:
         """trick python into reloading the extension module by symlinking the project
 
@@ -223,6 +430,9 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
     ) -> Tuple[Optional[ModuleSpec], bool]:
         resolved = self._resolver.resolve(project_dir)
         if resolved is None:
+            if self._file_watcher is not None:
+                # the project may have been removed
+                self._file_watcher.unwatch(str(project_dir))
             return None, False
         logger.debug(
             'resolved package "%s", module "%s"',
@@ -246,18 +456,66 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
 
         logger.debug('importing project "%s" as "%s"', project_dir, package_name)
 
-        with self._build_cache.lock() as build_cache:
-            settings = self.get_settings(package_name, project_dir)
+        settings = self.get_settings(package_name, project_dir)
+        # checking freshness does not require the lock so that importing packages that are already up to date
+        # does not wait for other processes
+        read_only_build_cache = self._build_cache.read_only()
+        check_start = time.perf_counter()
+        spec, reason = self._get_spec_for_up_to_date_package(
+            package_name, project_dir, resolved, settings, read_only_build_cache
+        )
+        freshness_check_seconds = time.perf_counter() - check_start
+        if spec is not None:
+            read_only_build_cache.record_up_to_date(
+                project_dir, package_name, freshness_check_seconds, settings.to_args("develop")
+            )
+            return spec, False
+        logger.debug('package "%s" may need rebuilding because: %s', package_name, reason)
+
+        if self._enable_background_rebuild and not self._force_rebuild:
+            stale_spec = self._start_background_rebuild(package_name, project_dir, resolved, settings)
+            if stale_spec is not None:
+                logger.warning(
+                    'using a stale build of "%s" (%s) while it is rebuilt in the background. '
+                    "Reload the package or restart once the build has finished to use the new build",
+                    package_name,
+                    reason,
+                )
+                return stale_spec, False
+
+        return self._build_project(package_name, project_dir, resolved, settings, freshness_check_seconds)
+
+    def _build_project(
+        self,
+        package_name: str,
+        project_dir: Path,
+        resolved: MaturinProject,
+        settings: MaturinSettings,
+        freshness_check_seconds: float = 0.0,
+    ) -> Tuple[ModuleSpec, bool]:
+        """`freshness_check_seconds` is the time already spent checking whether the package is up to date before
+        taking the lock"""
+        with self._build_cache.lock(project_dir) as build_cache:
+            # another process may have rebuilt the package while this process was waiting for the lock
+            check_start = time.perf_counter()
             spec, reason = self._get_spec_for_up_to_date_package(
                 package_name, project_dir, resolved, settings, build_cache
             )
+            freshness_check_seconds += time.perf_counter() - check_start
             if spec is not None:
+                build_cache.record_up_to_date(
+                    project_dir, package_name, freshness_check_seconds, settings.to_args("develop")
+                )
                 return spec, False
             logger.debug('package "%s" will be rebuilt because: %s', package_name, reason)
 
             logger.info('building "%s"', package_name)
+            build_start_ns = time.time_ns()
             start = time.perf_counter()
-            maturin_output = develop_build_project(self.find_maturin(), resolved.cargo_manifest_path, settings)
+            with build_cache.record_build(
+                project_dir, package_name, reason, freshness_check_seconds, settings.to_args("develop")
+            ):
+                maturin_output = develop_build_project(self.find_maturin(), resolved.cargo_manifest_path, settings)
             logger.debug(
                 'compiled project "%s" in %.3fs',
                 package_name,
@@ -281,17 +539,72 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
                     logger.error("could not get installed package mtime")
                 else:
                     build_status = BuildStatus(mtime, project_dir, settings.to_args("develop"), maturin_output)
-                    build_cache.store_build_status(build_status)
+                    source_snapshot = self._get_dep_info_snapshot(resolved, project_dir, settings)
+                    if source_snapshot is None:
+                        source_snapshot = self._file_searcher.get_source_snapshot(
+                            project_dir, resolved.all_path_dependencies, installed_package_root, None
+                        )
+                    else:
+                        build_status.source_paths_from_dep_info = True
+                    if self._enable_content_hashing:
+                        source_snapshot.compute_content_hashes(build_start_ns)
+                    build_cache.store_build_status(build_status, source_snapshot)
 
         return spec, True
 
+    def _start_background_rebuild(
+        self,
+        package_name: str,
+        project_dir: Path,
+        resolved: MaturinProject,
+        settings: MaturinSettings,
+    ) -> Optional[ModuleSpec]:
+        """Start rebuilding the package in a background thread unless a build is already in progress.
+
+        Returns:
+            the spec of the current (stale) installation, or None if there is no installation that can be imported
+            while the package is rebuilt, in which case no build is started
+        """
+        stale_spec = _find_spec_for_package(package_name)
+        if stale_spec is None or _find_installed_package_root(resolved, stale_spec) is None:
+            return None
+        with self._background_builds_lock:
+            background_build = self._background_builds.get(package_name)
+            if background_build is None or not background_build.is_running:
+                build = functools.partial(self._build_project, package_name, project_dir, resolved, settings)
+                self._background_builds[package_name] = BackgroundBuild(package_name, project_dir, build)
+        return stale_spec
+
+    def get_background_build(self, package_name: str) -> Optional["BackgroundBuild"]:
+        """Get the status of the most recent background build of the given package (if any).
+
+        Background builds are only started if `enable_background_rebuild=True`
+        """
+        with self._background_builds_lock:
+            return self._background_builds.get(package_name)
+
+    def _get_dep_info_snapshot(
+        self, resolved: MaturinProject, project_dir: Path, settings: MaturinSettings
+    ) -> Optional[FileSnapshot]:
+        """take a snapshot of the files listed in the dep-info file written by cargo during the last build"""
+        if not self._enable_dep_info_tracking:
+            return None
+        source_paths = get_dep_info_source_paths(resolved.cargo_manifest_path, settings)
+        if source_paths is None:
+            logger.info("dep-info not available for %s. Falling back to searching for source files", project_dir)
+            return None
+        # the configuration read by maturin is not an input to cargo
+        source_paths.append(project_dir / "pyproject.toml")
+        source_paths.extend(path / "Cargo.toml" for path in resolved.all_path_dependencies)
+        return FileSnapshot.from_paths(dict.fromkeys(source_paths))
+
     def _get_spec_for_up_to_date_package(
         self,
         package_name: str,
         project_dir: Path,
         resolved: MaturinProject,
         settings: MaturinSettings,
-        build_cache: LockedBuildCache,
+        build_cache: ReadOnlyBuildCache,
     ) -> Tuple[Optional[ModuleSpec], Optional[str]]:
         """Return a spec for the package if it exists and is newer than the source
         code that it is derived from.
@@ -317,11 +630,43 @@ class MaturinProjectImporter(importlib.abc.MetaPathFinder):
         if build_status.maturin_args != settings.to_args("develop"):
             return None, "current maturin args do not match the previous build"
 
+        # stop at the first change found unless debugging, in which case every changed file is logged
+        stop_early = not logger.isEnabledFor(logging.DEBUG)
         installed_paths = self._file_searcher.get_installation_paths(installed_package_root)
-        source_paths = self._file_searcher.get_source_paths(
-            project_dir, resolved.all_path_dependencies, installed_package_root
-        )
-        freshness = get_installation_freshness(source_paths, installed_paths, build_status)
+        build_snapshot = build_cache.get_source_snapshot(project_dir)
+        if build_snapshot is None:
+            if self._file_watcher is not None:
+                self._file_watcher.unwatch(str(project_dir))
+            source_paths = self._file_searcher.get_source_paths(
+                project_dir, resolved.all_path_dependencies, installed_package_root
+            )
+            freshness = get_installation_freshness(source_paths, installed_paths, build_status, stop_early=stop_early)
+        elif self._file_watcher is not None and self._file_watcher.is_clean(str(project_dir)):
+            logger.debug("no changes to the source files since the last check")
+            # the installation is still checked because it may have been modified by another process
+            freshness = get_snapshot_freshness(build_snapshot, build_snapshot, installed_paths, build_status)
+        else:
+            # watching starts before searching so that changes made during the search are not missed
+            is_watched = False
+            if self._file_watcher is not None:
+                if build_snapshot.dir_paths:
+                    is_watched = self._file_watcher.watch(str(project_dir), build_snapshot.dir_paths)
+                else:
+                    self._file_watcher.unwatch(str(project_dir))
+            recent_changes = get_recent_source_changes(build_snapshot) if stop_early else None
+            if recent_changes is not None:
+                freshness = recent_changes
+            elif build_status.source_paths_from_dep_info:
+                # only the files that the last build was derived from can affect the next build
+                current_snapshot = FileSnapshot.from_paths(map(Path, build_snapshot.paths))
+                freshness = get_snapshot_freshness(build_snapshot, current_snapshot, installed_paths, build_status)
+            else:
+                current_snapshot = self._file_searcher.get_source_snapshot(
+                    project_dir, resolved.all_path_dependencies, installed_package_root, build_snapshot
+                )
+                freshness = get_snapshot_freshness(build_snapshot, current_snapshot, installed_paths, build_status)
+                if freshness.is_fresh and is_watched and self._file_watcher is not None:
+                    self._file_watcher.mark_clean(str(project_dir), current_snapshot.dir_paths)
         if not freshness.is_fresh:
             return None, freshness.reason
 
@@ -369,47 +714,425 @@ def _is_installed_package(package_name: str) -> bool:
 def _is_editable_installed_package(project_dir: Path, package_name: str) -> bool:
     for path_str in site.getsitepackages():
         path = Path(path_str)
-        pth_file = path / f"{package_name}.pth"
-        if pth_file.is_file():
-            pth_link = Path(pth_file.read_text().strip())
+        index = _get_dist_info_index(path)
+        if index is None:
+            continue
+
+        pth_name = f"{package_name}.pth"
+        if pth_name in index.entry_names and (path / pth_name).is_file():
+            pth_link = Path((path / pth_name).read_text().strip())
             if project_dir == pth_link or project_dir in pth_link.parents:
                 return True
 
-        if (path / package_name).is_dir():
+        if package_name in index.entry_names and (path / package_name).is_dir():
             linked_package_dir, is_editable = _load_dist_info(path, package_name)
             return linked_package_dir == project_dir and is_editable
     return False
 
 
-@lru_cache(maxsize=4096)
-def _find_maturin_project_above(path: Path) -> Optional[Path]:
+_SearchPathFingerprint = Tuple[Tuple[str, int], ...]
+
+
+def _get_search_path_fingerprint(search_paths: Sequence[str]) -> _SearchPathFingerprint:
+    """Obtain a value that changes whenever the search paths change or entries are added to or removed from
+    any of the search path directories (eg when a package is installed or uninstalled).
+    """
+    fingerprint = []
+    for search_path in search_paths:
+        # the empty string refers to the current working directory
+        path = search_path or os.getcwd()  # noqa: PTH109
+        fingerprint.append((path, _get_mtime_ns(path)))
+    return tuple(fingerprint)
+
+
+@dataclass
+class _ProjectCandidate:
+    """A maturin project which may provide a package, found from one of the search paths"""
+
+    project_dir: Path
+    search_path: Path
+    # whether the project is linked by an editable dist-info. None if the project was found above the search path
+    is_editable: Optional[bool]
+
+
+class _ProjectIndex:
+    """An index of the maturin projects that can be found from the search paths (sys.path).
+
+    Discovering projects requires listing dist-info directories, reading `direct_url.json` files and parsing project
+    manifests. The results are persisted to a file in the build cache so that other processes can reuse them.
+    Only the dist-info of the package being imported is read, and the result for each distribution is reused until
+    its dist-info directory is replaced or modified. Projects found above each search path are validated using the
+    mtimes of the directories above the search path and projects are validated using the mtimes of their manifests.
+    The index is shared by processes with different search paths, so entries are only removed once their search path
+    has not been used by any process for some time.
+    """
+
+    _VERSION = 3
+    # the time each search path was last used is only updated after this long so that the index is not rewritten by
+    # every process that uses it
+    _LAST_USED_RESOLUTION_SECONDS = 24 * 60 * 60
+    # entries for search paths that have not been used by any process for this long are removed
+    _MAX_UNUSED_SECONDS = 30 * 24 * 60 * 60
+
+    def __init__(self, index_path: Path, resolver: ProjectResolver) -> None:
+        self._index_path = index_path
+        self._resolver = resolver
+        self._loaded = False
+        self._modified = False
+        # search path => the time it was last used by any process sharing the index
+        self._last_used: Dict[str, float] = {}
+        # search path => {normalized distribution name => (dist-info name, dist-info mtime_ns, linked project dir,
+        # is_editable)} for every distribution whose dist-info has been read
+        self._search_paths: Dict[str, Dict[str, Tuple[str, int, Optional[str], bool]]] = {}
+        # search path => (project dir found above the search path, {checked path => mtime_ns})
+        self._projects_above: Dict[str, Tuple[Optional[str], Dict[str, int]]] = {}
+        # project dir => (package name, {manifest path => mtime_ns})
+        self._projects: Dict[str, Tuple[Optional[str], Dict[str, int]]] = {}
+        # package name => candidates, for the packages looked up since the search paths last changed
+        self._candidates: Optional[Tuple[_SearchPathFingerprint, Dict[str, List[_ProjectCandidate]]]] = None
+        self._all_candidates: Optional[Tuple[_SearchPathFingerprint, Dict[str, List[_ProjectCandidate]]]] = None
+        # the index may be used by the background prebuild at the same time as the importer
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def for_build_dir(build_dir: Path, resolver: ProjectResolver) -> "_ProjectIndex":
+        return _ProjectIndex(build_dir / "project_index.json", resolver)
+
+    @property
+    def index_path(self) -> Path:
+        return self._index_path
+
+    def clear(self) -> None:
+        """Discard the entries held in memory. The persisted entries are loaded (and validated) when next required"""
+        with self._lock:
+            self._loaded = False
+            self._modified = False
+            self._last_used.clear()
+            self._search_paths.clear()
+            self._projects_above.clear()
+            self._projects.clear()
+            self._candidates = None
+            self._all_candidates = None
+
+    def get_candidates(self, package_name: str, fingerprint: _SearchPathFingerprint) -> List[_ProjectCandidate]:
+        """Obtain the projects that may provide the given package in the order they should be searched"""
+        with self._lock:
+            if self._all_candidates is not None and self._all_candidates[0] == fingerprint:
+                return self._all_candidates[1].get(package_name, [])
+            if self._candidates is None or self._candidates[0] != fingerprint:
+                self._candidates = (fingerprint, {})
+            candidates = self._candidates[1].get(package_name)
+            if candidates is None:
+                candidates = self._candidates[1][package_name] = self._find_candidates(package_name, fingerprint)
+            return candidates
+
+    def get_all_candidates(self, search_paths: Sequence[str]) -> Dict[str, List[_ProjectCandidate]]:
+        """Obtain the projects that may provide each package (updating any outdated entries)"""
+        fingerprint = _get_search_path_fingerprint(search_paths)
+        with self._lock:
+            if self._all_candidates is None or self._all_candidates[0] != fingerprint:
+                self._all_candidates = (fingerprint, self._find_all_candidates(fingerprint))
+            return self._all_candidates[1]
+
+    def rebuild(self, search_paths: Sequence[str]) -> Dict[str, List[_ProjectCandidate]]:
+        """Discard the entries held in memory and re-discover the projects that can be found from the given search
+        paths. The persisted entries for other search paths are kept"""
+        with self._lock:
+            self.clear()
+            # do not load the persisted entries and overwrite them once re-discovered
+            self._loaded = True
+            self._modified = True
+            return self.get_all_candidates(search_paths)
+
+    def _find_candidates(self, package_name: str, fingerprint: _SearchPathFingerprint) -> List[_ProjectCandidate]:
+        self._load()
+        candidates = []
+        for search_path_str, mtime_ns in fingerprint:
+            self._mark_used(search_path_str)
+            search_path = Path(search_path_str)
+            if mtime_ns != -1:
+                project_dir, is_editable = self._get_dist_info_project(search_path_str, package_name)
+                if project_dir is not None and self._get_package_name(project_dir) == package_name:
+                    candidates.append(_ProjectCandidate(project_dir, search_path, is_editable))
+
+            project_dir = self._get_project_above(search_path_str)
+            if project_dir is not None and self._get_package_name(project_dir) == package_name:
+                candidates.append(_ProjectCandidate(project_dir, search_path, None))
+        self._save()
+        return candidates
+
+    def _find_all_candidates(self, fingerprint: _SearchPathFingerprint) -> Dict[str, List[_ProjectCandidate]]:
+        self._load()
+        all_candidates: Dict[str, List[_ProjectCandidate]] = {}
+        for search_path_str, mtime_ns in fingerprint:
+            self._mark_used(search_path_str)
+            search_path = Path(search_path_str)
+            dist_info_index = _get_dist_info_index(search_path) if mtime_ns != -1 else None
+            distribution_names = [] if dist_info_index is None else dist_info_index.distribution_names()
+            distributions = self._search_paths.setdefault(search_path_str, {})
+            for removed_name in distributions.keys() - set(distribution_names):
+                del distributions[removed_name]
+                self._modified = True
+            for distribution_name in distribution_names:
+                project_dir, is_editable = self._get_dist_info_project(search_path_str, distribution_name)
+                if project_dir is not None:
+                    package_name = self._get_package_name(project_dir)
+                    if package_name is not None:
+                        candidate = _ProjectCandidate(project_dir, search_path, is_editable)
+                        all_candidates.setdefault(package_name, []).append(candidate)
+
+            project_dir = self._get_project_above(search_path_str)
+            if project_dir is not None:
+                package_name = self._get_package_name(project_dir)
+                if package_name is not None:
+                    candidate = _ProjectCandidate(project_dir, search_path, None)
+                    all_candidates.setdefault(package_name, []).append(candidate)
+        self._save()
+        return all_candidates
+
+    def _get_dist_info_project(self, search_path: str, distribution_name: str) -> Tuple[Optional[Path], bool]:
+        """Obtain the project linked by the dist-info of the given distribution, only reading the dist-info if it has
+        not been read before or has changed since"""
+        distributions = self._search_paths.setdefault(search_path, {})
+        normalized_name = _normalize_distribution_name(distribution_name)
+        dist_info_index = _get_dist_info_index(Path(search_path))
+        dist_info_path = None if dist_info_index is None else dist_info_index.get_dist_info_path(distribution_name)
+        if dist_info_index is None or dist_info_path is None:
+            if distributions.pop(normalized_name, None) is not None:
+                self._modified = True
+            return None, False
+
+        mtime_ns = _get_mtime_ns(str(dist_info_path))
+        entry = distributions.get(normalized_name)
+        if entry is None or entry[0] != dist_info_path.name or entry[1] != mtime_ns:
+            project_dir, is_editable = _load_dist_info(dist_info_index.directory, distribution_name)
+            entry = (dist_info_path.name, mtime_ns, None if project_dir is None else str(project_dir), is_editable)
+            distributions[normalized_name] = entry
+            self._modified = True
+        return (None if entry[2] is None else Path(entry[2])), entry[3]
+
+    def _get_project_above(self, search_path: str) -> Optional[Path]:
+        entry = self._projects_above.get(search_path)
+        if entry is None or not all(_get_mtime_ns(path) == mtime_ns for path, mtime_ns in entry[1].items()):
+            project_dir, checked_paths = _find_maturin_project_above(Path(search_path))
+            entry = (
+                None if project_dir is None else str(project_dir),
+                {str(p): _get_mtime_ns(str(p)) for p in checked_paths},
+            )
+            self._projects_above[search_path] = entry
+            self._modified = True
+        return None if entry[0] is None else Path(entry[0])
+
+    def _mark_used(self, search_path: str) -> None:
+        now = time.time()
+        if now - self._last_used.get(search_path, 0.0) > self._LAST_USED_RESOLUTION_SECONDS:
+            self._last_used[search_path] = now
+            self._modified = True
+
+    def _prune(self) -> None:
+        """Remove the entries for search paths that have not been used recently so that the index does not grow
+        without bound. Processes with different search paths share the index so entries are not removed just because
+        the current process does not use them.
+        """
+        cutoff = time.time() - self._MAX_UNUSED_SECONDS
+        for search_path in [p for p, last_used in self._last_used.items() if last_used < cutoff]:
+            del self._last_used[search_path]
+        for entries in (self._search_paths, self._projects_above):
+            for search_path in [p for p in entries if p not in self._last_used]:
+                del entries[search_path]
+        used_project_dirs = {
+            entry[2] for distributions in self._search_paths.values() for entry in distributions.values() if entry[2]
+        }
+        used_project_dirs.update(project_dir for project_dir, _ in self._projects_above.values() if project_dir)
+        for project_dir in [p for p in self._projects if p not in used_project_dirs]:
+            del self._projects[project_dir]
+
+    def _get_package_name(self, project_dir: Path) -> Optional[str]:
+        entry = self._projects.get(str(project_dir))
+        if entry is not None and all(
+            _get_mtime_ns(manifest_path) == mtime_ns for manifest_path, mtime_ns in entry[1].items()
+        ):
+            return entry[0]
+
+        resolved = self._resolver.resolve(project_dir)
+        manifest_paths = [project_dir / "pyproject.toml"]
+        if resolved is not None:
+            manifest_paths.append(resolved.cargo_manifest_path)
+        package_name = None if resolved is None else resolved.package_name
+        self._projects[str(project_dir)] = (package_name, {str(p): _get_mtime_ns(str(p)) for p in manifest_paths})
+        self._modified = True
+        return package_name
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._read_entries()
+
+    def _read_entries(self) -> None:
+        """Add the persisted entries that are not held in memory (eg those written by other processes since the index
+        was loaded). Entries held in memory take precedence.
+        """
+        try:
+            with self._index_path.open("rb") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.debug("failed to load project index %s: %r", self._index_path, e)
+            return
+        if not isinstance(data, dict) or data.get("version") != self._VERSION:
+            logger.debug("ignoring project index with unsupported version: %s", self._index_path)
+            return
+        try:
+            last_used = {str(search_path): float(t) for search_path, t in data["last_used"].items()}
+            search_paths = {
+                str(search_path): {
+                    str(name): (str(dist_info_name), int(mtime_ns), project_dir, bool(is_editable))
+                    for name, (dist_info_name, mtime_ns, project_dir, is_editable) in distributions.items()
+                }
+                for search_path, distributions in data["search_paths"].items()
+            }
+            projects_above = {
+                str(search_path): (project_dir, dict(checked_mtimes))
+                for search_path, (project_dir, checked_mtimes) in data["projects_above"].items()
+            }
+            projects = {
+                str(project_dir): (package_name, dict(manifest_mtimes))
+                for project_dir, (package_name, manifest_mtimes) in data["projects"].items()
+            }
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.debug("failed to parse project index %s: %r", self._index_path, e)
+            return
+        for search_path, t in last_used.items():
+            self._last_used[search_path] = max(t, self._last_used.get(search_path, t))
+        for search_path, distributions in search_paths.items():
+            self._search_paths.setdefault(search_path, distributions)
+        for search_path, project_above in projects_above.items():
+            self._projects_above.setdefault(search_path, project_above)
+        for project_dir, project in projects.items():
+            self._projects.setdefault(project_dir, project)
+
+    def _save(self) -> None:
+        if not self._modified:
+            return
+        # other processes may have added entries for different search paths since the index was loaded
+        self._read_entries()
+        self._prune()
+        data = {
+            "version": self._VERSION,
+            "last_used": self._last_used,
+            "search_paths": self._search_paths,
+            "projects_above": self._projects_above,
+            "projects": self._projects,
+        }
+        try:
+            write_file_atomically(self._index_path, json.dumps(data))
+        except OSError as e:
+            logger.debug("failed to write project index %s: %r", self._index_path, e)
+        else:
+            self._modified = False
+
+
+def _get_mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns  # noqa: PTH116
+    except (OSError, ValueError):
+        return -1
+
+
+def _find_maturin_project_above(path: Path) -> Tuple[Optional[Path], List[Path]]:
+    """Find the maturin project containing the given path (if any).
+
+    Returns:
+        the project dir and the paths whose mtimes change if the result may change: each directory that was
+        checked, along with `pyproject.toml` and `rust/` for directories which have a `pyproject.toml`
+    """
+    checked_paths = []
     for search_path in itertools.chain((path,), path.parents):
-        if is_maybe_maturin_project(search_path):
-            return search_path
-    return None
+        checked_paths.append(search_path)
+        if (search_path / "pyproject.toml").is_file():
+            checked_paths.extend((search_path / "pyproject.toml", search_path / "rust"))
+            if is_maybe_maturin_project(search_path):
+                return search_path, checked_paths
+    return None, checked_paths
+
 
+class _DistInfoIndex:
+    """The `*.dist-info` directories found in a directory (eg site-packages) indexed by normalized distribution name.
 
-def _find_dist_info_path(directory: Path, package_name: str) -> Optional[Path]:
+    The directory is listed once and the index is only rebuilt when the mtime of the directory changes.
+    """
+
+    def __init__(self, directory: Path, mtime_ns: int, entry_names: Set[str]) -> None:
+        self.directory = directory
+        self.mtime_ns = mtime_ns
+        self.entry_names = entry_names
+        self._dist_info_names: Dict[str, str] = {}
+        for name in sorted(entry_names):
+            if name.endswith(".dist-info"):
+                # dist-info directories are named `{name}-{version}.dist-info`
+                distribution_name = name.partition("-")[0]
+                self._dist_info_names.setdefault(_normalize_distribution_name(distribution_name), name)
+        # normalized name => parsed direct_url.json (loaded lazily since most distributions do not have one)
+        self._direct_urls: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def distribution_names(self) -> List[str]:
+        return list(self._dist_info_names)
+
+    def get_dist_info_path(self, package_name: str) -> Optional[Path]:
+        name = self._dist_info_names.get(_normalize_distribution_name(package_name))
+        return None if name is None else self.directory / name
+
+    def get_direct_url(self, package_name: str) -> Optional[Dict[str, Any]]:
+        """Obtain the parsed contents of `direct_url.json` for the given package (if it exists)"""
+        normalized_name = _normalize_distribution_name(package_name)
+        if normalized_name not in self._direct_urls:
+            dist_info_path = self.get_dist_info_path(package_name)
+            direct_url = None
+            if dist_info_path is not None:
+                try:
+                    with (dist_info_path / "direct_url.json").open() as f:
+                        direct_url = json.load(f)
+                except (OSError, ValueError):
+                    pass
+            self._direct_urls[normalized_name] = direct_url if isinstance(direct_url, dict) else None
+        return self._direct_urls[normalized_name]
+
+
+_DIST_INFO_INDEXES: Dict[Path, _DistInfoIndex] = {}
+
+
+def _get_dist_info_index(directory: Path) -> Optional[_DistInfoIndex]:
     try:
-        names = os.listdir(directory)
-    except FileNotFoundError:
+        mtime_ns = directory.stat().st_mtime_ns
+    except OSError:
+        _DIST_INFO_INDEXES.pop(directory, None)
         return None
-    for name in names:
-        if name.startswith(package_name) and name.endswith(".dist-info"):
-            return Path(directory / name)
-    return None
+    index = _DIST_INFO_INDEXES.get(directory)
+    if index is None or index.mtime_ns != mtime_ns:
+        try:
+            entry_names = set(os.listdir(directory))
+        except OSError:
+            return None
+        index = _DistInfoIndex(directory, mtime_ns, entry_names)
+        _DIST_INFO_INDEXES[directory] = index
+    return index
+
+
+def _normalize_distribution_name(name: str) -> str:
+    """based on https://packaging.python.org/en/latest/specifications/binary-distribution-format/#escaping-and-unicode"""
+    return re.sub(r"[-_.]+", "_", name).lower()
 
 
 def _load_dist_info(
     path: Path, package_name: str, *, require_project_target: bool = True
 ) -> Tuple[Optional[Path], bool]:
-    dist_info_path = _find_dist_info_path(path, package_name)
-    if dist_info_path is None:
+    index = _get_dist_info_index(path)
+    if index is None:
         return None, False
-    try:
-        with (dist_info_path / "direct_url.json").open() as f:
-            dist_info_data = json.load(f)
-    except OSError:
+    dist_info_data = index.get_direct_url(package_name)
+    if dist_info_data is None:
         return None, False
     else:
         is_editable = dist_info_data.get("dir_info", {}).get("editable", False)
@@ -518,6 +1241,7 @@ class DefaultProjectFileSearcher(ProjectFileSearcher):
         source_excluded_dir_names: Optional[Set[str]] = None,
         source_excluded_dir_markers: Optional[Set[str]] = None,
         source_excluded_file_extensions: Optional[Set[str]] = None,
+        source_scan_threads: int = 1,
     ) -> None:
         """
         Args:
@@ -527,6 +1251,9 @@ class DefaultProjectFileSearcher(ProjectFileSearcher):
                 ignore (do not recurse into) directories that contain a file with this name (case sensitive)
             source_excluded_file_extensions: when searching for source files,
                 ignore files with these file extensions (case insensitive) (values should include the leading `.`)
+            source_scan_threads: the number of threads to use when searching for source files. Using multiple threads
+                is slower for small projects on local disks but can be much faster for large projects on
+                network filesystems
         """
         super().__init__()
         self._source_excluded_dir_names = (
@@ -544,6 +1271,7 @@ class DefaultProjectFileSearcher(ProjectFileSearcher):
             if source_excluded_file_extensions is not None
             else self.DEFAULT_SOURCE_EXCLUDED_FILE_EXTENSIONS
         )
+        self._source_scan_threads = source_scan_threads
 
     def get_source_paths(
         self,
@@ -569,6 +1297,44 @@ class DefaultProjectFileSearcher(ProjectFileSearcher):
                 if path not in excluded_files:
                     yield path
 
+    def get_source_snapshot(
+        self,
+        project_dir: Path,
+        all_path_dependencies: List[Path],
+        installed_package_root: Path,
+        previous_snapshot: Optional[FileSnapshot],
+    ) -> FileSnapshot:
+        if (
+            type(self).get_source_paths is not DefaultProjectFileSearcher.get_source_paths
+            or type(self).get_files_in_dir is not DefaultProjectFileSearcher.get_files_in_dir
+        ):
+            # respect customizations made by subclasses
+            return super().get_source_snapshot(
+                project_dir, all_path_dependencies, installed_package_root, previous_snapshot
+            )
+        return self._scan_source_files(
+            project_dir, all_path_dependencies, installed_package_root, previous_snapshot, None
+        )
+
+    def _scan_source_files(
+        self,
+        project_dir: Path,
+        all_path_dependencies: List[Path],
+        installed_package_root: Path,
+        previous_snapshot: Optional[FileSnapshot],
+        ignore_rules: Optional[GitignoreRules],
+    ) -> FileSnapshot:
+        return FileSnapshot.scan(
+            itertools.chain((project_dir,), all_path_dependencies),
+            {installed_package_root},
+            self._source_excluded_dir_names,
+            self._source_excluded_dir_markers,
+            self._source_excluded_file_extensions,
+            previous_snapshot,
+            self._source_scan_threads,
+            ignore_rules,
+        )
+
     def get_installation_paths(self, installed_package_root: Path) -> Iterator[Path]:
         if installed_package_root.is_dir():
             yield from self.get_files_in_dir(installed_package_root, set(), {"__pycache__"}, set(), {".pyc"})
@@ -592,7 +1358,9 @@ class DefaultProjectFileSearcher(ProjectFileSearcher):
 
         for dir_str, dirs, files in os.walk(root_path, topdown=True):
             dir_path = Path(dir_str)
-            include_dir = dir_path not in ignore_dirs and not any(dir_name in excluded_dir_markers for dir_name in dirs)
+            include_dir = dir_path not in ignore_dirs and not any(
+                name in excluded_dir_markers for name in itertools.chain(dirs, files)
+            )
 
             if include_dir:
                 dirs[:] = sorted(dir_name for dir_name in dirs if dir_name not in excluded_dir_names)
@@ -605,6 +1373,36 @@ class DefaultProjectFileSearcher(ProjectFileSearcher):
                 dirs.clear()  # do not recurse further into this directory
 
 
+class GitignoreProjectFileSearcher(DefaultProjectFileSearcher):
+    """a file searcher that additionally ignores the source files and directories that are ignored by `.gitignore`,
+    `.ignore` and `.git/info/exclude` files, for example large data or generated directories.
+
+    Ignore files in the parent directories of a project are used up to the root of the git repository.
+    Global git configuration such as `core.excludesFile` is not used.
+    """
+
+    def get_source_paths(
+        self,
+        project_dir: Path,
+        all_path_dependencies: List[Path],
+        installed_package_root: Path,
+    ) -> Iterator[Path]:
+        snapshot = self.get_source_snapshot(project_dir, all_path_dependencies, installed_package_root, None)
+        for path in snapshot.paths:
+            yield Path(path)
+
+    def get_source_snapshot(
+        self,
+        project_dir: Path,
+        all_path_dependencies: List[Path],
+        installed_package_root: Path,
+        previous_snapshot: Optional[FileSnapshot],
+    ) -> FileSnapshot:
+        return self._scan_source_files(
+            project_dir, all_path_dependencies, installed_package_root, previous_snapshot, GitignoreRules()
+        )
+
+
 IMPORTER: Optional[MaturinProjectImporter] = None
 
 
@@ -618,6 +1416,13 @@ def install(
     show_warnings: bool = True,
     file_searcher: Optional[ProjectFileSearcher] = None,
     enable_automatic_installation: bool = False,
+    enable_content_hashing: bool = False,
+    enable_file_watcher: bool = False,
+    enable_dep_info_tracking: bool = False,
+    enable_background_rebuild: bool = False,
+    enable_background_prebuild: bool = False,
+    max_prebuild_jobs: int = 2,
+    build_status_store: Literal["json", "sqlite"] = "json",
 ) -> MaturinProjectImporter:
     """Install an import hook for automatically rebuilding editable installed maturin projects.
 
@@ -630,12 +1435,30 @@ def install(
         force_rebuild: whether to always rebuild and skip checking whether anything has changed
         excluded_dir_names: directory names to exclude when determining whether a project has changed
             and so whether the extension module needs to be rebuilt
-        lock_timeout_seconds: a lock is required to prevent projects from being built concurrently.
+        lock_timeout_seconds: a lock is required to prevent the same project from being built concurrently.
             If the lock is not released before this timeout is reached the import hook stops waiting and aborts
         show_warnings: whether to show compilation warnings
         file_searcher: an object that specifies how to search for the source files and installed files of a project.
         enable_automatic_installation: whether to install detected packages using the import hook even if they
             are not already installed into the virtual environment or are installed in non-editable mode.
+        enable_content_hashing: record a hash of each source file when building so that files which are modified
+            without changing their contents (eg by `touch` or by switching git branches and back) do not trigger
+            a rebuild. Files are only hashed if their size and mtime do not already show that they are unchanged
+        enable_file_watcher: watch the source directories of projects for changes (using inotify, Linux only) so that
+            checking whether a project that has not changed is up to date does not require searching for source files.
+            Intended for long running processes that import or reload repeatedly
+        enable_dep_info_tracking: after each build, record the source files listed in the dep-info file written by
+            cargo so that checking whether a project is up to date only has to check those files (and the manifests)
+            instead of searching the project for source files. Falls back to searching if the dep-info is unavailable
+        enable_background_rebuild: if a package that is already installed is out of date, import the stale
+            installation immediately and rebuild the package in a background thread. The new build is used after the
+            package is reloaded or the interpreter is restarted. See `MaturinProjectImporter.get_background_build()`
+        enable_background_prebuild: check every project that can be found from `sys.path` (and rebuild any that are
+            out of date) in a background thread so that the work is done or in progress by the time they are imported
+        max_prebuild_jobs: the maximum number of projects to check or build at the same time when prebuilding
+        build_status_store: where to record the status of each build. "json" writes a file per project to the build
+            cache and "sqlite" uses a single SQLite database in WAL mode, which scales better to many projects and
+            concurrent processes
 
     """
     global IMPORTER
@@ -651,8 +1474,15 @@ def install(
         show_warnings=show_warnings,
         file_searcher=file_searcher,
         enable_automatic_installation=enable_automatic_installation,
+        enable_content_hashing=enable_content_hashing,
+        enable_file_watcher=enable_file_watcher,
+        enable_dep_info_tracking=enable_dep_info_tracking,
+        enable_background_rebuild=enable_background_rebuild,
+        build_status_store=build_status_store,
     )
     sys.meta_path.insert(0, IMPORTER)
+    if enable_background_prebuild:
+        IMPORTER.start_background_prebuild(max_prebuild_jobs)
     return IMPORTER
 
 
@@ -1,4 +1,6 @@
 import contextlib
+import dataclasses
+import functools
 import importlib
 import importlib.abc
 import importlib.machinery
@@ -9,23 +11,51 @@ import shutil
 import sys
 import tempfile
 import time
-from importlib.machinery import ExtensionFileLoader, ModuleSpec
+from importlib.machinery import ExtensionFileLoader, FileFinder, ModuleSpec, SourceFileLoader, SourcelessFileLoader
 from pathlib import Path
 from types import ModuleType
-from typing import TYPE_CHECKING, Iterator, Optional, Sequence, Union, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from maturin_import_hook._building import (
     BuildCache,
     BuildStatus,
-    LockedBuildCache,
+    ReadOnlyBuildCache,
+    build_extension_module,
     build_unpacked_wheel,
     find_maturin,
     get_installation_freshness,
+    get_recent_source_changes,
+    get_snapshot_freshness,
     maturin_output_has_warnings,
-    run_maturin,
 )
-from maturin_import_hook._common import LazySessionTemporaryDirectory
+from maturin_import_hook._cargo_manifest import (
+    get_dependencies_hash,
+    get_embedded_manifest_hash,
+    load_manifest,
+    merge_manifests,
+    parse_embedded_manifest,
+    remove_frontmatter,
+    to_toml,
+)
+from maturin_import_hook._common import LazySessionTemporaryDirectory, write_file_if_changed
+from maturin_import_hook._dep_info import get_dep_info_source_paths
+from maturin_import_hook._file_snapshot import FileSnapshot
 from maturin_import_hook._logging import logger
+from maturin_import_hook._module_tree import find_module_tree
 from maturin_import_hook._resolve_project import ProjectResolver, find_cargo_manifest
 from maturin_import_hook.error import ImportHookError
 from maturin_import_hook.settings import MaturinSettings
@@ -33,6 +63,21 @@ from maturin_import_hook.settings import MaturinSettings
 __all__ = ["MaturinRustFileImporter", "install", "uninstall", "IMPORTER"]
 
 
+# the project generated for each `.rs` file (equivalent to `maturin new --bindings pyo3`). Any manifest embedded in
+# the `.rs` file is merged into the Cargo.toml (which may override the pyo3 version requirement)
+_PYO3_VERSION = "^0.23.2"
+
+_PYPROJECT_TEMPLATE = """\
+[build-system]
+requires = ["maturin>=1.5,<2.0"]
+build-backend = "maturin"
+
+[project]
+name = "{crate_name}"
+dynamic = ["version"]
+"""
+
+
 class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
     """An import hook for loading .rs files as though they were regular python modules."""
 
@@ -45,15 +90,28 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
         force_rebuild: bool = False,
         lock_timeout_seconds: Optional[float] = 120,
         show_warnings: bool = True,
+        enable_content_hashing: bool = False,
+        enable_dep_info_tracking: bool = False,
+        build_status_store: Literal["json", "sqlite"] = "json",
     ) -> None:
         self._force_rebuild = force_rebuild
         self._enable_reloading = enable_reloading
         self._resolver = ProjectResolver()
         self._settings = settings
-        self._build_cache = BuildCache(build_dir, lock_timeout_seconds)
+        self._build_cache = BuildCache(build_dir, lock_timeout_seconds, build_status_store)
         self._show_warnings = show_warnings
+        self._enable_content_hashing = enable_content_hashing
+        self._enable_dep_info_tracking = enable_dep_info_tracking
         self._maturin_path: Optional[Path] = None
         self._reload_tmp_path = LazySessionTemporaryDirectory(prefix=type(self).__name__)
+        # directory => (directory mtime, stems of the .rs files in the directory)
+        self._rust_file_stems: Dict[str, Tuple[int, FrozenSet[str]]] = {}
+
+    def invalidate_caches(self) -> None:
+        """called by `importlib.invalidate_caches()`"""
+        logger.info("clearing cache")
+        self._resolver.clear_cache()
+        self._rust_file_stems.clear()
 
     def get_settings(self, module_path: str, source_path: Path) -> MaturinSettings:
         """This method can be overridden in subclasses to customize settings for specific projects."""
@@ -66,8 +124,11 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
         return self._maturin_path
 
     def get_source_files(self, source_path: Path) -> Iterator[Path]:
-        """this method can be overridden to rebuild when changes are made to files other than the main rs file"""
-        yield source_path
+        """this method can be overridden to rebuild when changes are made to files other than the main rs file.
+
+        By default the files of the module tree (found by following `mod` declarations and `include!` etc.) are used.
+        """
+        yield from find_module_tree(source_path)
 
     def generate_project_for_single_rust_file(
         self,
@@ -76,34 +137,65 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
         rust_file: Path,
         settings: MaturinSettings,
     ) -> Path:
-        """This method can be overridden in subclasses to customize project generation."""
-        if project_dir.exists():
-            shutil.rmtree(project_dir)
+        """This method can be overridden in subclasses to customize project generation.
 
-        success, output = run_maturin(self.find_maturin(), ["new", "--bindings", "pyo3", str(project_dir)])
-        if not success:
-            msg = "Failed to generate project for rust file"
-            raise ImportHookError(msg)
+        The project is updated in place and only files with changed contents are written, so cargo can reuse the
+        results of previous builds (including incremental compilation of the module crate).
 
-        if settings.features is not None:
-            available_features = [feature for feature in settings.features if "/" not in feature]
-            cargo_manifest = project_dir / "Cargo.toml"
-            cargo_manifest.write_text(
-                "{}\n[features]\n{}".format(
-                    cargo_manifest.read_text(),
-                    "\n".join(f"{feature} = []" for feature in available_features),
-                )
+        The other files of the module tree (eg declared with `mod my_submodule;`) are copied into `src/` with the same
+        layout relative to each other so that their paths resolve in the same way. Copies of files which are no longer
+        part of the module tree are removed.
+        """
+        module_tree = find_module_tree(rust_file)
+        tree_root = Path(os.path.commonpath([path.parent for path in module_tree]))
+        src_dir = project_dir / "src"
+        lib_path = src_dir / rust_file.parent.relative_to(tree_root) / "lib.rs"
+        copy_paths = {lib_path}
+        for path in module_tree[1:]:
+            copy_path = src_dir / path.relative_to(tree_root)
+            if copy_path == lib_path:
+                msg = f'cannot generate a project for "{rust_file}" because the module tree contains "{path}"'
+                raise ImportHookError(msg)
+            write_file_if_changed(copy_path, path.read_bytes())
+            copy_paths.add(copy_path)
+        _remove_stale_files(src_dir, copy_paths)
+
+        crate_name = project_dir.name
+        source = rust_file.read_text(encoding="utf-8")
+        cargo_manifest = _generate_cargo_manifest(
+            crate_name, lib_path.relative_to(project_dir).as_posix(), parse_embedded_manifest(source), settings
+        )
+        manifest_changed = write_file_if_changed(project_dir / "Cargo.toml", to_toml(cargo_manifest))
+        lockfile_path = project_dir / "Cargo.lock"
+        if manifest_changed or not lockfile_path.exists():
+            # start from the versions resolved for another module with the same dependencies (if any) so that their
+            # compiled artifacts in the shared target dir can be reused
+            shared_lockfile_path = self._build_cache.read_only().shared_lockfile_path(
+                get_dependencies_hash(cargo_manifest)
             )
-
-        shutil.copy(rust_file, project_dir / "src/lib.rs")
+            if shared_lockfile_path.exists():
+                write_file_if_changed(lockfile_path, shared_lockfile_path.read_bytes())
+        write_file_if_changed(project_dir / "pyproject.toml", _PYPROJECT_TEMPLATE.format(crate_name=crate_name))
+        write_file_if_changed(lib_path, remove_frontmatter(source))
         return project_dir
 
+    def path_hook(self) -> Callable[[str], importlib.abc.PathEntryFinder]:
+        """Obtain a hook for `sys.path_hooks` that finds `.rs` files (as well as regular python modules) using the
+        per-directory caching of `importlib.machinery.FileFinder` instead of searching every path in `find_spec`.
+        """
+        rust_file_loader = functools.partial(
+            _RustFileLoader, self._load_rust_file, self._handle_reload if self._enable_reloading else None
+        )
+        return FileFinder.path_hook((rust_file_loader, [".rs"]), *_get_default_file_loaders())  # type: ignore[arg-type]
+
     def find_spec(
         self,
         fullname: str,
         path: Optional[Sequence[Union[str, bytes]]] = None,
         target: Optional[ModuleType] = None,
     ) -> Optional[ModuleSpec]:
+        # unlike the project importer, stdlib modules are not skipped: a `.rs` file can shadow a stdlib module in the
+        # same way as a `.py` file and the search below only requires a cached directory listing per search path
         already_loaded = fullname in sys.modules
         if already_loaded and not self._enable_reloading:
             return self._handle_no_reload(fullname)
@@ -117,17 +209,19 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
 
         is_top_level_import = path is None
         if is_top_level_import:
-            search_paths = [Path(p) for p in sys.path]
+            search_paths = list(sys.path)
         else:
             assert path is not None
-            search_paths = [Path(os.fsdecode(p)) for p in path]
+            search_paths = [os.fsdecode(p) for p in path]
 
         module_name = fullname.rpartition(".")[2]
 
         spec = None
         rebuilt = False
         for search_path in search_paths:
-            single_rust_file_path = search_path / f"{module_name}.rs"
+            if module_name not in self._get_rust_file_stems(search_path):
+                continue
+            single_rust_file_path = Path(search_path) / f"{module_name}.rs"
             if single_rust_file_path.is_file():
                 spec, rebuilt = self._import_rust_file(fullname, module_name, single_rust_file_path)
                 if spec is not None:
@@ -148,6 +242,61 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
 
         return spec
 
+    def _get_rust_file_stems(self, directory: str) -> FrozenSet[str]:
+        """Obtain the names of the `.rs` files in the given directory without the extension.
+
+        Similar to `importlib.machinery.FileFinder`, the directory listing is cached and only refreshed when the
+        mtime of the directory changes so that searching for a module that does not exist does not require a
+        `stat` call for every candidate file.
+        """
+        # the empty string refers to the current working directory
+        directory = directory or os.getcwd()  # noqa: PTH109
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns  # noqa: PTH116
+        except (OSError, ValueError):
+            return frozenset()
+        cached = self._rust_file_stems.get(directory)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        try:
+            with os.scandir(directory) as it:
+                stems = frozenset(entry.name[:-3] for entry in it if entry.name.endswith(".rs"))
+        except (OSError, ValueError):
+            stems = frozenset()
+        self._rust_file_stems[directory] = (mtime_ns, stems)
+        return stems
+
+    def _load_rust_file(self, module_path: str, file_path: Path) -> ModuleSpec:
+        start = time.perf_counter()
+        spec, rebuilt = self._import_rust_file(module_path, module_path.rpartition(".")[2], file_path)
+        if spec is None:
+            msg = f'failed to import rust file "{file_path}" as "{module_path}"'
+            raise ImportHookError(msg)
+        duration = time.perf_counter() - start
+        if rebuilt:
+            logger.info('rebuilt and loaded module "%s" in %.3fs', module_path, duration)
+        else:
+            logger.debug('loaded module "%s" in %.3fs', module_path, duration)
+        return spec
+
+    def prebuild(self, file_path: Path, module_path: Optional[str] = None) -> bool:
+        """Check whether the given `.rs` file is up to date and rebuild it if necessary, without importing it.
+
+        Args:
+            file_path: the path to the `.rs` file
+            module_path: the name the module will be imported as. Defaults to the stem of the file
+
+        Returns:
+            whether the module was rebuilt
+        """
+        if module_path is None:
+            module_path = file_path.stem
+        spec, rebuilt = self._import_rust_file(module_path, module_path.rpartition(".")[2], file_path)
+        if spec is None:
+            msg = f'failed to build rust file "{file_path}"'
+            raise ImportHookError(msg)
+        return rebuilt
+
     def _handle_no_reload(self, module_path: str) -> Optional[ModuleSpec]:
         module = sys.modules[module_path]
         loader = getattr(module, "__loader__", None)
@@ -194,32 +343,72 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
     ) -> Tuple[Optional[ModuleSpec], bool]:
         logger.debug('importing rust file "%s" as "%s"', file_path, module_path)
 
-        with self._build_cache.lock() as build_cache:
-            output_dir = build_cache.tmp_project_dir(file_path, module_name)
-            logger.debug("output dir: %s", output_dir)
-            settings = self.get_settings(module_path, file_path)
-            dist_dir = output_dir / "dist"
-            package_dir = dist_dir / module_name
+        read_only_build_cache = self._build_cache.read_only()
+        output_dir = read_only_build_cache.tmp_project_dir(file_path, module_name)
+        logger.debug("output dir: %s", output_dir)
+        settings = self.get_settings(module_path, file_path)
+        # dependencies (eg pyo3) are compiled once and shared by every module unless a target dir is configured
+        use_shared_target_dir = settings.target_dir is None and "CARGO_TARGET_DIR" not in os.environ
+        if use_shared_target_dir:
+            settings = dataclasses.replace(settings, target_dir=str(read_only_build_cache.shared_target_dir))
+        dist_dir = output_dir / "dist"
+        package_dir = dist_dir / module_name
+
+        # checking freshness does not require the lock so that importing modules that are already up to date
+        # does not wait for other processes
+        check_start = time.perf_counter()
+        spec, reason = self._get_spec_for_up_to_date_extension_module(
+            package_dir, module_path, module_name, file_path, settings, read_only_build_cache
+        )
+        freshness_check_seconds = time.perf_counter() - check_start
+        if spec is not None:
+            read_only_build_cache.record_up_to_date(
+                file_path, module_path, freshness_check_seconds, settings.to_args("build")
+            )
+            return spec, False
+        logger.debug('module "%s" may need rebuilding because: %s', module_path, reason)
 
+        with self._build_cache.lock(file_path) as build_cache:
+            # another process may have rebuilt the module while this process was waiting for the lock
+            check_start = time.perf_counter()
             spec, reason = self._get_spec_for_up_to_date_extension_module(
                 package_dir, module_path, module_name, file_path, settings, build_cache
             )
+            freshness_check_seconds += time.perf_counter() - check_start
             if spec is not None:
+                build_cache.record_up_to_date(
+                    file_path, module_path, freshness_check_seconds, settings.to_args("build")
+                )
                 return spec, False
             logger.debug('module "%s" will be rebuilt because: %s', module_path, reason)
 
             logger.info('building "%s"', module_path)
             logger.debug('creating project for "%s" and compiling', file_path)
+            build_start_ns = time.time_ns()
             start = time.perf_counter()
-            project_dir = self.generate_project_for_single_rust_file(
-                module_path, output_dir / file_path.stem, file_path, settings
+            target_dir_lock = (
+                self._build_cache.lock_shared_target_dir() if use_shared_target_dir else contextlib.nullcontext()
             )
-            manifest_path = find_cargo_manifest(project_dir)
-            if manifest_path is None:
-                msg = f"cargo manifest not found in the project generated for {file_path}"
-                raise ImportHookError(msg)
-
-            maturin_output = build_unpacked_wheel(self.find_maturin(), manifest_path, dist_dir, settings)
+            with target_dir_lock:
+                with build_cache.record_build(
+                    file_path, module_path, reason, freshness_check_seconds, settings.to_args("build")
+                ):
+                    project_dir = self.generate_project_for_single_rust_file(
+                        module_path, output_dir / file_path.stem, file_path, settings
+                    )
+                    manifest_path = find_cargo_manifest(project_dir)
+                    if manifest_path is None:
+                        msg = f"cargo manifest not found in the project generated for {file_path}"
+                        raise ImportHookError(msg)
+
+                    # building the extension module directly avoids packaging and unpacking a wheel
+                    maturin_output = build_extension_module(manifest_path, dist_dir, module_name, settings)
+                    if maturin_output is None:
+                        maturin_output = build_unpacked_wheel(self.find_maturin(), manifest_path, dist_dir, settings)
+                # read before releasing the lock because another module with the same name may overwrite it
+                dep_info_paths = (
+                    get_dep_info_source_paths(manifest_path, settings) if self._enable_dep_info_tracking else None
+                )
             logger.debug(
                 'compiled "%s" in %.3fs',
                 file_path,
@@ -237,8 +426,22 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
                 file_path,
                 settings.to_args("build"),
                 maturin_output,
+                embedded_manifest_hash=_get_embedded_manifest_hash(file_path),
             )
-            build_cache.store_build_status(build_status)
+            _share_lockfile(manifest_path, build_cache)
+            source_paths = list(self.get_source_files(file_path))
+            if self._enable_dep_info_tracking:
+                if dep_info_paths is None:
+                    logger.info("dep-info not available for %s", file_path)
+                else:
+                    # the generated project contains copies of the source files, which are tracked by
+                    # `get_source_files()` instead
+                    source_paths.extend(p for p in dep_info_paths if not p.is_relative_to(project_dir))
+                    build_status.source_paths_from_dep_info = True
+            source_snapshot = FileSnapshot.from_paths(dict.fromkeys(source_paths))
+            if self._enable_content_hashing:
+                source_snapshot.compute_content_hashes(build_start_ns)
+            build_cache.store_build_status(build_status, source_snapshot)
             return (
                 _get_spec_for_extension_module(module_path, extension_module_path),
                 True,
@@ -251,7 +454,7 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
         module_name: str,
         source_path: Path,
         settings: MaturinSettings,
-        build_cache: LockedBuildCache,
+        build_cache: ReadOnlyBuildCache,
     ) -> Tuple[Optional[ModuleSpec], Optional[str]]:
         """Return a spec for the given module at the given search_dir if it exists and is newer than the source
         code that it is derived from.
@@ -271,10 +474,29 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
             return None, "source path in build status does not match the project dir"
         if build_status.maturin_args != settings.to_args("build"):
             return None, "current maturin args do not match the previous build"
-
-        freshness = get_installation_freshness(
-            self.get_source_files(source_path), (extension_module_path,), build_status
-        )
+        if build_status.embedded_manifest_hash != _get_embedded_manifest_hash(source_path):
+            return None, "embedded cargo manifest changed since the previous build"
+
+        # stop at the first change found unless debugging, in which case every changed file is logged
+        stop_early = not logger.isEnabledFor(logging.DEBUG)
+        build_snapshot = build_cache.get_source_snapshot(source_path)
+        if build_snapshot is None:
+            freshness = get_installation_freshness(
+                self.get_source_files(source_path), (extension_module_path,), build_status, stop_early=stop_early
+            )
+        else:
+            recent_changes = get_recent_source_changes(build_snapshot) if stop_early else None
+            if recent_changes is not None:
+                freshness = recent_changes
+            else:
+                # files added by `get_source_files()` since the last build are reported as changed. Files from the
+                # dep-info of the last build (if enabled) are checked as well
+                current_snapshot = FileSnapshot.from_paths(
+                    dict.fromkeys([*self.get_source_files(source_path), *map(Path, build_snapshot.paths)])
+                )
+                freshness = get_snapshot_freshness(
+                    build_snapshot, current_snapshot, (extension_module_path,), build_status
+                )
         if not freshness.is_fresh:
             return None, freshness.reason
 
@@ -298,6 +520,119 @@ class MaturinRustFileImporter(importlib.abc.MetaPathFinder):
             logger.debug(message, prefix, module_path, maturin_output)
 
 
+def _get_default_file_loaders() -> List[Tuple[Any, List[str]]]:
+    """The loaders used by the default `FileFinder` path hook (see `importlib._bootstrap_external`)"""
+    return [
+        (ExtensionFileLoader, importlib.machinery.EXTENSION_SUFFIXES),
+        (SourceFileLoader, importlib.machinery.SOURCE_SUFFIXES),
+        (SourcelessFileLoader, importlib.machinery.BYTECODE_SUFFIXES),
+    ]
+
+
+class _RustFileLoader(importlib.abc.Loader):
+    """A loader for `.rs` files found by a `FileFinder` when the importer is installed into `sys.path_hooks`.
+
+    Building is delegated to the importer so the project generation and caching is shared with the meta path mode.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str, Path], ModuleSpec],
+        handle_reload: Optional[Callable[[str, ModuleSpec], ModuleSpec]],
+        fullname: str,
+        path: str,
+    ) -> None:
+        self._load = load
+        self._handle_reload = handle_reload
+        self.name = fullname
+        self.path = path
+        self._extension_spec: Optional[ModuleSpec] = None
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        self._extension_spec = self._load(self.name, Path(self.path))
+        # point __file__ at the extension module like the meta path importer does
+        spec.origin = self._extension_spec.origin
+        assert self._extension_spec.loader is not None
+        return self._extension_spec.loader.create_module(self._extension_spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        if self._extension_spec is None:
+            # `importlib.reload()` calls exec_module on the existing module without calling create_module
+            if self._handle_reload is None:
+                logger.debug('module "%s" is already loaded and enable_reloading=False', self.name)
+                return
+            extension_spec = self._handle_reload(self.name, self._load(self.name, Path(self.path)))
+        else:
+            extension_spec = self._extension_spec
+        assert extension_spec.loader is not None
+        extension_spec.loader.exec_module(module)
+
+
+def _generate_cargo_manifest(
+    crate_name: str, lib_path: str, embedded_manifest: Dict[str, Any], settings: MaturinSettings
+) -> Dict[str, Any]:
+    manifest = merge_manifests(
+        {
+            "package": {"name": crate_name, "version": "0.1.0", "edition": "2021"},
+            "lib": {},
+            "dependencies": {"pyo3": {"version": _PYO3_VERSION, "features": ["extension-module"]}},
+        },
+        embedded_manifest,
+    )
+    for key in ("package", "lib", "dependencies"):
+        if not isinstance(manifest[key], dict):
+            msg = f'invalid embedded cargo manifest: "{key}" must be a table'
+            raise ImportHookError(msg)
+    # the library must be an extension module with the name that the module is imported as
+    manifest["package"]["name"] = crate_name
+    manifest["lib"].update({"name": crate_name, "path": lib_path, "crate-type": ["cdylib"]})
+    pyo3 = manifest["dependencies"]["pyo3"]
+    if isinstance(pyo3, str):
+        pyo3 = manifest["dependencies"]["pyo3"] = {"version": pyo3}
+    if isinstance(pyo3, dict) and "extension-module" not in pyo3.setdefault("features", []):
+        pyo3["features"].append("extension-module")
+
+    if settings.features is not None:
+        features = manifest.setdefault("features", {})
+        for feature in settings.features:
+            if "/" not in feature:
+                features.setdefault(feature, [])
+    return manifest
+
+
+def _get_embedded_manifest_hash(rust_file: Path) -> Optional[str]:
+    try:
+        return get_embedded_manifest_hash(rust_file.read_text(encoding="utf-8"))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _remove_stale_files(dir_path: Path, keep: Set[Path]) -> None:
+    """remove the files of a generated project which are not in `keep` (eg submodules removed from the module tree)"""
+    for root, dir_names, file_names in os.walk(dir_path, topdown=False):
+        root_path = Path(root)
+        for file_name in file_names:
+            path = root_path / file_name
+            if path not in keep:
+                logger.debug("removing stale file from generated project: %s", path)
+                path.unlink()
+        for dir_name in dir_names:
+            with contextlib.suppress(OSError):
+                # only succeeds if the directory is empty
+                (root_path / dir_name).rmdir()
+
+
+def _share_lockfile(manifest_path: Path, build_cache: ReadOnlyBuildCache) -> None:
+    """make the dependency versions resolved for a crate available to other crates with the same dependencies"""
+    try:
+        manifest = load_manifest(manifest_path)
+        lockfile = (manifest_path.parent / "Cargo.lock").read_bytes()
+    except (OSError, ImportHookError) as e:
+        logger.debug("failed to share lockfile of %s: %r", manifest_path, e)
+        return
+    write_file_if_changed(build_cache.shared_lockfile_path(get_dependencies_hash(manifest)), lockfile)
+
+
 def _find_extension_module(dir_path: Path, module_name: str, *, require: bool = False) -> Optional[Path]:
     # the suffixes include the platform tag and file extension eg '.cpython-311-x86_64-linux-gnu.so'
     for suffix in importlib.machinery.EXTENSION_SUFFIXES:
@@ -372,6 +707,7 @@ class _ExtensionModuleReloader(_RustFileExtensionFileLoader):
 
 
 IMPORTER: Optional[MaturinRustFileImporter] = None
+_PATH_HOOK: Optional[Callable[[str], importlib.abc.PathEntryFinder]] = None
 
 
 def install(
@@ -382,6 +718,10 @@ def install(
     force_rebuild: bool = False,
     lock_timeout_seconds: Optional[float] = 120,
     show_warnings: bool = True,
+    use_path_hooks: bool = False,
+    enable_content_hashing: bool = False,
+    enable_dep_info_tracking: bool = False,
+    build_status_store: Literal["json", "sqlite"] = "json",
 ) -> MaturinRustFileImporter:
     """Install the 'rust file' importer to import .rs files as though
     they were regular python modules.
@@ -393,15 +733,25 @@ def install(
             `$HOME/.cache/maturin_build_cache/<interpreter_hash>` in order of preference
         enable_reloading: enable workarounds to allow the extension modules to be reloaded with `importlib.reload()`
         force_rebuild: whether to always rebuild and skip checking whether anything has changed
-        lock_timeout_seconds: a lock is required to prevent projects from being built concurrently.
+        lock_timeout_seconds: a lock is required to prevent the same project from being built concurrently.
             If the lock is not released before this timeout is reached the import hook stops waiting and aborts
         show_warnings: whether to show compilation warnings
+        use_path_hooks: instead of installing into `sys.meta_path`, install a `sys.path_hooks` entry so that `.rs` files
+            are found by the standard per-directory `FileFinder` alongside regular python modules. This makes
+            searching for modules cheaper but `.rs` files no longer take precedence over modules found in earlier
+            search paths.
+        enable_content_hashing: record a hash of each source file when building so that files which are modified
+            without changing their contents (eg by `touch` or by switching git branches and back) do not trigger
+            a rebuild. Files are only hashed if their size and mtime do not already show that they are unchanged
+        enable_dep_info_tracking: after each build, also record the files listed in the dep-info file written by cargo
+            (eg files included with `include_str!`) so that modifying them triggers a rebuild
+        build_status_store: where to record the status of each build. "json" writes a file per project to the build
+            cache and "sqlite" uses a single SQLite database in WAL mode, which scales better to many projects and
+            concurrent processes
 
     """
-    global IMPORTER
-    if IMPORTER is not None:
-        with contextlib.suppress(ValueError):
-            sys.meta_path.remove(IMPORTER)
+    global IMPORTER, _PATH_HOOK
+    uninstall()
     IMPORTER = MaturinRustFileImporter(
         settings=settings,
         build_dir=build_dir,
@@ -409,19 +759,33 @@ def install(
         force_rebuild=force_rebuild,
         lock_timeout_seconds=lock_timeout_seconds,
         show_warnings=show_warnings,
+        enable_content_hashing=enable_content_hashing,
+        enable_dep_info_tracking=enable_dep_info_tracking,
+        build_status_store=build_status_store,
     )
-    sys.meta_path.insert(0, IMPORTER)
+    if use_path_hooks:
+        _PATH_HOOK = IMPORTER.path_hook()
+        sys.path_hooks.insert(0, _PATH_HOOK)
+        # finders already created for each search path would otherwise continue to be used
+        sys.path_importer_cache.clear()
+    else:
+        sys.meta_path.insert(0, IMPORTER)
     return IMPORTER
 
 
 def uninstall() -> None:
     """Uninstall the rust file importer import hook."""
-    global IMPORTER
+    global IMPORTER, _PATH_HOOK
     if IMPORTER is not None:
         with contextlib.suppress(ValueError):
             sys.meta_path.remove(IMPORTER)
         IMPORTER = None
+    if _PATH_HOOK is not None:
+        with contextlib.suppress(ValueError):
+            sys.path_hooks.remove(_PATH_HOOK)
+        sys.path_importer_cache.clear()
+        _PATH_HOOK = None
 
 
 def is_installed() -> bool:
-    return IMPORTER is not None and IMPORTER in sys.meta_path
+    return IMPORTER is not None and (IMPORTER in sys.meta_path or _PATH_HOOK in sys.path_hooks)
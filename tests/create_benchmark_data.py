@@ -114,7 +114,7 @@ start = time.perf_counter()
 {import_python_packages}
 
 end = time.perf_counter()
-print(f'took {{end - start:.6f}}s')
+print(f'took {{end - start:.6f}}s ({{(end - start) / {len(python_package_names)} * 1e6:.1f}}us per import)')
 """)
 
 
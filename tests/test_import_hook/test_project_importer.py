@@ -7,6 +7,7 @@ import shutil
 import site
 import subprocess
 import sys
+import time
 from collections.abc import Iterator
 from enum import Enum
 from pathlib import Path
@@ -15,7 +16,11 @@ from typing import Any
 
 import pytest
 
-from maturin_import_hook.project_importer import DefaultProjectFileSearcher, _load_dist_info
+from maturin_import_hook.project_importer import (
+    DefaultProjectFileSearcher,
+    GitignoreProjectFileSearcher,
+    _load_dist_info,
+)
 
 from .common import (
     IMPORT_HOOK_HEADER,
@@ -1305,6 +1310,73 @@ class TestDefaultProjectFileSearcher:
             paths = set(s.get_source_paths(project_dir, [], extension_path))
             assert paths == {project_dir / "source"}
 
+    def test_get_source_snapshot(self, workspace: Path) -> None:
+        project_dir = workspace / "project"
+        src_dir = project_dir / "src"
+        ignored_dir = project_dir / "ignored"
+        src_dir.mkdir(parents=True)
+        ignored_dir.mkdir()
+        (project_dir / "Cargo.toml").touch()
+        (src_dir / "lib.rs").touch()
+        (src_dir / "module.py").touch()
+        (ignored_dir / ".maturin_hook_ignore").touch()
+        (ignored_dir / "ignored.rs").touch()
+        extension_path = project_dir / "extension.so"
+        extension_path.touch()
+
+        s = DefaultProjectFileSearcher()
+        paths = set(s.get_source_paths(project_dir, [], extension_path))
+        assert paths == {project_dir / "Cargo.toml", src_dir / "lib.rs"}
+        snapshot = s.get_source_snapshot(project_dir, [], extension_path, None)
+        assert {Path(p) for p in snapshot.paths} == paths
+
+        # listings of directories that have not changed since the previous snapshot are reused
+        old_times = (time.time() - 100, time.time() - 100)
+        for path in (project_dir, src_dir, ignored_dir):
+            os.utime(path, old_times)
+        snapshot = s.get_source_snapshot(project_dir, [], extension_path, None)
+        (src_dir / "new.rs").touch()
+        os.utime(src_dir, old_times)
+        reused_snapshot = s.get_source_snapshot(project_dir, [], extension_path, snapshot)
+        assert {Path(p) for p in reused_snapshot.paths} == paths
+        assert snapshot.changed_paths(reused_snapshot) == []
+        new_snapshot = s.get_source_snapshot(project_dir, [], extension_path, None)
+        assert snapshot.changed_paths(new_snapshot) == [src_dir / "new.rs"]
+
+        os.utime(src_dir)
+        reused_snapshot = s.get_source_snapshot(project_dir, [], extension_path, snapshot)
+        assert snapshot.changed_paths(reused_snapshot) == [src_dir / "new.rs"]
+
+        # listings are not reused when the search arguments change
+        reused_snapshot = s.get_source_snapshot(project_dir, [], src_dir, snapshot)
+        assert {Path(p) for p in reused_snapshot.paths} == {project_dir / "Cargo.toml"}
+
+    def test_get_source_snapshot_threads(self, workspace: Path) -> None:
+        project_dir = workspace / "project"
+        dependency_dir = workspace / "dependency"
+        for i in range(10):
+            for j in range(5):
+                (project_dir / f"dir_{i}" / f"sub_{j}").mkdir(parents=True)
+                (project_dir / f"dir_{i}" / f"sub_{j}" / "lib.rs").touch()
+            (project_dir / f"dir_{i}" / "target").mkdir()
+            (project_dir / f"dir_{i}" / "target" / "lib.rs").touch()
+        (project_dir / "dir_3" / "CACHEDIR.TAG").touch()
+        dependency_dir.mkdir()
+        (dependency_dir / "lib.rs").touch()
+        extension_path = project_dir / "dir_5"
+
+        serial_snapshot = DefaultProjectFileSearcher().get_source_snapshot(
+            project_dir, [dependency_dir], extension_path, None
+        )
+        assert len(serial_snapshot) == 8 * 5 + 1
+        parallel_snapshot = DefaultProjectFileSearcher(source_scan_threads=4).get_source_snapshot(
+            project_dir, [dependency_dir], extension_path, None
+        )
+        assert parallel_snapshot.paths == serial_snapshot.paths
+        assert parallel_snapshot.dir_paths == serial_snapshot.dir_paths
+        assert parallel_snapshot.dir_flags == serial_snapshot.dir_flags
+        assert serial_snapshot.changed_paths(parallel_snapshot) == []
+
     def test_get_installation_paths(self, workspace: Path) -> None:
         s = DefaultProjectFileSearcher(
             source_excluded_dir_names={"foo"},
@@ -1332,6 +1404,69 @@ class TestDefaultProjectFileSearcher:
         }
 
 
+class TestGitignoreProjectFileSearcher:
+    def test_get_source_paths(self, workspace: Path) -> None:
+        repo_dir = workspace / "repo"
+        project_dir = repo_dir / "project"
+        dependency_dir = workspace / "dependency"
+        (repo_dir / ".git/info").mkdir(parents=True)
+        (repo_dir / ".git/info/exclude").write_text("excluded.rs\n")
+        (repo_dir / ".gitignore").write_text("*.log\n!keep.log\n/project/bench_output/\n")
+        for path in [
+            "Cargo.toml",
+            "excluded.rs",
+            "debug.log",
+            "keep.log",
+            "src/lib.rs",
+            "src/generated/out.rs",
+            "src/nested/ignored.rs",
+            "src/nested/kept.rs",
+            "bench_output/results.rs",
+            "data/a/b/large.bin",
+            "data/a/b/small.rs",
+        ]:
+            (project_dir / path).parent.mkdir(parents=True, exist_ok=True)
+            (project_dir / path).touch()
+        (project_dir / ".ignore").write_text("generated\n")
+        (project_dir / "data/.gitignore").write_text("**/*.bin\n")
+        (project_dir / "src/nested/.gitignore").write_text("*\n!kept.rs\n!.gitignore\n")
+        dependency_dir.mkdir()
+        (dependency_dir / "lib.rs").touch()
+        (dependency_dir / "out.log").touch()
+        extension_path = project_dir / "extension.so"
+
+        s = GitignoreProjectFileSearcher()
+        expected = {
+            project_dir / ".ignore",
+            project_dir / "Cargo.toml",
+            project_dir / "keep.log",
+            project_dir / "src/lib.rs",
+            project_dir / "src/nested/.gitignore",
+            project_dir / "src/nested/kept.rs",
+            project_dir / "data/.gitignore",
+            project_dir / "data/a/b/small.rs",
+            dependency_dir / "lib.rs",
+            # not in the same repository
+            dependency_dir / "out.log",
+        }
+        assert set(s.get_source_paths(project_dir, [dependency_dir], extension_path)) == expected
+
+        snapshot = s.get_source_snapshot(project_dir, [dependency_dir], extension_path, None)
+        assert {Path(p) for p in snapshot.paths} == expected
+        # ignored directories are not searched
+        assert str(project_dir / "bench_output") not in snapshot.dir_paths
+        assert str(project_dir / "src/generated") not in snapshot.dir_paths
+
+        # listings are not reused when the ignore files outside of the project change
+        old_times = (time.time() - 100, time.time() - 100)
+        for dir_path in snapshot.dir_paths:
+            os.utime(dir_path, old_times)
+        snapshot = s.get_source_snapshot(project_dir, [dependency_dir], extension_path, None)
+        (repo_dir / ".gitignore").write_text("*.log\n/project/bench_output/\n")
+        new_snapshot = s.get_source_snapshot(project_dir, [dependency_dir], extension_path, snapshot)
+        assert {Path(p) for p in new_snapshot.paths} == expected - {project_dir / "keep.log"}
+
+
 def _up_to_date_message(project_name: str) -> str:
     return f'package up to date: "{with_underscores(project_name)}"'
 
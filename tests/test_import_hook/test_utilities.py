@@ -1,18 +1,74 @@
 import hashlib
+import importlib
+import importlib.machinery
+import importlib.util
+import json
 import logging
 import os
 import platform
 import re
+import shutil
+import sqlite3
 import subprocess
+import sys
+import threading
 import time
 from pathlib import Path
+from textwrap import dedent
+from typing import Literal, Optional, Union
 
 import pytest
 
-from maturin_import_hook._building import BuildCache, BuildStatus, Freshness, get_installation_freshness
-from maturin_import_hook._resolve_project import _ProjectResolveError, _resolve_project, _TomlFile
+from maturin_import_hook import project_importer, rust_file_importer
+from maturin_import_hook._building import (
+    UP_TO_DATE_REASON,
+    BuildCache,
+    BuildHistoryEntry,
+    BuildStatus,
+    Freshness,
+    _SqliteBuildStatusStore,
+    build_extension_module,
+    find_cdylib_artifact,
+    get_installation_freshness,
+    get_recent_source_changes,
+    get_snapshot_freshness,
+    summarize_build_history,
+)
+from maturin_import_hook._cargo_manifest import (
+    find_embedded_manifest,
+    get_dependencies_hash,
+    get_embedded_manifest_hash,
+    load_manifest,
+    merge_manifests,
+    parse_embedded_manifest,
+    remove_frontmatter,
+    to_toml,
+)
+from maturin_import_hook._common import is_stdlib_module, write_file_atomically
+from maturin_import_hook._dep_info import get_dep_info_path, parse_dep_info
+from maturin_import_hook._file_snapshot import FileSnapshot
+from maturin_import_hook._file_watcher import FileWatcher
+from maturin_import_hook._gitignore import GitignoreRules
+from maturin_import_hook._module_tree import find_module_tree
+from maturin_import_hook._prebuild import prebuild
+from maturin_import_hook._resolve_project import (
+    MaturinProject,
+    ProjectResolver,
+    _ProjectResolveError,
+    _resolve_project,
+    _TomlFile,
+)
 from maturin_import_hook.error import ImportHookError
-from maturin_import_hook.project_importer import _load_dist_info, _uri_to_path
+from maturin_import_hook.project_importer import (
+    MaturinProjectImporter,
+    _get_search_path_fingerprint,
+    _load_dist_info,
+    _ProjectCandidate,
+    _ProjectIndex,
+    _SearchPathFingerprint,
+    _uri_to_path,
+)
+from maturin_import_hook.rust_file_importer import MaturinRustFileImporter, _share_lockfile
 from maturin_import_hook.settings import MaturinSettings
 
 from .common import (
@@ -291,6 +347,346 @@ class TestGetInstallationFreshness:
         freshness = get_installation_freshness([source_1, source_2], [install_1, install_2], s)
         assert freshness == Freshness(False, "installation is out of date", install_1, source_2)
 
+    def test_stop_early(self, tmp_path: Path) -> None:
+        source_1 = tmp_path / "source_1"
+        source_2 = tmp_path / "source_2"
+        install = tmp_path / "install"
+        source_1.touch()
+        source_2.touch()
+        install.touch()
+
+        _set_strictly_ordered_mtimes([install, source_1, source_2])
+        s = self._build_status_for_file(install)
+        # the missing file is not reached
+        source_paths = [source_1, source_2, tmp_path / "missing"]
+        freshness = get_installation_freshness(source_paths, [install], s, stop_early=True)
+        assert freshness == Freshness(False, "installation is out of date", install, source_1)
+
+        _set_strictly_ordered_mtimes([source_1, source_2, install])
+        s = self._build_status_for_file(install)
+        freshness = get_installation_freshness([source_2, source_1], [install], s, stop_early=True)
+        assert freshness == Freshness(True, "", install, source_2)
+
+    def test_snapshot(self, tmp_path: Path) -> None:
+        source_1 = tmp_path / "source_1"
+        source_2 = tmp_path / "source_2"
+        install = tmp_path / "install"
+        source_1.write_text("a")
+        source_2.write_text("b")
+        install.touch()
+        _set_strictly_ordered_mtimes([source_1, source_2, install])
+        s = self._build_status_for_file(install)
+        build_snapshot = FileSnapshot.from_paths([source_1, source_2])
+
+        freshness = get_snapshot_freshness(build_snapshot, FileSnapshot.from_paths([source_1, source_2]), [install], s)
+        assert freshness == Freshness(True, "", install, source_2)
+
+        # moving the mtime backwards is not detected by comparing mtimes with the installation
+        source_1_times = get_file_times(source_1)
+        source_1.write_text("changed")
+        set_file_times(source_1, (source_1_times[0], source_1_times[1] - 1))
+        freshness = get_snapshot_freshness(build_snapshot, FileSnapshot.from_paths([source_1, source_2]), [install], s)
+        assert freshness == Freshness(
+            False, "1 source file(s) changed since the last build", install, source_2, [source_1]
+        )
+
+        freshness = get_snapshot_freshness(build_snapshot, FileSnapshot.from_paths([source_2]), [install], s)
+        assert freshness.changed_source_paths == [source_1]
+
+        with pytest.raises(ImportHookError, match="no source files found"):
+            get_snapshot_freshness(build_snapshot, FileSnapshot.from_paths([]), [install], s)
+
+        freshness = get_snapshot_freshness(build_snapshot, build_snapshot, [], s)
+        assert freshness == Freshness(False, "no installed files found", None, None)
+
+
+class TestFileSnapshot:
+    def test_changed_paths(self, tmp_path: Path) -> None:
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        c = tmp_path / "c"
+        a.write_text("a")
+        b.write_text("b")
+        snapshot = FileSnapshot.from_paths([a, b, tmp_path / "missing"])
+        assert len(snapshot) == 2
+        assert snapshot.changed_paths(FileSnapshot.from_paths([a, b])) == []
+        assert snapshot.changed_paths(FileSnapshot.from_paths([b, a])) == []
+
+        # same mtime but different size
+        times = get_file_times(a)
+        a.write_text("aa")
+        set_file_times(a, times)
+        assert snapshot.changed_paths(FileSnapshot.from_paths([a, b])) == [a]
+
+        # replaced by a different file with the same size and mtime
+        times = get_file_times(b)
+        c.write_text("c")
+        c.replace(b)
+        set_file_times(b, times)
+        assert snapshot.changed_paths(FileSnapshot.from_paths([b])) == [a, b]
+
+        c.touch()
+        assert snapshot.changed_paths(FileSnapshot.from_paths([a, b, c])) == [a, b, c]
+
+    def test_serialization(self, tmp_path: Path) -> None:
+        (tmp_path / "dir").mkdir()
+        (tmp_path / "dir/a").touch()
+        (tmp_path / "b").touch()
+        snapshot = FileSnapshot.scan([tmp_path], set(), set(), set(), set())
+        assert len(snapshot) == 2
+        data = snapshot.to_bytes()
+        assert FileSnapshot.from_bytes(data) == snapshot
+        assert FileSnapshot.from_bytes(data[:20]) is None
+        assert FileSnapshot.from_bytes(b"") is None
+        assert FileSnapshot.from_bytes(b"XXXX" + data[4:]) is None
+
+        empty_snapshot = FileSnapshot.from_paths([])
+        assert FileSnapshot.from_bytes(empty_snapshot.to_bytes()) == empty_snapshot
+
+    def test_scan_unreadable_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        (tmp_path / "unreadable").mkdir()
+        (tmp_path / "unreadable/a").touch()
+        (tmp_path / "b").touch()
+
+        original_scandir = os.scandir
+
+        def patched_scandir(path: str) -> object:
+            if path == str(tmp_path / "unreadable"):
+                raise PermissionError(13, "Permission denied", path)
+            return original_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", patched_scandir)
+        for num_threads in (1, 2):
+            with capture_logs(level=logging.DEBUG) as cap:
+                snapshot = FileSnapshot.scan([tmp_path], set(), set(), set(), set(), num_threads=num_threads)
+            assert snapshot.paths == [str(tmp_path / "b")]
+            assert "skipping" in cap.getvalue()
+            assert "PermissionError" in cap.getvalue()
+
+    def test_find_changed_file(self, tmp_path: Path) -> None:
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        c = tmp_path / "c"
+        a.write_text("a")
+        b.write_text("b")
+        c.write_text("c")
+        _set_strictly_ordered_mtimes([a, b, c])
+        snapshot = FileSnapshot.from_paths([a, b, c])
+        assert snapshot.find_changed_file(3) is None
+        assert get_recent_source_changes(snapshot) is None
+
+        # the most recently modified files are checked first
+        times = get_file_times(a)
+        a.write_text("aa")
+        set_file_times(a, times)
+        assert snapshot.find_changed_file(2) is None
+        assert snapshot.find_changed_file(3) == a
+
+        c.unlink()
+        assert snapshot.find_changed_file(1) == c
+        assert get_recent_source_changes(snapshot) == Freshness(
+            False, f"source file changed since the last build: {c}", None, c, [c]
+        )
+
+    def test_content_hashes(self, tmp_path: Path) -> None:
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        install = tmp_path / "install"
+        a.write_text("a")
+        b.write_text("b")
+        _set_strictly_ordered_mtimes([a, b])
+        atime, mtime = get_file_times(b)
+        set_file_times(a, (atime, mtime - 20))
+        set_file_times(b, (atime, mtime - 10))
+        snapshot = FileSnapshot.from_paths([a, b])
+        snapshot.compute_content_hashes(time.time_ns())
+        assert FileSnapshot.from_bytes(snapshot.to_bytes()) == snapshot
+
+        # modified without changing the content
+        a.write_text("a")
+        b.touch()
+        install.touch()
+        assert snapshot.changed_paths(FileSnapshot.from_paths([a, b])) == []
+        s = BuildStatus(install.stat().st_mtime, install, [], "")
+        freshness = get_snapshot_freshness(snapshot, FileSnapshot.from_paths([a, b]), [install], s)
+        assert freshness.is_fresh
+
+        b.write_text("c")
+        assert snapshot.changed_paths(FileSnapshot.from_paths([a, b])) == [b]
+
+        # files modified after the build started may have changed during the build
+        atime, mtime = get_file_times(b)
+        set_file_times(a, (atime, mtime - 0.5))
+        racy_snapshot = FileSnapshot.from_paths([a, b])
+        racy_snapshot.compute_content_hashes(b.stat().st_mtime_ns)
+        assert racy_snapshot.changed_paths(FileSnapshot.from_paths([a, b])) == [b]
+
+        # whole second mtimes may be rounded down from a time after the build started
+        set_file_times(a, (atime, float(int(mtime))))
+        set_file_times(b, (atime, mtime - 10))
+        racy_snapshot = FileSnapshot.from_paths([a, b])
+        racy_snapshot.compute_content_hashes(int(mtime) * 1_000_000_000 + 500_000_000)
+        assert racy_snapshot.changed_paths(FileSnapshot.from_paths([a, b])) == [a]
+
+    def test_build_cache(self, tmp_path: Path) -> None:
+        (tmp_path / "source").touch()
+        snapshot = FileSnapshot.from_paths([tmp_path / "source"])
+        status = BuildStatus(1.2, tmp_path / "source", [], "")
+        cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1)
+        with cache.lock(tmp_path / "source") as locked_cache:
+            locked_cache.store_build_status(status, snapshot)
+            assert locked_cache.get_build_status(tmp_path / "source") == status
+            assert locked_cache.get_source_snapshot(tmp_path / "source") == snapshot
+            locked_cache.store_build_status(status)
+            assert locked_cache.get_source_snapshot(tmp_path / "source") is None
+
+
+@pytest.mark.parametrize(
+    ("patterns", "path", "is_dir", "expected"),
+    [
+        ("*.log", "a.log", False, True),
+        ("*.log", "dir/a.log", False, True),
+        ("*.log\n!keep.log", "dir/keep.log", False, False),
+        ("\\!important", "!important", False, True),
+        ("# comment", "# comment", False, False),
+        ("build/", "build", False, False),
+        ("build/", "dir/build", True, True),
+        ("/build", "dir/build", True, False),
+        ("dir/build", "dir/build", False, True),
+        ("dir/build", "other/dir/build", False, False),
+        ("**/build", "a/b/build", True, True),
+        ("dir/**", "dir/a/b", False, True),
+        ("dir/**", "dir", True, False),
+        ("a/**/b", "a/b", False, True),
+        ("a/**/b", "a/x/y/b", False, True),
+        ("a?c", "abc", False, True),
+        ("a?c", "a/c", False, False),
+        ("[!a]bc", "xbc", False, True),
+        ("[!a]bc", "abc", False, False),
+        ("trailing  ", "trailing", False, True),
+    ],
+)
+def test_gitignore_patterns(tmp_path: Path, patterns: str, path: str, is_dir: bool, expected: bool) -> None:
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text(patterns)
+    parent, _, name = path.rpartition("/")
+    (tmp_path / parent).mkdir(parents=True, exist_ok=True)
+    matcher = GitignoreRules().get_matcher(str(tmp_path / parent) if parent else str(tmp_path))
+    assert matcher.is_ignored(name, is_dir) == expected
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+def test_file_watcher(tmp_path: Path) -> None:
+    source_dir = tmp_path / "source"
+    sub_dir = source_dir / "sub"
+    sub_dir.mkdir(parents=True)
+    (sub_dir / "lib.rs").touch()
+    dirs = [str(source_dir), str(sub_dir)]
+
+    watcher = FileWatcher.create()
+    assert watcher is not None
+    try:
+        assert not watcher.is_clean("project")
+        assert watcher.watch("project", dirs)
+        watcher.mark_clean("project", dirs)
+        assert watcher.is_clean("project")
+
+        # changes are seen as soon as they are made
+        (sub_dir / "lib.rs").write_text("changed")
+        assert not watcher.is_clean("project")
+        watcher.mark_clean("project", dirs)
+        assert not watcher.is_clean("project")
+
+        # directories that are not being watched
+        assert watcher.watch("project", dirs)
+        (source_dir / "new").mkdir()
+        watcher.mark_clean("project", [*dirs, str(source_dir / "new")])
+        assert not watcher.is_clean("project")
+        assert watcher.watch("project", [*dirs, str(source_dir / "new")])
+        watcher.mark_clean("project", [*dirs, str(source_dir / "new")])
+        assert watcher.is_clean("project")
+
+        (source_dir / "new").rmdir()
+        assert not watcher.is_clean("project")
+        assert _count_inotify_watches(watcher) == 2
+        # watches are removed when they cannot all be added
+        assert not watcher.watch("project", [*dirs, str(source_dir / "new")])
+        assert _count_inotify_watches(watcher) == 0
+
+        # directories which are no longer part of the project are no longer watched
+        assert watcher.watch("project", dirs)
+        assert watcher.watch("other_project", [str(sub_dir)])
+        assert _count_inotify_watches(watcher) == 2
+        assert watcher.watch("project", [str(source_dir)])
+        assert _count_inotify_watches(watcher) == 2
+        watcher.unwatch("other_project")
+        assert _count_inotify_watches(watcher) == 1
+
+        # a moved directory is no longer watched at its new path
+        assert watcher.watch("project", dirs)
+        watcher.mark_clean("project", dirs)
+        sub_dir.rename(tmp_path / "moved")
+        assert not watcher.is_clean("project")
+        assert _count_inotify_watches(watcher) == 1
+        (tmp_path / "moved/lib.rs").write_text("moved")
+        assert watcher.watch("project", [str(source_dir)])
+        watcher.mark_clean("project", [str(source_dir)])
+        (tmp_path / "moved/lib.rs").write_text("changed again")
+        assert watcher.is_clean("project")
+
+        watcher.unwatch("project")
+        assert _count_inotify_watches(watcher) == 0
+    finally:
+        watcher.close()
+
+
+def _count_inotify_watches(watcher: FileWatcher) -> int:
+    fd = watcher._inotify_fd  # noqa: SLF001
+    return sum(line.startswith("inotify wd:") for line in Path(f"/proc/self/fdinfo/{fd}").read_text().splitlines())
+
+
+def test_parse_dep_info(tmp_path: Path) -> None:
+    lib = tmp_path / "src/lib.rs"
+    module = tmp_path / "src/sub dir/module.rs"
+    escaped_module = str(module).replace(" ", "\\ ")
+    dep_info = f"""\
+{tmp_path}/target/debug/libmy_lib.so: {lib} {escaped_module}
+
+{lib}:
+"""
+    assert parse_dep_info(dep_info) == [lib, module]
+    assert parse_dep_info(f"{tmp_path}/target/debug/libmy_lib.so:\n") == []
+    assert parse_dep_info("target/debug/libmy_lib.so: src/lib.rs\n") is None
+    assert parse_dep_info("") is None
+
+
+def test_get_dep_info_path(tmp_path: Path) -> None:
+    manifest_path = tmp_path / "Cargo.toml"
+    metadata = {
+        "packages": [
+            {
+                "manifest_path": str(manifest_path),
+                "targets": [{"name": "my-lib", "crate_types": ["cdylib"]}],
+            }
+        ],
+        "target_directory": str(tmp_path / "target"),
+        "workspace_root": str(tmp_path),
+    }
+    assert get_dep_info_path(metadata, manifest_path, MaturinSettings()) is None
+
+    debug_dep_info = tmp_path / "target/debug/libmy_lib.d"
+    debug_dep_info.parent.mkdir(parents=True)
+    debug_dep_info.touch()
+    assert get_dep_info_path(metadata, manifest_path, MaturinSettings()) == debug_dep_info
+    assert get_dep_info_path(metadata, manifest_path, MaturinSettings(release=True)) is None
+
+    release_dep_info = tmp_path / "other/x86_64-unknown-linux-gnu/release/my_lib.d"
+    release_dep_info.parent.mkdir(parents=True)
+    release_dep_info.touch()
+    settings = MaturinSettings(profile="release", target="x86_64-unknown-linux-gnu", target_dir=str(tmp_path / "other"))
+    assert get_dep_info_path(metadata, manifest_path, settings) == release_dep_info
+    assert get_dep_info_path(metadata, tmp_path / "other/Cargo.toml", MaturinSettings()) is None
+
 
 def test_set_strictly_ordered_mtimes(tmp_path: Path) -> None:
     a = tmp_path / "a"
@@ -345,7 +741,7 @@ def test_resolve_project(project_name: str) -> None:
 def test_build_cache(tmp_path: Path) -> None:
     cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1)
 
-    with cache.lock() as locked_cache:
+    with cache.lock(tmp_path / "source1") as locked_cache:
         dir_1 = locked_cache.tmp_project_dir(tmp_path / "my_module", "my_module")
         dir_2 = locked_cache.tmp_project_dir(tmp_path / "other_place", "my_module")
         assert dir_1 != dir_2
@@ -362,6 +758,441 @@ def test_build_cache(tmp_path: Path) -> None:
         locked_cache.store_build_status(status1b)
         assert locked_cache.get_build_status(tmp_path / "source1") == status1b
 
+        # the build status can be read while another process holds the lock
+        other_cache = BuildCache(tmp_path / "build", lock_timeout_seconds=0.1)
+        assert other_cache.read_only().get_build_status(tmp_path / "source1") == status1b
+        assert other_cache.read_only().get_build_status(tmp_path / "source3") is None
+        with pytest.raises(ImportHookError, match="timed out"), other_cache.lock(tmp_path / "source1"):
+            pass
+        # different projects can be built concurrently
+        with other_cache.lock(tmp_path / "source2"):
+            pass
+        with pytest.raises(ImportHookError, match="timed out"), other_cache.lock_all():
+            pass
+
+    assert sorted(p.suffix for p in (tmp_path / "build/build_status").iterdir()) == [".json", ".json"]
+
+    cache.clear()
+    assert sorted(p.name for p in (tmp_path / "build").iterdir()) == ["lock", "locks"]
+    assert cache.read_only().get_build_status(tmp_path / "source1") is None
+
+
+def test_sqlite_build_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "source1").touch()
+    snapshot = FileSnapshot.from_paths([tmp_path / "source1"])
+    cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1, build_status_store="sqlite")
+    other_cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1, build_status_store="sqlite")
+    assert other_cache.read_only().get_build_status(tmp_path / "source1") is None
+
+    status1 = BuildStatus(1.2, tmp_path / "source1", ["arg1"], "output1")
+    status2 = BuildStatus(1.2, tmp_path / "source2", ["arg2"], "output2", source_paths_from_dep_info=True)
+    with cache.lock(tmp_path / "source1") as locked_cache:
+        locked_cache.store_build_status(status1, snapshot)
+        locked_cache.store_build_status(status2)
+        assert locked_cache.get_build_status(tmp_path / "source1") == status1
+        assert locked_cache.get_source_snapshot(tmp_path / "source1") == snapshot
+        assert locked_cache.get_build_status(tmp_path / "source2") == status2
+        assert locked_cache.get_source_snapshot(tmp_path / "source2") is None
+        # readable while the lock is held (eg by another process)
+        assert other_cache.read_only().get_build_status(tmp_path / "source1") == status1
+
+        status1b = BuildStatus(1.3, tmp_path / "source1", ["arg1b"], "output1b")
+        locked_cache.store_build_status(status1b)
+        assert other_cache.read_only().get_build_status(tmp_path / "source1") == status1b
+        assert other_cache.read_only().get_source_snapshot(tmp_path / "source1") is None
+
+    # connections are not shared between threads
+    results: list[Optional[BuildStatus]] = []
+    thread = threading.Thread(target=lambda: results.append(cache.read_only().get_build_status(tmp_path / "source2")))
+    thread.start()
+    thread.join()
+    assert results == [status2]
+
+    assert sorted(s.source_path.name for s in BuildCache(tmp_path / "build", 1).get_all_build_statuses()) == [
+        "source1",
+        "source2",
+    ]
+    assert not (tmp_path / "build/build_status").exists()
+
+    # the schema is only created when the database is first opened
+    created_schemas = []
+    original_create_schema = _SqliteBuildStatusStore._create_schema  # noqa: SLF001
+
+    def create_schema(self: _SqliteBuildStatusStore, connection: sqlite3.Connection) -> None:
+        created_schemas.append(self.db_path)
+        original_create_schema(self, connection)
+
+    monkeypatch.setattr(_SqliteBuildStatusStore, "_create_schema", create_schema)
+    for build_dir in (tmp_path / "build", tmp_path / "new_build"):
+        BuildCache(build_dir, lock_timeout_seconds=1, build_status_store="sqlite").read_only().get_build_status(
+            tmp_path / "source1"
+        )
+    assert created_schemas == [tmp_path / "new_build/build_status.sqlite3"]
+
+    # opening the existing database to read does not require the write lock (eg while another process is writing)
+    writer = sqlite3.connect(tmp_path / "build/build_status.sqlite3", isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        new_cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1, build_status_store="sqlite")
+        results.clear()
+        thread = threading.Thread(
+            target=lambda: results.append(new_cache.read_only().get_build_status(tmp_path / "source2"))
+        )
+        thread.start()
+        thread.join(timeout=10)
+        assert results == [status2]
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+    thread.join()
+
+    cache.clear()
+    assert (tmp_path / "build/build_status.sqlite3").exists()
+    assert other_cache.read_only().get_build_status(tmp_path / "source1") is None
+    assert cache.get_all_build_statuses() == []
+
+
+@pytest.mark.parametrize("store", ["json", "sqlite"])
+def test_build_history(tmp_path: Path, store: Literal["json", "sqlite"]) -> None:
+    cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1, build_status_store=store)
+    assert cache.get_history() == []
+
+    with cache.lock(tmp_path / "source1") as locked_cache:
+        with locked_cache.record_build(tmp_path / "source1", "package1", "no build status found", 0.01, ["arg1"]):
+            pass
+        with (
+            pytest.raises(ImportHookError),
+            locked_cache.record_build(
+                tmp_path / "source1", "package1", "source file changed since the last build: /a/b.rs", 0.02, ["arg1"]
+            ),
+        ):
+            raise ImportHookError
+        with locked_cache.record_build(tmp_path / "source2", "package2", "3 source files changed", 0.03, ["arg2"]):
+            pass
+    cache.read_only().record_up_to_date(tmp_path / "source1", "package1", 0.04, ["arg1"])
+
+    history = cache.get_history()
+    assert [(e.name, e.success) for e in history] == [
+        ("package1", True),
+        ("package1", False),
+        ("package2", True),
+        ("package1", True),
+    ]
+    assert history[1].reason == "source file changed since the last build: /a/b.rs"
+    assert history[1].freshness_check_seconds == 0.02
+    assert history[2].maturin_args == ["arg2"]
+    assert history[3].reason == UP_TO_DATE_REASON
+    assert history[3].build_seconds == 0.0
+    assert cache.get_history(since=history[2].timestamp) == history[2:]
+
+    stats = summarize_build_history(history)
+    assert stats["checks"] == 4
+    assert stats["builds"] == 3
+    assert stats["total_freshness_check_seconds"] == pytest.approx(0.1)
+    assert stats["reasons"] == {
+        "no build status found": 1,
+        "source file changed since the last build": 1,
+        "N source files changed": 1,
+    }
+    project1 = next(p for p in stats["projects"] if p["name"] == "package1")
+    assert project1["checks"] == 3
+    assert project1["builds"] == 2
+    assert project1["failures"] == 1
+    assert UP_TO_DATE_REASON not in project1["reasons"]
+    assert project1["p95_build_seconds"] == max(e.build_seconds for e in history[:2])
+
+    cache.clear()
+    assert cache.get_history() == []
+
+
+@pytest.mark.parametrize("store", ["json", "sqlite"])
+def test_build_history_retention(
+    tmp_path: Path, store: Literal["json", "sqlite"], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("maturin_import_hook._building._BUILD_HISTORY_MAX_ENTRIES", 3)
+    monkeypatch.setattr("maturin_import_hook._building._JSON_BUILD_HISTORY_TRIM_BYTES", 0)
+    cache = BuildCache(tmp_path / "build", lock_timeout_seconds=1, build_status_store=store)
+    read_only_cache = cache.read_only()
+
+    old_entry = BuildHistoryEntry(0.0, tmp_path / "source1", "package1", UP_TO_DATE_REASON, 0.01, 0.0, [], True)
+    read_only_cache._store.add_history_entry(old_entry)  # noqa: SLF001
+    assert cache.get_history() == []
+
+    for i in range(5):
+        read_only_cache.record_up_to_date(tmp_path / "source1", "package1", float(i), [])
+    assert [e.freshness_check_seconds for e in cache.get_history()] == [2.0, 3.0, 4.0]
+
+
+def test_shared_target_dir_lock(tmp_path: Path) -> None:
+    cache = BuildCache(tmp_path / "build", lock_timeout_seconds=0.1)
+    assert cache.read_only().shared_target_dir == tmp_path / "build/target"
+
+    with cache.lock(tmp_path / "source1"), cache.lock_shared_target_dir():
+        (tmp_path / "build/target/debug").mkdir(parents=True)
+        # held by a build so maintenance must wait
+        with pytest.raises(ImportHookError, match="timed out"), cache.lock_all():
+            pass
+
+    cache.clear()
+    assert not (tmp_path / "build/target").exists()
+    assert (tmp_path / "build/locks/shared_target_dir.lck").exists()
+
+
+def test_generate_project_for_single_rust_file(tmp_path: Path) -> None:
+    rust_file = tmp_path / "my_module.rs"
+    rust_file.write_text("// version 1")
+    project_dir = tmp_path / "project/my_module"
+    importer = MaturinRustFileImporter(build_dir=tmp_path / "build")
+    settings = MaturinSettings()
+
+    assert importer.generate_project_for_single_rust_file("my_module", project_dir, rust_file, settings) == project_dir
+    assert 'name = "my_module"' in (project_dir / "Cargo.toml").read_text()
+    assert (project_dir / "pyproject.toml").exists()
+    assert (project_dir / "src/lib.rs").read_text() == "// version 1"
+    (project_dir / "Cargo.lock").touch()
+    mtimes = {p: p.stat().st_mtime_ns for p in project_dir.rglob("*") if p.is_file()}
+
+    # unchanged files are not rewritten so that cargo can skip them
+    time.sleep(0.01)
+    importer.generate_project_for_single_rust_file("my_module", project_dir, rust_file, settings)
+    assert {p: p.stat().st_mtime_ns for p in project_dir.rglob("*") if p.is_file()} == mtimes
+
+    rust_file.write_text("// version 2")
+    importer.generate_project_for_single_rust_file(
+        "my_module", project_dir, rust_file, MaturinSettings(features=["a", "pyo3/abi3"])
+    )
+    assert (project_dir / "src/lib.rs").read_text() == "// version 2"
+    assert "[features]\na = []\n" in (project_dir / "Cargo.toml").read_text()
+    assert (project_dir / "Cargo.lock").stat().st_mtime_ns == mtimes[project_dir / "Cargo.lock"]
+    assert (project_dir / "pyproject.toml").stat().st_mtime_ns == mtimes[project_dir / "pyproject.toml"]
+
+
+def test_generate_project_for_rust_file_with_submodules(tmp_path: Path) -> None:
+    (tmp_path / "package").mkdir()
+    rust_file = tmp_path / "package/my_module.rs"
+    rust_file.write_text('mod helpers;\n#[path = "../shared/common.rs"]\nmod common;')
+    (tmp_path / "package/helpers.rs").write_text("// helpers")
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared/common.rs").write_text("// common")
+    project_dir = tmp_path / "project/my_module"
+    importer = MaturinRustFileImporter(build_dir=tmp_path / "build")
+
+    importer.generate_project_for_single_rust_file("my_module", project_dir, rust_file, MaturinSettings())
+    # the files keep the same layout relative to each other
+    assert (project_dir / "src/package/lib.rs").read_text() == rust_file.read_text()
+    assert (project_dir / "src/package/helpers.rs").read_text() == "// helpers"
+    assert (project_dir / "src/shared/common.rs").read_text() == "// common"
+    assert 'path = "src/package/lib.rs"' in (project_dir / "Cargo.toml").read_text()
+    assert set(importer.get_source_files(rust_file)) == {
+        rust_file,
+        tmp_path / "package/helpers.rs",
+        tmp_path / "shared/common.rs",
+    }
+
+    # copies of files which are no longer part of the module tree are removed
+    rust_file.write_text("mod helpers;")
+    importer.generate_project_for_single_rust_file("my_module", project_dir, rust_file, MaturinSettings())
+    assert sorted(p.relative_to(project_dir).as_posix() for p in (project_dir / "src").rglob("*")) == [
+        "src/helpers.rs",
+        "src/lib.rs",
+    ]
+
+
+def test_embedded_manifest(tmp_path: Path) -> None:
+    frontmatter_source = dedent("""\
+        #!/usr/bin/env cargo
+        ---cargo
+        [dependencies]
+        rayon = "1"
+        ---
+        use pyo3::prelude::*;
+    """)
+    assert find_embedded_manifest(frontmatter_source) == '[dependencies]\nrayon = "1"\n'
+    assert remove_frontmatter(frontmatter_source) == "#!/usr/bin/env cargo\n\n\n\n\nuse pyo3::prelude::*;\n"
+
+    doc_source = dedent("""\
+        //! A kernel
+        //!
+        //! ```cargo
+        //! [dependencies]
+        //! ndarray = { version = "0.16", features = ["rayon"] }
+        //! ```
+        #![allow(unused)]
+        use pyo3::prelude::*;
+    """)
+    assert parse_embedded_manifest(doc_source) == {
+        "dependencies": {"ndarray": {"version": "0.16", "features": ["rayon"]}}
+    }
+    assert remove_frontmatter(doc_source) == doc_source
+    assert get_embedded_manifest_hash(doc_source) != get_embedded_manifest_hash(frontmatter_source)
+
+    source = "#![allow(unused)]\n---\nuse pyo3::prelude::*;\n"
+    assert find_embedded_manifest(source) is None
+    assert get_embedded_manifest_hash(source) is None
+    assert parse_embedded_manifest(source) == {}
+    with pytest.raises(ImportHookError, match="failed to parse the embedded cargo manifest"):
+        parse_embedded_manifest("---\n[dependencies\n---\n")
+
+    manifest = merge_manifests(
+        {"package": {"name": "a", "edition": "2021"}, "dependencies": {"pyo3": "0.23"}},
+        {"package": {"edition": "2024"}, "dependencies": {"rayon": "1"}, "profile": {"release": {"lto": True}}},
+    )
+    assert manifest == {
+        "package": {"name": "a", "edition": "2024"},
+        "dependencies": {"pyo3": "0.23", "rayon": "1"},
+        "profile": {"release": {"lto": True}},
+    }
+    (tmp_path / "Cargo.toml").write_text(to_toml(manifest))
+    assert load_manifest(tmp_path / "Cargo.toml") == manifest
+    assert get_dependencies_hash(manifest) == get_dependencies_hash({**manifest, "package": {"name": "b"}})
+    assert get_dependencies_hash(manifest) != get_dependencies_hash({**manifest, "dependencies": {}})
+
+
+def test_generate_project_with_embedded_manifest(tmp_path: Path) -> None:
+    importer = MaturinRustFileImporter(build_dir=tmp_path / "build")
+    source = '---\n[dependencies]\nrayon = "1"\npyo3 = "0.22"\n\n[features]\nfast = []\n---\nuse rayon::prelude::*;\n'
+    (tmp_path / "module_a.rs").write_text(source)
+    (tmp_path / "module_b.rs").write_text(source)
+
+    project_a = importer.generate_project_for_single_rust_file(
+        "module_a", tmp_path / "project/module_a", tmp_path / "module_a.rs", MaturinSettings(features=["fast", "x"])
+    )
+    manifest = load_manifest(project_a / "Cargo.toml")
+    assert manifest["package"]["name"] == "module_a"
+    assert manifest["lib"] == {"name": "module_a", "path": "src/lib.rs", "crate-type": ["cdylib"]}
+    assert manifest["dependencies"] == {
+        "pyo3": {"version": "0.22", "features": ["extension-module"]},
+        "rayon": "1",
+    }
+    assert manifest["features"] == {"fast": [], "x": []}
+    assert (project_a / "src/lib.rs").read_text() == "\n" * 8 + "use rayon::prelude::*;\n"
+
+    # modules with the same dependencies start from the same resolved versions
+    (project_a / "Cargo.lock").write_text("# resolved for module_a")
+    _share_lockfile(project_a / "Cargo.toml", importer._build_cache.read_only())  # noqa: SLF001
+    project_b = importer.generate_project_for_single_rust_file(
+        "module_b", tmp_path / "project/module_b", tmp_path / "module_b.rs", MaturinSettings()
+    )
+    assert (project_b / "Cargo.lock").read_text() == "# resolved for module_a"
+
+
+def test_find_module_tree(tmp_path: Path) -> None:
+    files = {
+        "kernel.rs": """\
+            //! mod commented_out;
+            /* nested /* block */ comment mod commented_out; { */
+            mod a;
+            pub(crate) mod b;
+            #[cfg(feature = "x")]
+            #[path = "shared/common.rs"]
+            mod common;
+            mod inline {
+                fn f<'a>(x: &'a str) -> char { let c = '{'; let s = "}"; c }
+                mod deep;
+            }
+            const TABLE: &str = include_str!("data/table.txt");
+            fn g() { let s = r#"mod in_string;"#; }
+            mod missing;
+        """,
+        "a.rs": "",
+        "b/mod.rs": "mod nested;",
+        "b/nested.rs": "mod leaf;",
+        "b/nested/leaf.rs": "",
+        "shared/common.rs": 'include!("../generated/code.rs");',
+        "generated/code.rs": "",
+        "inline/deep.rs": "",
+        "data/table.txt": "",
+        "commented_out.rs": "",
+        "in_string.rs": "",
+        "unrelated.rs": "",
+    }
+    for name, contents in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(dedent(contents))
+
+    tree = find_module_tree(tmp_path / "kernel.rs")
+    assert tree[0] == tmp_path / "kernel.rs"
+    assert sorted(str(p.relative_to(tmp_path)) for p in tree) == [
+        "a.rs",
+        "b/mod.rs",
+        "b/nested.rs",
+        "b/nested/leaf.rs",
+        "data/table.txt",
+        "generated/code.rs",
+        "inline/deep.rs",
+        "kernel.rs",
+        "shared/common.rs",
+    ]
+
+
+def test_find_cdylib_artifact(tmp_path: Path) -> None:
+    manifest_path = tmp_path / "my_module/Cargo.toml"
+
+    def artifact(manifest: Path, kind: list[str], filenames: list[str]) -> str:
+        target = {"kind": kind, "name": "x"}
+        return json.dumps({
+            "reason": "compiler-artifact",
+            "manifest_path": str(manifest),
+            "target": target,
+            "filenames": filenames,
+        })
+
+    messages = [
+        "not json",
+        artifact(tmp_path / "pyo3/Cargo.toml", ["lib"], ["/target/debug/libpyo3.rlib"]),
+        artifact(tmp_path / "other/Cargo.toml", ["cdylib"], ["/target/debug/libother.so"]),
+        artifact(manifest_path, ["cdylib"], ["/target/debug/my_module.dll.lib", "/target/debug/my_module.dll"]),
+        json.dumps({"reason": "build-finished", "success": True}),
+    ]
+    assert find_cdylib_artifact("\n".join(messages), manifest_path) == Path("/target/debug/my_module.dll")
+    assert find_cdylib_artifact("\n".join(messages[:3]), manifest_path) is None
+
+
+def test_is_stdlib_module() -> None:
+    assert is_stdlib_module("sys")
+    assert is_stdlib_module("json")
+    assert is_stdlib_module("json.decoder")
+    assert is_stdlib_module(sys.builtin_module_names[0])
+    assert not is_stdlib_module("my_package")
+    assert not is_stdlib_module("my_package.json")
+
+
+def test_rust_file_importer_shadows_stdlib_module(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # like a `.py` file, a `.rs` file with the same name as a stdlib module is imported instead of the stdlib module
+    assert "colorsys" not in sys.modules
+    (tmp_path / "colorsys.rs").touch()
+    imported: list[tuple[str, Path]] = []
+
+    def import_rust_file(
+        _self: MaturinRustFileImporter, module_path: str, _module_name: str, file_path: Path
+    ) -> tuple[None, bool]:
+        imported.append((module_path, file_path))
+        return None, False
+
+    monkeypatch.setattr(MaturinRustFileImporter, "_import_rust_file", import_rust_file)
+    importer = MaturinRustFileImporter(build_dir=tmp_path / "build")
+    assert importer.find_spec("colorsys", [str(tmp_path)]) is None
+    assert imported == [("colorsys", tmp_path / "colorsys.rs")]
+
+
+@pytest.mark.skipif(platform.system() == "Windows", reason="file permissions are not supported on Windows")
+def test_write_file_atomically(tmp_path: Path) -> None:
+    write_file_atomically(tmp_path / "a", "a")
+    assert (tmp_path / "a").read_text() == "a"
+    assert (tmp_path / "a").stat().st_mode & 0o777 == 0o600
+    write_file_atomically(tmp_path / "a", b"b", mode=0o755)
+    assert (tmp_path / "a").read_text() == "b"
+    assert (tmp_path / "a").stat().st_mode & 0o777 == 0o755
+    assert [p.name for p in tmp_path.iterdir()] == ["a"]
+
+
+def test_build_extension_module_fallback(tmp_path: Path) -> None:
+    # the wheel built by maturin is used for settings that cargo cannot handle in the same way
+    manifest_path = tmp_path / "Cargo.toml"
+    for settings in (MaturinSettings(target="aarch64-unknown-linux-gnu"), MaturinSettings(zig=True)):
+        assert build_extension_module(manifest_path, tmp_path / "dist", "my_module", settings) is None
+
 
 def test_uri_to_path() -> None:
     if platform.system() == "Windows":
@@ -386,6 +1217,446 @@ def test_load_dist_info(tmp_path: Path) -> None:
     assert linked_path == path
     assert is_editable
 
+    # names are matched exactly (after normalization) rather than by prefix
+    assert _load_dist_info(tmp_path, "package", require_project_target=False) == (None, False)
+    assert _load_dist_info(tmp_path, "Package.Foo", require_project_target=False) == (path, True)
+
+    other_dist_info = tmp_path / "package_foobar-2.0.0.dist-info"
+    other_dist_info.mkdir()
+    (other_dist_info / "direct_url.json").write_text('{"dir_info": {"editable": false}, "url": "' + uri + '"}')
+    os.utime(tmp_path, ns=(0, tmp_path.stat().st_mtime_ns + 1_000_000_000))
+    assert _load_dist_info(tmp_path, "package_foobar", require_project_target=False) == (path, False)
+    assert _load_dist_info(tmp_path, "package_foo", require_project_target=False) == (path, True)
+
+
+def test_project_importer_not_found_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    search_dir = tmp_path / "search_dir"
+    search_dir.mkdir()
+    monkeypatch.setattr(sys, "path", [str(search_dir)])
+
+    num_searches = 0
+    original_get_candidates = _ProjectIndex.get_candidates
+
+    def counting_get_candidates(
+        self: _ProjectIndex, package_name: str, fingerprint: _SearchPathFingerprint
+    ) -> list[_ProjectCandidate]:
+        nonlocal num_searches
+        num_searches += 1
+        return original_get_candidates(self, package_name, fingerprint)
+
+    monkeypatch.setattr(_ProjectIndex, "get_candidates", counting_get_candidates)
+
+    importer = MaturinProjectImporter(build_dir=tmp_path / "build")
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 1
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 1
+    assert importer.find_spec("other_missing_package") is None
+    assert num_searches == 2
+
+    # installing a package changes the mtime of the search path, which is checked periodically
+    (search_dir / "new_package").mkdir()
+    os.utime(search_dir, ns=(0, search_dir.stat().st_mtime_ns + 1_000_000_000))
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 2
+    monkeypatch.setattr(project_importer, "_SEARCH_PATH_RECHECK_SECONDS", 0.0)
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 3
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 3
+    monkeypatch.setattr(project_importer, "_SEARCH_PATH_RECHECK_SECONDS", 60.0)
+
+    # or after `invalidate_caches()`
+    os.utime(search_dir, ns=(0, search_dir.stat().st_mtime_ns + 1_000_000_000))
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 3
+    importer.invalidate_caches()
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 4
+
+    monkeypatch.setattr(sys, "path", [str(search_dir), str(tmp_path)])
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 5
+
+    importer.invalidate_caches()
+    assert importer.find_spec("missing_package") is None
+    assert num_searches == 6
+
+
+def test_project_importer_background_rebuild(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    stale_spec = importlib.machinery.ModuleSpec("my_package", None)
+    monkeypatch.setattr(project_importer, "_find_spec_for_package", lambda _package_name: stale_spec)
+    monkeypatch.setattr(project_importer, "_find_installed_package_root", lambda _resolved, _spec: tmp_path)
+
+    build_started = threading.Event()
+    allow_build_to_finish = threading.Event()
+    num_builds = 0
+
+    def build_project(*_args: object) -> None:
+        nonlocal num_builds
+        num_builds += 1
+        build_started.set()
+        assert allow_build_to_finish.wait(10)
+        if num_builds == 2:
+            msg = "build failed"
+            raise ImportHookError(msg)
+
+    monkeypatch.setattr(MaturinProjectImporter, "_build_project", build_project)
+
+    importer = MaturinProjectImporter(build_dir=tmp_path / "build", enable_background_rebuild=True)
+    resolved = MaturinProject(tmp_path / "Cargo.toml", "my_package", tmp_path, None, None, [])
+    settings = MaturinSettings()
+    start_background_rebuild = importer._start_background_rebuild  # noqa: SLF001
+    assert importer.get_background_build("my_package") is None
+
+    spec = start_background_rebuild("my_package", tmp_path, resolved, settings)
+    assert spec is stale_spec
+    background_build = importer.get_background_build("my_package")
+    assert background_build is not None
+    assert build_started.wait(10)
+    assert background_build.is_running
+    assert not background_build.wait(0)
+
+    # only one build runs at a time
+    assert start_background_rebuild("my_package", tmp_path, resolved, settings) is stale_spec
+    assert importer.get_background_build("my_package") is background_build
+
+    allow_build_to_finish.set()
+    assert background_build.wait(10)
+    assert not background_build.is_running
+    assert background_build.succeeded
+    assert background_build.end_time is not None
+    assert num_builds == 1
+
+    assert start_background_rebuild("my_package", tmp_path, resolved, settings) is stale_spec
+    failed_build = importer.get_background_build("my_package")
+    assert failed_build is not None
+    assert failed_build is not background_build
+    assert failed_build.wait(10)
+    assert not failed_build.succeeded
+    assert isinstance(failed_build.error, ImportHookError)
+    assert num_builds == 2
+
+    # a build is not started if there is no installation to import in the meantime
+    monkeypatch.setattr(project_importer, "_find_spec_for_package", lambda _package_name: None)
+    assert start_background_rebuild("my_package", tmp_path, resolved, settings) is None
+    assert importer.get_background_build("my_package") is failed_build
+
+
+def test_project_importer_background_prebuild(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    package_names = ["package_a", "package_b", "package_c"]
+    all_candidates = {name: [_ProjectCandidate(tmp_path / name, tmp_path, True)] for name in package_names}
+    monkeypatch.setattr(_ProjectIndex, "get_all_candidates", lambda _self, _search_paths: all_candidates)
+    monkeypatch.setattr(
+        _ProjectIndex, "get_candidates", lambda _self, package_name, _fingerprint: all_candidates.get(package_name, [])
+    )
+
+    lock = threading.Lock()
+    num_running = 0
+    max_running = 0
+    finished: list[str] = []
+
+    def rebuild_project(
+        _self: MaturinProjectImporter, package_name: str, _project_dir: Path
+    ) -> tuple[Optional[importlib.machinery.ModuleSpec], bool]:
+        nonlocal num_running, max_running
+        with lock:
+            num_running += 1
+            max_running = max(max_running, num_running)
+        time.sleep(0.2)
+        with lock:
+            num_running -= 1
+            finished.append(package_name)
+        return importlib.machinery.ModuleSpec(package_name, None), True
+
+    monkeypatch.setattr(MaturinProjectImporter, "_rebuild_project", rebuild_project)
+
+    importer = MaturinProjectImporter(build_dir=tmp_path / "build")
+    importer.start_background_prebuild(max_jobs=2)
+    deadline = time.monotonic() + 10
+    while "package_c" not in importer._prebuilds and time.monotonic() < deadline:  # noqa: SLF001
+        time.sleep(0.01)
+    # importing a package waits for the prebuild of that package and uses the result instead of checking it again
+    spec = importer.find_spec("package_c")
+    assert spec is not None
+    assert spec.name == "package_c"
+    assert finished.count("package_c") == 1
+
+    deadline = time.monotonic() + 10
+    while len(finished) < len(package_names) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(finished) == package_names
+    assert max_running == 2
+
+    # a prebuild that finished before the import started may be outdated so the package is checked again
+    assert importer.find_spec("package_a") is not None
+    assert finished.count("package_a") == 2
+
+
+def test_prebuild(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    project_dir = tmp_path / "my_project"
+    project_dir.mkdir()
+    (project_dir / "pyproject.toml").write_text("[build-system]\nrequires = ['maturin']\n")
+    (project_dir / "Cargo.toml").write_text("[package]\nname = 'my_project'\n")
+    rust_file = tmp_path / "my_module.rs"
+    rust_file.touch()
+
+    built: list[tuple[str, Optional[Path]]] = []
+
+    def prebuild_package(_self: MaturinProjectImporter, package_name: str, project_dir: Optional[Path] = None) -> bool:
+        if package_name == "broken_package":
+            msg = "build failed"
+            raise ImportHookError(msg)
+        if package_name == "missing_dependency_package":
+            raise FileNotFoundError(2, "No such file or directory")
+        built.append((package_name, project_dir))
+        return package_name == "my_project"
+
+    def prebuild_rust_file(_self: MaturinRustFileImporter, file_path: Path, module_path: Optional[str] = None) -> bool:
+        built.append((file_path.name, file_path))
+        return False
+
+    monkeypatch.setattr(MaturinProjectImporter, "prebuild", prebuild_package)
+    monkeypatch.setattr(MaturinRustFileImporter, "prebuild", prebuild_rust_file)
+
+    targets: list[Union[str, Path]] = [
+        "other_package",
+        project_dir,
+        str(rust_file),
+        "broken_package",
+        str(tmp_path / "missing.rs"),
+        str(tmp_path),
+        "missing_dependency_package",
+    ]
+    with capture_logs() as cap:
+        results = prebuild(targets, max_jobs=3, build_dir=tmp_path / "build")
+    assert [r.target for r in results] == [str(t) for t in targets]
+    assert [(r.success, r.rebuilt) for r in results] == [
+        (True, False),
+        (True, True),
+        (True, False),
+        (False, False),
+        (False, False),
+        (False, False),
+        (False, False),
+    ]
+    assert results[3].error == "build failed"
+    assert results[4].error == f'rust file "{tmp_path / "missing.rs"}" does not exist'
+    assert results[5].error == f'"{tmp_path}" is not a maturin project'
+    # unexpected errors only fail the target that raised them
+    assert results[6].error == "FileNotFoundError(2, 'No such file or directory')"
+    assert "Traceback" in cap.getvalue()
+    assert sorted(built, key=str) == sorted(
+        [("other_package", None), ("my_project", project_dir.resolve()), ("my_module.rs", rust_file)], key=str
+    )
+
+
+def test_prebuild_all(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    all_candidates = {
+        "editable_package": [_ProjectCandidate(tmp_path / "editable", tmp_path, True)],
+        "installed_package": [_ProjectCandidate(tmp_path / "installed", tmp_path, False)],
+        "local_package": [_ProjectCandidate(tmp_path / "local", tmp_path, None)],
+    }
+    monkeypatch.setattr(_ProjectIndex, "get_all_candidates", lambda _self, _search_paths: all_candidates)
+    monkeypatch.setattr(MaturinProjectImporter, "prebuild", lambda _self, _package_name, _project_dir=None: False)
+
+    # packages that are not installed in editable mode would not be rebuilt when imported
+    results = prebuild(build_dir=tmp_path / "build")
+    assert [r.target for r in results] == ["editable_package", "local_package"]
+    results = prebuild(build_dir=tmp_path / "build", enable_automatic_installation=True)
+    assert [r.target for r in results] == ["editable_package", "installed_package", "local_package"]
+
+
+def test_rust_file_importer_directory_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    search_dir = tmp_path / "search_dir"
+    search_dir.mkdir()
+    (search_dir / "my_module.rs").touch()
+    (search_dir / "my_script.py").touch()
+
+    imported = []
+
+    def fake_import_rust_file(
+        self: MaturinRustFileImporter, module_path: str, module_name: str, file_path: Path
+    ) -> tuple[None, bool]:
+        imported.append(file_path.name)
+        return None, False
+
+    monkeypatch.setattr(MaturinRustFileImporter, "_import_rust_file", fake_import_rust_file)
+
+    importer = MaturinRustFileImporter(build_dir=tmp_path / "build")
+    search_paths = [str(search_dir), str(tmp_path / "missing")]
+    assert importer.find_spec("my_module", search_paths) is None
+    assert importer.find_spec("my_script", search_paths) is None
+    assert importer.find_spec("other_module", search_paths) is None
+    assert imported == ["my_module.rs"]
+
+    # the directory listing is only refreshed when the mtime of the directory changes
+    mtime_ns = search_dir.stat().st_mtime_ns
+    (search_dir / "other_module.rs").touch()
+    os.utime(search_dir, ns=(0, mtime_ns))
+    assert importer.find_spec("other_module", search_paths) is None
+    assert imported == ["my_module.rs"]
+
+    importer.invalidate_caches()
+    assert importer.find_spec("other_module", search_paths) is None
+    assert imported == ["my_module.rs", "other_module.rs"]
+
+    (search_dir / "other_module.rs").unlink()
+    os.utime(search_dir, ns=(0, mtime_ns + 1_000_000_000))
+    assert importer.find_spec("other_module", search_paths) is None
+    assert imported == ["my_module.rs", "other_module.rs"]
+
+
+def test_rust_file_importer_path_hook(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    search_dir = tmp_path / "search_dir"
+    search_dir.mkdir()
+    (search_dir / "my_rust_module.rs").touch()
+    # stands in for the compiled extension module
+    built_module = tmp_path / "built.py"
+    built_module.write_text("value = 42\n")
+
+    imported = []
+
+    def fake_import_rust_file(
+        self: MaturinRustFileImporter, module_path: str, module_name: str, file_path: Path
+    ) -> tuple[Optional[importlib.machinery.ModuleSpec], bool]:
+        imported.append((module_path, file_path))
+        return importlib.util.spec_from_file_location(module_path, built_module), True
+
+    monkeypatch.setattr(MaturinRustFileImporter, "_import_rust_file", fake_import_rust_file)
+    monkeypatch.setattr(sys, "path", [str(search_dir)])
+    monkeypatch.setattr(sys, "meta_path", sys.meta_path.copy())
+    monkeypatch.setattr(sys, "path_hooks", sys.path_hooks.copy())
+    monkeypatch.setattr(sys, "path_importer_cache", {})
+    monkeypatch.delitem(sys.modules, "my_rust_module", raising=False)
+
+    num_path_hooks = len(sys.path_hooks)
+    importer = rust_file_importer.install(build_dir=tmp_path / "build", use_path_hooks=True)
+    try:
+        assert rust_file_importer.is_installed()
+        assert importer not in sys.meta_path
+        module = importlib.import_module("my_rust_module")
+        assert module.value == 42
+        assert module.__file__ == str(built_module)
+        assert imported == [("my_rust_module", search_dir / "my_rust_module.rs")]
+    finally:
+        rust_file_importer.uninstall()
+    assert not rust_file_importer.is_installed()
+    assert len(sys.path_hooks) == num_path_hooks
+
+
+def test_project_index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    project_dir = tmp_path / "my-project"
+    project_dir.mkdir()
+    (project_dir / "pyproject.toml").write_text(
+        dedent("""\
+        [build-system]
+        requires = ["maturin"]
+        build-backend = "maturin"
+
+        [tool.maturin]
+        module-name = "my_project"
+        """)
+    )
+    (project_dir / "Cargo.toml").write_text('[package]\nname = "my-project"\nversion = "0.1.0"\n')
+
+    site_packages = tmp_path / "site-packages"
+    dist_info = site_packages / "my_project-0.1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    direct_url = {"dir_info": {"editable": True}, "url": project_dir.as_uri()}
+    (dist_info / "direct_url.json").write_text(json.dumps(direct_url))
+    other_dist_info = site_packages / "other-1.0.dist-info"
+    other_dist_info.mkdir()
+
+    script_dir = project_dir / "scripts"
+    script_dir.mkdir()
+
+    search_paths = [str(script_dir), str(site_packages)]
+    fingerprint = _get_search_path_fingerprint(search_paths)
+    index_path = tmp_path / "build/project_index.json"
+    # creating the directory would modify `tmp_path`, which is checked for projects above the search paths
+    index_path.parent.mkdir()
+
+    loaded_dist_info = []
+    original_load_dist_info = project_importer._load_dist_info  # noqa: SLF001
+
+    def counting_load_dist_info(path: Path, package_name: str) -> tuple[Optional[Path], bool]:
+        loaded_dist_info.append(package_name)
+        return original_load_dist_info(path, package_name)
+
+    monkeypatch.setattr(project_importer, "_load_dist_info", counting_load_dist_info)
+
+    index = _ProjectIndex(index_path, ProjectResolver())
+    expected_candidates = [
+        _ProjectCandidate(project_dir, script_dir, None),
+        _ProjectCandidate(project_dir, site_packages, True),
+    ]
+    # only the dist-info of the requested package is read
+    assert index.get_candidates("my_project", fingerprint) == expected_candidates
+    assert loaded_dist_info == ["my_project"]
+    assert index.get_candidates("other", fingerprint) == []
+    assert loaded_dist_info == ["my_project", "other"]
+    assert index_path.exists()
+
+    # another process can use the persisted index without resolving projects or reading dist-info
+    class FailingResolver(ProjectResolver):
+        def resolve(self, project_dir: Path) -> Optional[MaturinProject]:
+            raise AssertionError
+
+    def failing_find_maturin_project_above(_path: Path) -> object:
+        raise AssertionError
+
+    with monkeypatch.context() as m:
+        m.setattr(project_importer, "_find_maturin_project_above", failing_find_maturin_project_above)
+        index = _ProjectIndex(index_path, FailingResolver())
+        assert index.get_candidates("my_project", fingerprint) == expected_candidates
+
+        # clearing only discards the entries held in memory
+        index.clear()
+        assert index.get_candidates("my_project", fingerprint) == expected_candidates
+        assert index.get_all_candidates(search_paths) == {"my_project": expected_candidates}
+    assert loaded_dist_info == ["my_project", "other"]
+
+    # changes to the project manifest are detected
+    pyproject = (project_dir / "pyproject.toml").read_text()
+    (project_dir / "pyproject.toml").write_text(pyproject.replace("my_project", "renamed_project"))
+    os.utime(project_dir / "pyproject.toml", ns=(0, 1_000_000_000))
+    index = _ProjectIndex(index_path, ProjectResolver())
+    assert index.get_candidates("my_project", fingerprint) == []
+    # the dist-info is only found by its distribution name, which is no longer the name of the package
+    assert index.get_candidates("renamed_project", fingerprint) == expected_candidates[:1]
+    assert index.get_all_candidates(search_paths) == {"renamed_project": expected_candidates}
+
+    # changes to the search path are detected
+    shutil.rmtree(dist_info)
+    os.utime(site_packages, ns=(0, site_packages.stat().st_mtime_ns + 1_000_000_000))
+    index = _ProjectIndex(index_path, ProjectResolver())
+    fingerprint = _get_search_path_fingerprint(search_paths)
+    assert index.get_candidates("renamed_project", fingerprint) == expected_candidates[:1]
+
+    # a project created above a search path is detected
+    (script_dir / "pyproject.toml").write_text(pyproject.replace("my_project", "scripts_project"))
+    (script_dir / "Cargo.toml").write_text('[package]\nname = "scripts-project"\nversion = "0.1.0"\n')
+    index = _ProjectIndex(index_path, ProjectResolver())
+    assert index.get_candidates("scripts_project", fingerprint) == [_ProjectCandidate(script_dir, script_dir, None)]
+
+    # entries for search paths used by other processes are kept
+    assert index.rebuild([str(site_packages)]) == {}
+    data = json.loads(index_path.read_text())
+    assert set(data["search_paths"]) == {str(script_dir), str(site_packages)}
+    assert set(data["projects_above"]) == {str(script_dir), str(site_packages)}
+    index = _ProjectIndex(index_path, ProjectResolver())
+    assert index.get_candidates("scripts_project", fingerprint) == [_ProjectCandidate(script_dir, script_dir, None)]
+
+    # entries for search paths which have not been used for a long time are removed
+    data["last_used"][str(script_dir)] = 0.0
+    index_path.write_text(json.dumps(data))
+    assert _ProjectIndex(index_path, ProjectResolver()).rebuild([str(site_packages)]) == {}
+    data = json.loads(index_path.read_text())
+    assert list(data["search_paths"]) == [str(site_packages)]
+    assert list(data["projects_above"]) == [str(site_packages)]
+    assert data["projects"] == {}
+
 
 def test_toml_file_loading(tmp_path: Path) -> None:
     toml_path = tmp_path / "my_file.toml"